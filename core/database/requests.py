@@ -1,6 +1,5 @@
 import logging
 import re
-import json
 import os
 from datetime import datetime, date
 from typing import Dict, Any, List, Optional
@@ -16,6 +15,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from pathlib import Path
 from sqlalchemy import text
+from core.parser.json_writer import write_json_atomic
 
 logger = logging.getLogger(__name__)
 
@@ -236,12 +236,95 @@ async def delete_existing_request_data(session, claim_number: str, vin: str):
         .where(ParserCarRequestStatus.vin == vin)
     )
 
-async def save_parser_data_to_db(parser_data: dict, claim_number: str, vin: str, is_success: bool = True, started_at=None, completed_at=None, file_path: str = None, svg_collection: bool = True) -> bool:
-    """Оптимизированное сохранение данных парсера с batch операциями"""
+async def delete_partial_request_data(session, claim_number: str, vin: str, refresh: dict):
+    """Удаляет только те части заявки, которые обновляются частичным запуском"""
+    stages = refresh.get("stages", [])
+    zone_titles = refresh.get("zone_titles", [])
+    
+    if "options" in stages:
+        await session.execute(
+            delete(ParserCarOptions)
+            .where(ParserCarOptions.request_id == claim_number)
+            .where(ParserCarOptions.vin == vin)
+        )
+    
+    if "zones" not in stages:
+        return
+    
+    if not zone_titles:
+        await session.execute(
+            delete(ParserCarDetail)
+            .where(ParserCarDetail.request_id == claim_number)
+            .where(ParserCarDetail.vin == vin)
+        )
+        await session.execute(
+            delete(ParserCarDetailGroupZone)
+            .where(ParserCarDetailGroupZone.request_id == claim_number)
+            .where(ParserCarDetailGroupZone.vin == vin)
+        )
+        return
+    
+    # Удаляем только выбранные зоны и их детали
+    result = await session.execute(
+        select(ParserCarDetailGroupZone.id)
+        .where(ParserCarDetailGroupZone.request_id == claim_number)
+        .where(ParserCarDetailGroupZone.vin == vin)
+        .where(ParserCarDetailGroupZone.title.in_(zone_titles))
+    )
+    zone_ids = list(result.scalars().all())
+    if not zone_ids:
+        return
+    await session.execute(
+        delete(ParserCarDetail)
+        .where(ParserCarDetail.request_id == claim_number)
+        .where(ParserCarDetail.vin == vin)
+        .where(ParserCarDetail.group_zone.in_([str(zone_id) for zone_id in zone_ids]))
+    )
+    await session.execute(
+        delete(ParserCarDetailGroupZone)
+        .where(ParserCarDetailGroupZone.id.in_(zone_ids))
+    )
+
+async def save_parser_data_to_db(parser_data: dict, claim_number: str, vin: str, is_success: bool = True, started_at=None, completed_at=None, file_path: str = None, svg_collection: bool = True, refresh: Optional[dict] = None) -> bool:
+    """
+    Оптимизированное сохранение данных парсера с batch операциями.
+    
+    При частичном обновлении (refresh = {"stages", "zone_titles"}) заменяются
+    только обновлённые опции и зоны, остальные данные заявки сохраняются.
+    """
     try:
         async with DatabaseSession() as session:
-            # Удаляем существующие данные
-            await delete_existing_request_data(session, claim_number, vin)
+            zone_records = parser_data.get("zone_data", [])
+            existing_equipment = set()
+            equipment_zone_id = None
+            
+            if refresh:
+                # Удаляем только обновляемые части
+                await delete_partial_request_data(session, claim_number, vin, refresh)
+                if "zones" not in refresh.get("stages", []):
+                    zone_records = []
+                elif refresh.get("zone_titles"):
+                    zone_records = [zone for zone in zone_records if zone.get('title', '') in refresh["zone_titles"]]
+                    # Зона комплектации общая для всех зон - используем существующую
+                    result = await session.execute(
+                        select(ParserCarDetailGroupZone.id)
+                        .where(ParserCarDetailGroupZone.request_id == claim_number)
+                        .where(ParserCarDetailGroupZone.vin == vin)
+                        .where(ParserCarDetailGroupZone.title == "Комплектация")
+                    )
+                    existing_zone_id = result.scalar()
+                    if existing_zone_id is not None:
+                        equipment_zone_id = str(existing_zone_id)
+                        result = await session.execute(
+                            select(ParserCarDetail.code, ParserCarDetail.title)
+                            .where(ParserCarDetail.request_id == claim_number)
+                            .where(ParserCarDetail.vin == vin)
+                            .where(ParserCarDetail.group_zone == equipment_zone_id)
+                        )
+                        existing_equipment = {(row[0], row[1]) for row in result.all()}
+            else:
+                # Удаляем существующие данные
+                await delete_existing_request_data(session, claim_number, vin)
             
             # Подготавливаем данные для batch операций
             details = []
@@ -250,10 +333,9 @@ async def save_parser_data_to_db(parser_data: dict, claim_number: str, vin: str,
             
             # Создаем зоны и получаем их ID
             zone_ids = {}
-            equipment_zone_id = None
             
             # Обрабатываем зоны и детали
-            for zone in parser_data.get("zone_data", []):
+            for zone in zone_records:
                 zone_title = zone.get('title', '')
                 has_pictograms = zone.get('has_pictograms', False)
                 
@@ -313,6 +395,9 @@ async def save_parser_data_to_db(parser_data: dict, claim_number: str, vin: str,
                         
                         # Определяем, к какой зоне относится деталь
                         if is_letter_code(code):
+                            if (code, title) in existing_equipment:
+                                # Деталь комплектации уже сохранена другой зоной
+                                continue
                             # Детали с буквенными кодами идут в EQUIPMENT
                             if equipment_zone_id is None:
                                 equipment_zone_data = {
@@ -359,6 +444,9 @@ async def save_parser_data_to_db(parser_data: dict, claim_number: str, vin: str,
             
             # Обрабатываем опции автомобиля
             options_data = parser_data.get('options_data', {})
+            if refresh and "options" not in refresh.get("stages", []):
+                # Опции не обновлялись - существующие записи остаются
+                options_data = None
             if options_data and options_data.get('success'):
                 for zone in options_data.get('zones', []):
                     zone_title = zone.get('zone_title', '')
@@ -435,8 +523,7 @@ def update_json_with_claim_number(json_data: Dict[str, Any], claim_number: str)
 async def save_updated_json_to_file(json_data: Dict[str, Any], file_path: str) -> bool:
     """Сохраняет обновленный JSON в файл"""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
+        write_json_atomic(file_path, json_data)
         logger.info(f"✅ JSON успешно обновлен и сохранен: {file_path}")
         return True
     except Exception as e:
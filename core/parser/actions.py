@@ -22,6 +22,7 @@ from .constants import (
     TIMEOUT, OPEN_TABLE_SELECTOR, OUTGOING_TABLE_SELECTOR, ROW_SELECTOR, 
     MORE_ICON_SELECTOR, IFRAME_ID, EMPTY_TABLE_TEXT_SELECTOR, EMPTY_TABLE_TEXT
 )
+from .wait_engine import wait_for_dom_quiet, wait_for_selector
 
 logger = logging.getLogger(__name__)
 
@@ -269,71 +270,25 @@ def wait_for_table(driver: WebDriver, selector: Optional[str] = None) -> bool:
         try:
             logger.info(f"Ожидание таблицы с селектором: {sel}")
             
-            # Ждем появления элемента с динамическим таймаутом
-            start_time = time.time()
-            table_element = None
-            
-            while time.time() - start_time < max_timeout:
-                try:
-                    # Проверяем наличие элемента каждые 0.5 секунды
-                    table_element = driver.find_element(By.CSS_SELECTOR, sel)
-                    if table_element:
-                        logger.info(f"✅ Элемент таблицы найден: {sel}")
-                        break
-                except NoSuchElementException:
-                    time.sleep(0.5)
-                    continue
-            
-            if not table_element:
+            # Ждем появления элемента по событию мутации DOM (без опроса с паузами)
+            if not wait_for_selector(driver, sel, timeout=max_timeout):
                 logger.warning(f"⚠️ Таблица с селектором '{sel}' не найдена за {max_timeout} секунд")
                 continue
+            logger.info(f"✅ Элемент таблицы найден: {sel}")
             
-            # Сразу после нахождения элемента проверяем видимость с динамическим ожиданием
-            try:
-                # Ждем, что элемент стал видимым (динамически до 2 минут)
-                visibility_start_time = time.time()
-                while time.time() - visibility_start_time < max_timeout:
-                    try:
-                        if table_element.is_displayed():
-                            logger.info(f"✅ Таблица '{sel}' стала видимой")
-                            break
-                        time.sleep(0.5)
-                    except Exception:
-                        time.sleep(0.5)
-                        continue
-                else:
-                    logger.warning(f"⚠️ Таблица '{sel}' найдена, но не стала видимой за {max_timeout} секунд")
-                    continue
-                
-                # Проверяем, что таблица не пустая (есть строки или сообщение о пустоте) с динамическим ожиданием
-                try:
-                    # Ждем либо строки таблицы, либо сообщения о пустоте (динамически до 2 минут)
-                    content_start_time = time.time()
-                    while time.time() - content_start_time < max_timeout:
-                        try:
-                            rows = driver.find_elements(By.CSS_SELECTOR, ROW_SELECTOR)
-                            empty_text = driver.find_elements(By.CSS_SELECTOR, EMPTY_TABLE_TEXT_SELECTOR)
-                            
-                            if len(rows) > 0 or len(empty_text) > 0:
-                                logger.info(f"✅ Таблица '{sel}' полностью загружена и готова")
-                                return True
-                            time.sleep(0.5)
-                        except Exception:
-                            time.sleep(0.5)
-                            continue
-                    else:
-                        logger.warning(f"⚠️ Таблица '{sel}' найдена и видима, но содержимое не загрузилось за {max_timeout} секунд")
-                        # Возвращаем True, так как таблица есть и видима, просто может быть пустая
-                        return True
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Ошибка при проверке содержимого таблицы '{sel}': {e}")
-                    # Возвращаем True, так как таблица есть и видима
-                    return True
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Ошибка при проверке видимости таблицы '{sel}': {e}")
+            # Сразу после нахождения элемента дожидаемся его видимости
+            if not wait_for_selector(driver, sel, timeout=max_timeout, visible=True):
+                logger.warning(f"⚠️ Таблица '{sel}' найдена, но не стала видимой за {max_timeout} секунд")
                 continue
+            logger.info(f"✅ Таблица '{sel}' стала видимой")
+            
+            # Проверяем, что таблица не пустая (есть строки или сообщение о пустоте)
+            if wait_for_selector(driver, f"{ROW_SELECTOR}, {EMPTY_TABLE_TEXT_SELECTOR}", timeout=max_timeout):
+                logger.info(f"✅ Таблица '{sel}' полностью загружена и готова")
+            else:
+                logger.warning(f"⚠️ Таблица '{sel}' найдена и видима, но содержимое не загрузилось за {max_timeout} секунд")
+            # Возвращаем True, так как таблица есть и видима, просто может быть пустая
+            return True
                 
         except Exception as e:
             logger.warning(f"⚠️ Ошибка при ожидании таблицы '{sel}': {e}")
@@ -543,13 +498,9 @@ def switch_to_frame_and_confirm(driver: WebDriver) -> bool:
         )
         logger.info("✅ Страница полностью загружена")
         
-        # Дополнительная пауза для загрузки динамического контента
-        time.sleep(3)
-        
-        # Проверяем наличие iframe в DOM
-        iframe_exists = driver.execute_script(f"""
-            return document.getElementById('{IFRAME_ID}') !== null;
-        """)
+        # Ждём появления iframe и успокоения динамического контента вместо фиксированной паузы
+        iframe_exists = wait_for_selector(driver, f"[id='{IFRAME_ID}']", timeout=10)
+        wait_for_dom_quiet(driver, timeout=5, network_timeout=10, label="страница задачи")
         
         if not iframe_exists:
             logger.error(f"Iframe {IFRAME_ID} не найден в DOM")
@@ -579,7 +530,7 @@ def switch_to_frame_and_confirm(driver: WebDriver) -> bool:
         logger.info(f"✅ Успешно переключились на фрейм: {IFRAME_ID}")
         
         # Ждём загрузки содержимого iframe
-        time.sleep(2)
+        wait_for_dom_quiet(driver, timeout=5, network_timeout=10, label=f"фрейм {IFRAME_ID}")
         
         try:
             logger.info("Ожидание кнопки подтверждения в iframe")
@@ -592,7 +543,7 @@ def switch_to_frame_and_confirm(driver: WebDriver) -> bool:
             
             if success:
                 logger.info("✅ Кнопка подтверждения в фрейме нажата")
-                time.sleep(0.5)
+                wait_for_dom_quiet(driver, timeout=2, label="подтверждение в фрейме")
             else:
                 logger.warning("⚠️ Не удалось нажать кнопку подтверждения в фрейме")
         except TimeoutException:
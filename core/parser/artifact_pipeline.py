@@ -0,0 +1,274 @@
+"""
+Фоновая обработка артефактов заявки в пуле процессов
+
+Драйвер передаёт сырые PNG (кадр сетки или скриншоты секций) и разметку SVG
+зон и сразу переходит к следующей зоне, а склейка и оптимизация PNG, разбор
+SVG и разбиение зон на детали выполняются параллельно в отдельных процессах.
+Перед финальным сохранением JSON заявка дожидается только тех изображений, на
+которые ссылаются её данные; путь к изображению, которое не удалось сохранить,
+очищается. Детали зон собираются из результатов разбиения.
+
+Основные функции:
+    * encode_png_artifact: Склеивает PNG по вертикали и сохраняет результат
+    * submit_artifact_job: Передаёт задачу в общий пул процессов
+    * submit_png_encoding: Передаёт кодирование PNG в общий пул процессов
+    * ArtifactPipeline: Фоновые артефакты одной заявки
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PIL import Image
+
+from .constants import IMAGE_ENCODER_WORKERS
+from .svg_processing import process_zone_svg
+
+logger = logging.getLogger(__name__)
+
+# Сколько ждать фоновых артефактов перед финальным сохранением JSON (секунды)
+ARTIFACT_WAIT_TIMEOUT = 120
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def encode_png_artifact(png_parts, path):
+    """
+    Склеивает PNG по вертикали и сохраняет итоговое изображение.
+    Выполняется в процессе пула, поэтому зависит только от PIL.
+
+    Returns:
+        str - путь сохранённого файла
+    """
+    images = [Image.open(BytesIO(png)) for png in png_parts]
+    try:
+        max_width = max(img.width for img in images)
+        total_height = sum(img.height for img in images)
+
+        final_image = Image.new('RGB', (max_width, total_height))
+        y_offset = 0
+        for img in images:
+            final_image.paste(img, (0, y_offset))
+            y_offset += img.height
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        final_image.save(path, quality=85, optimize=True)
+        return path
+    finally:
+        for img in images:
+            img.close()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                # spawn: дочерние процессы не наследуют потоки драйверов и event loop.
+                # Они выполняют __main__ родителя, поэтому точка входа (main.py)
+                # целиком находится под if __name__ == "__main__"
+                _pool = ProcessPoolExecutor(
+                    max_workers=IMAGE_ENCODER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"🖼️ Пул кодирования изображений запущен: {IMAGE_ENCODER_WORKERS} процессов")
+            except Exception as e:
+                logger.warning(f"⚠️ Пул процессов недоступен ({e}), изображения кодируются в потоках")
+                _pool = ThreadPoolExecutor(max_workers=IMAGE_ENCODER_WORKERS, thread_name_prefix="image-encoder")
+        return _pool
+
+
+def _reset_pool(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False)
+
+
+def submit_artifact_job(fn, *args, **kwargs):
+    """
+    Передаёт задачу в общий пул. fn должна быть функцией уровня модуля без
+    зависимости от WebDriver (аргументы передаются в другой процесс).
+
+    Returns:
+        Future - результат fn
+    """
+    pool = _get_pool()
+    try:
+        return pool.submit(fn, *args, **kwargs)
+    except BrokenProcessPool:
+        logger.warning("⚠️ Пул фоновой обработки упал, пересоздаём")
+        _reset_pool(pool)
+        return _get_pool().submit(fn, *args, **kwargs)
+
+
+def submit_png_encoding(png_parts, path):
+    """
+    Передаёт склейку и сохранение PNG в общий пул.
+
+    Returns:
+        Future - результат encode_png_artifact
+    """
+    return submit_artifact_job(encode_png_artifact, png_parts, path)
+
+
+class ArtifactPipeline:
+    """
+    Фоновые артефакты одной заявки.
+
+    Изображения: относительный путь -> future. Путь в данных заявки появляется
+    сразу, а файл - после завершения future; resolve() дожидается только
+    изображений, на которые ссылаются данные.
+
+    SVG зон: запись зоны в zone_data -> future разбиения; collect_zone_details()
+    заполняет детали зон по результатам.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._zone_jobs = []
+        self._lock = threading.Lock()
+
+    def submit(self, relative_path, png_parts, path):
+        """Запускает кодирование изображения, на которое ссылается relative_path"""
+        future = submit_png_encoding(png_parts, path)
+        with self._lock:
+            self._jobs[relative_path] = future
+        return future
+
+    def resolve(self, zone_data, timeout=ARTIFACT_WAIT_TIMEOUT):
+        """
+        Дожидается изображений, на которые ссылаются зоны zone_data.
+        Пути к несохранённым изображениям в zone_data очищаются.
+
+        Returns:
+            dict - {"waited": число, "failed": число, "unreferenced": число}
+        """
+        referenced = {zone.get("screenshot_path") for zone in zone_data if zone.get("screenshot_path")}
+        with self._lock:
+            jobs = {path: future for path, future in self._jobs.items() if path in referenced}
+            unreferenced = len(self._jobs) - len(jobs)
+
+        done, not_done = wait(jobs.values(), timeout=timeout)
+        failed = set()
+        for path, future in jobs.items():
+            if future in not_done:
+                logger.error(f"❌ Изображение не сохранено за {timeout} с: {path}")
+                failed.add(path)
+                continue
+            error = future.exception()
+            if error:
+                logger.error(f"❌ Ошибка кодирования изображения {path}: {error}")
+                failed.add(path)
+
+        for zone in zone_data:
+            if zone.get("screenshot_path") in failed:
+                zone["screenshot_path"] = ""
+
+        stats = {"waited": len(jobs), "failed": len(failed), "unreferenced": unreferenced}
+        logger.info(
+            f"🖼️ Фоновые изображения: дождались {stats['waited']}, ошибок {stats['failed']}, "
+            f"без ссылок в данных {stats['unreferenced']}"
+        )
+        return stats
+
+    def submit_zone_svg(self, zone_entry, svg_bytes, path, claim_number='', vin='', svg_collection=True):
+        """
+        Запускает сохранение и разбиение SVG зоны. Детали попадут в
+        zone_entry["details"] при collect_zone_details().
+        """
+        future = submit_artifact_job(
+            process_zone_svg, svg_bytes, path,
+            claim_number=claim_number, vin=vin, svg_collection=svg_collection
+        )
+        with self._lock:
+            self._zone_jobs.append((zone_entry, future))
+        return future
+
+    def on_zone_saved(self, zone_result, callback):
+        """
+        Вызывает callback(entries), когда изображения и SVG зоны сохранены;
+        entries - копии записей зоны с деталями из разбиения SVG. Если
+        изображение или SVG зоны сохранить не удалось, callback не вызывается.
+        callback выполняется в потоке, завершившем последнюю задачу зоны.
+        """
+        with self._lock:
+            image_jobs = [
+                self._jobs[entry["screenshot_path"]] for entry in zone_result
+                if entry.get("screenshot_path") in self._jobs
+            ]
+            svg_jobs = [
+                (index, future) for zone_entry, future in self._zone_jobs
+                for index, entry in enumerate(zone_result) if entry is zone_entry
+            ]
+        futures = image_jobs + [future for _, future in svg_jobs]
+        remaining = [len(futures)]
+
+        def finish():
+            try:
+                if any(future.cancelled() or future.exception() for future in futures):
+                    return
+                entries = [dict(entry) for entry in zone_result]
+                for index, future in svg_jobs:
+                    success, detail_paths = future.result()
+                    if not success:
+                        return
+                    entries[index]["details"] = detail_paths
+                callback(entries)
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка обработки сохранённой зоны: {e}")
+
+        def done(_):
+            with self._lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                finish()
+
+        if not futures:
+            finish()
+        for future in futures:
+            future.add_done_callback(done)
+
+    def collect_zone_details(self, timeout=ARTIFACT_WAIT_TIMEOUT):
+        """
+        Дожидается разбиения SVG зон и заполняет детали. Зона, SVG которой не
+        удалось обработать, помечается graphics_not_available, как при
+        синхронной обработке.
+
+        Returns:
+            dict - {"zones": число, "failed": число}
+        """
+        with self._lock:
+            zone_jobs, self._zone_jobs = self._zone_jobs, []
+
+        wait([future for _, future in zone_jobs], timeout=timeout)
+        failed = 0
+        for zone_entry, future in zone_jobs:
+            title = zone_entry.get("title", "")
+            success, detail_paths = False, []
+            if not future.done():
+                logger.error(f"❌ SVG зоны {title} не обработан за {timeout} с")
+            elif future.exception():
+                logger.error(f"❌ Ошибка фоновой обработки SVG зоны {title}: {future.exception()}")
+            else:
+                success, detail_paths = future.result()
+
+            if success:
+                zone_entry["details"] = detail_paths
+                logger.info(f"Обработано {len(detail_paths)} деталей для зоны {title}")
+            else:
+                failed += 1
+                logger.warning(f"Не удалось обработать SVG для зоны {title}")
+                zone_entry.pop("svg_path", None)
+                zone_entry["graphics_not_available"] = True
+                zone_entry["details"] = []
+
+        stats = {"zones": len(zone_jobs), "failed": failed}
+        if zone_jobs:
+            logger.info(f"🧩 Фоновое разбиение SVG: зон {stats['zones']}, ошибок {stats['failed']}")
+        return stats
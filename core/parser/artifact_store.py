@@ -0,0 +1,204 @@
+"""
+Хранилище артефактов с адресацией по содержимому
+
+SVG зон, деталей и пиктограмм одной модели автомобиля почти не отличаются
+между заявками. Содержимое файла хранится один раз в ARTIFACT_STORE_DIR под
+именем своего хеша, а файл заявки по прежнему пути (static/svgs/<заявка>/...)
+становится жёсткой ссылкой на него. Пути svg_path в JSON и БД не меняются и
+раздаются StaticFiles как раньше; повторная запись того же содержимого
+пропускается. Если жёсткая ссылка невозможна (другая файловая система, нет
+прав), файл записывается обычной копией.
+
+Рядом с SVG сохраняются сжатые копии (.svg.gz, .svg.br при наличии brotli),
+которые статический обработчик отдаёт клиентам с поддержкой сжатия. Сжатие
+выполняется один раз для каждого уникального содержимого.
+
+Основные функции:
+    * write_artifact: Записывает файл заявки через хранилище
+    * precompress: Сжатые варианты содержимого
+    * prune_store: Удаляет содержимое, на которое не ссылается ни одна заявка
+"""
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .constants import ARTIFACT_STORE, ARTIFACT_STORE_DIR, SVG_PRECOMPRESS
+
+logger = logging.getLogger(__name__)
+
+# Минимальный возраст содержимого без ссылок перед удалением (секунды):
+# между записью в хранилище и созданием ссылки на содержимое ссылок нет
+ORPHANED_BLOB_MIN_AGE = 3600
+
+# Расширения файлов, для которых сохраняются сжатые копии
+PRECOMPRESSED_EXTENSIONS = ('.svg',)
+PRECOMPRESSED_SUFFIXES = ('.br', '.gz')
+
+
+def _blob_path(digest, ext):
+    return os.path.join(ARTIFACT_STORE_DIR, digest[:2], f"{digest}{ext}")
+
+
+def _tmp_path(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _write_plain(path, data):
+    """
+    Записывает обычную копию через временный файл. path может быть жёсткой
+    ссылкой на содержимое хранилища (хранилище отключили или файл
+    перезаписывается при обновлении заявки): запись на месте испортила бы
+    содержимое всех заявок, ссылающихся на него.
+    """
+    tmp = _tmp_path(path)
+    try:
+        _write_file(tmp, data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _ensure_blob(blob, data):
+    """Записывает содержимое в хранилище, если его там ещё нет"""
+    if os.path.exists(blob):
+        return False
+    os.makedirs(os.path.dirname(blob), exist_ok=True)
+    tmp = _tmp_path(blob)
+    try:
+        _write_file(tmp, data)
+        try:
+            # link не перезаписывает существующий файл: параллельная запись
+            # того же содержимого из другого процесса безопасна
+            os.link(tmp, blob)
+        except FileExistsError:
+            return False
+        return True
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def precompress(data):
+    """
+    Returns:
+        dict - {суффикс файла: сжатое содержимое}
+    """
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, mode=brotli.MODE_TEXT)
+    return variants
+
+
+def _link(blob, path):
+    """Делает path жёсткой ссылкой на blob; False если path уже ссылается на blob"""
+    if os.path.exists(path) and os.path.samefile(path, blob):
+        return False
+    tmp = _tmp_path(path)
+    os.link(blob, tmp)
+    os.replace(tmp, path)
+    return True
+
+
+def _write_plain_with_variants(path, data, compress):
+    _write_plain(path, data)
+    variants = precompress(data) if compress else {}
+    for suffix in PRECOMPRESSED_SUFFIXES:
+        if suffix in variants:
+            _write_plain(path + suffix, variants[suffix])
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def write_artifact(path, data):
+    """
+    Записывает data в файл заявки path через хранилище; для SVG рядом
+    сохраняются сжатые копии.
+
+    Returns:
+        str - "stored" (новое содержимое), "linked" (содержимое уже было в
+        хранилище), "unchanged" (файл уже ссылается на это содержимое) или
+        "copied" (обычная запись без хранилища)
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    ext = os.path.splitext(path)[1]
+    compress = SVG_PRECOMPRESS and ext in PRECOMPRESSED_EXTENSIONS
+    if not ARTIFACT_STORE:
+        _write_plain_with_variants(path, data, compress)
+        return "copied"
+
+    digest = hashlib.sha256(data).hexdigest()
+    blob = _blob_path(digest, ext)
+    try:
+        stored = _ensure_blob(blob, data)
+        linked = _link(blob, path)
+        if compress:
+            # Сжатые копии хранятся под хешем исходного содержимого
+            variants = None
+            for suffix in PRECOMPRESSED_SUFFIXES:
+                if not os.path.exists(blob + suffix):
+                    if variants is None:
+                        variants = precompress(data)
+                    if suffix not in variants:
+                        if os.path.exists(path + suffix):
+                            os.remove(path + suffix)
+                        continue
+                    _ensure_blob(blob + suffix, variants[suffix])
+                _link(blob + suffix, path + suffix)
+    except OSError as e:
+        logger.debug(f"Хранилище артефактов недоступно для {path} ({e}), записываем копию")
+        _write_plain_with_variants(path, data, compress)
+        return "copied"
+    if stored:
+        return "stored"
+    return "linked" if linked else "unchanged"
+
+
+def prune_store(min_age=ORPHANED_BLOB_MIN_AGE):
+    """
+    Удаляет из хранилища содержимое, на которое не ссылается ни один файл
+    заявки (папки заявок удаляются при повторной обработке).
+
+    Returns:
+        int - число удалённых файлов
+    """
+    if not os.path.isdir(ARTIFACT_STORE_DIR):
+        return 0
+
+    removed = 0
+    now = time.time()
+    for prefix in os.listdir(ARTIFACT_STORE_DIR):
+        prefix_dir = os.path.join(ARTIFACT_STORE_DIR, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for name in os.listdir(prefix_dir):
+            blob = os.path.join(prefix_dir, name)
+            try:
+                st = os.stat(blob)
+                if st.st_nlink <= 1 and now - st.st_mtime >= min_age:
+                    os.remove(blob)
+                    removed += 1
+            except OSError as e:
+                logger.debug(f"Не удалось проверить {blob}: {e}")
+        try:
+            if not os.listdir(prefix_dir):
+                os.rmdir(prefix_dir)
+        except OSError:
+            pass
+
+    if removed:
+        logger.info(f"🗑️ Из хранилища артефактов удалено файлов без ссылок: {removed}")
+    return removed
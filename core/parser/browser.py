@@ -2,7 +2,11 @@
 Управление браузером Chrome и WebDriver
 
 Основные функции:
-    * kill_chrome_processes: Завершает все процессы Chrome и ChromeDriver
+    * kill_chrome_processes: Завершает процессы Chrome и ChromeDriver драйверов этого процесса
+    * track_driver_processes: Запоминает дерево процессов драйвера
+    * kill_driver_process_tree: Завершает процессы только одного драйвера
+    * quit_driver: Закрывает драйвер и добивает оставшиеся процессы его дерева
+    * cleanup_orphaned_profiles: Удаляет осиротевшие временные профили Chrome
     * get_chromedriver_version: Получает версию установленного ChromeDriver
     * init_browser: Инициализирует браузер Chrome с настройками для обхода бот-детекта
 """
@@ -13,6 +17,10 @@ import subprocess
 import re
 import platform
 import os
+import shutil
+import tempfile
+import threading
+import time
 import requests
 import zipfile
 import undetected_chromedriver as uc
@@ -21,20 +29,261 @@ from webdriver_manager.chrome import ChromeDriverManager
 logger = logging.getLogger(__name__)
 
 
+# Драйверы, созданные этим процессом: id(driver) -> дерево процессов драйвера
+_tracked_drivers = {}
+_tracked_lock = threading.Lock()
+
+# Сколько ждать мягкого завершения процессов перед kill (секунды)
+PROCESS_TERMINATE_TIMEOUT = 3
+# Профили старше этого возраста без живого Chrome считаются осиротевшими (секунды)
+ORPHANED_PROFILE_MIN_AGE = 300
+
+
+class DriverProcessTree:
+    """
+    Процессы одного драйвера: корневые PID (chromedriver и браузер) и
+    запомненные потомки. PID хранятся вместе со временем создания процесса,
+    чтобы не завершить чужой процесс, получивший переиспользованный PID.
+    """
+
+    def __init__(self, driver):
+        self.root_pids = get_driver_pids(driver)
+        self.profile_dir = getattr(driver, "user_data_dir", None)
+        self.keep_profile = bool(getattr(driver, "keep_user_data_dir", True))
+        self.known = {}
+        self.refresh()
+
+    def _remember(self, proc):
+        try:
+            self.known[proc.pid] = proc.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+
+    def refresh(self):
+        """Дополняет дерево текущими потомками корневых процессов"""
+        for pid in self.root_pids:
+            try:
+                root = psutil.Process(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            self._remember(root)
+            try:
+                children = root.children(recursive=True)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            for child in children:
+                self._remember(child)
+        return self
+
+    def processes(self):
+        """Живые процессы дерева (с проверкой времени создания)"""
+        alive = []
+        for pid, created in list(self.known.items()):
+            try:
+                proc = psutil.Process(pid)
+                if proc.create_time() == created:
+                    alive.append(proc)
+                    continue
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            self.known.pop(pid, None)
+        return alive
+
+    def terminate(self, timeout=PROCESS_TERMINATE_TIMEOUT):
+        """
+        Завершает процессы дерева: сначала terminate, затем kill оставшихся.
+        
+        Returns:
+            int - количество завершенных процессов
+        """
+        self.refresh()
+        processes = self.processes()
+        for proc in processes:
+            try:
+                proc.terminate()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        gone, alive = psutil.wait_procs(processes, timeout=timeout)
+        for proc in alive:
+            try:
+                proc.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        if alive:
+            psutil.wait_procs(alive, timeout=timeout)
+        self.known.clear()
+        return len(processes)
+
+    def remove_profile(self):
+        """Удаляет временный профиль Chrome драйвера"""
+        if self.keep_profile or not self.profile_dir:
+            return False
+        if not os.path.isdir(self.profile_dir):
+            return False
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+        return not os.path.exists(self.profile_dir)
+
+
+def get_driver_pids(driver):
+    """
+    Возвращает PID процессов ChromeDriver и браузера конкретного драйвера.
+    
+    Returns:
+        set - корневые PID драйвера
+    """
+    pids = set()
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    if process is not None and getattr(process, "pid", None):
+        pids.add(process.pid)
+    browser_pid = getattr(driver, "browser_pid", None)
+    if browser_pid:
+        pids.add(browser_pid)
+    return pids
+
+
+def track_driver_processes(driver):
+    """
+    Запоминает дерево процессов драйвера.
+    Вызывается сразу после создания драйвера в init_browser.
+    
+    Returns:
+        DriverProcessTree - дерево процессов драйвера
+    """
+    tree = DriverProcessTree(driver)
+    with _tracked_lock:
+        _tracked_drivers[id(driver)] = (driver, tree)
+    logger.info(f"Отслеживается дерево процессов драйвера: {sorted(tree.known)}")
+    return tree
+
+
+def get_driver_process_tree(driver):
+    """Дерево процессов драйвера (создаётся, если драйвер ещё не отслеживался)"""
+    with _tracked_lock:
+        entry = _tracked_drivers.get(id(driver))
+    if entry and entry[0] is driver:
+        return entry[1].refresh()
+    return track_driver_processes(driver)
+
+
+def untrack_driver(driver):
+    with _tracked_lock:
+        entry = _tracked_drivers.get(id(driver))
+        if entry and entry[0] is driver:
+            del _tracked_drivers[id(driver)]
+
+
+def tracked_drivers():
+    """Драйверы, созданные этим процессом и ещё не закрытые"""
+    with _tracked_lock:
+        return [driver for driver, _ in _tracked_drivers.values()]
+
+
+def kill_driver_process_tree(driver):
+    """
+    Завершает ChromeDriver и браузер одного драйвера вместе с дочерними процессами,
+    не затрагивая браузеры других заявок, и удаляет его временный профиль.
+    
+    Returns:
+        int - количество завершенных процессов
+    """
+    tree = get_driver_process_tree(driver)
+    killed = tree.terminate()
+    tree.remove_profile()
+    untrack_driver(driver)
+    if killed:
+        logger.info(f"Завершено процессов драйвера: {killed}")
+    return killed
+
+
+def quit_driver(driver):
+    """
+    Закрывает драйвер через WebDriver и добивает оставшиеся процессы его дерева.
+    
+    Returns:
+        bool - True если драйвер закрылся штатно
+    """
+    tree = get_driver_process_tree(driver)
+    closed = True
+    try:
+        driver.quit()
+    except Exception as e:
+        closed = False
+        logger.warning(f"⚠️ Ошибка при закрытии драйвера: {e}")
+    leftovers = tree.terminate()
+    if leftovers:
+        logger.info(f"Добиты оставшиеся процессы драйвера: {leftovers}")
+    tree.remove_profile()
+    untrack_driver(driver)
+    return closed
+
+
 def kill_chrome_processes():
     """
-    Завершает все процессы Chrome и ChromeDriver.
+    Завершает процессы Chrome и ChromeDriver всех драйверов этого процесса.
+    Чужие браузеры на хосте не затрагиваются.
     
     Returns:
-        None
+        int - количество завершенных процессов
     """
-    for proc in psutil.process_iter(['name']):
-        if proc.info['name'] in ['chrome.exe', 'chromedriver.exe']:
-            try:
-                proc.kill()
-                logger.info(f"Завершен процесс: {proc.info['name']}")
-            except Exception as e:
-                logger.error(f"Ошибка при завершении процесса {proc.info['name']}: {e}")
+    killed = 0
+    for driver in tracked_drivers():
+        try:
+            killed += kill_driver_process_tree(driver)
+        except Exception as e:
+            logger.error(f"Ошибка при завершении процессов драйвера: {e}")
+    return killed
+
+
+def _profiles_in_use():
+    """Каталоги профилей, которые использует хотя бы один живой Chrome"""
+    in_use = set()
+    for proc in psutil.process_iter(['cmdline']):
+        try:
+            for arg in proc.info['cmdline'] or []:
+                if arg.startswith('--user-data-dir='):
+                    in_use.add(os.path.normpath(arg.split('=', 1)[1]))
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return in_use
+
+
+def cleanup_orphaned_profiles(min_age=ORPHANED_PROFILE_MIN_AGE):
+    """
+    Удаляет осиротевшие временные профили Chrome во временном каталоге:
+    каталоги с признаками профиля, которые не использует ни один живой Chrome
+    и которые старше min_age секунд.
+    
+    Returns:
+        int - количество удаленных профилей
+    """
+    temp_dir = tempfile.gettempdir()
+    in_use = _profiles_in_use()
+    now = time.time()
+    removed = 0
+    try:
+        entries = list(os.scandir(temp_dir))
+    except OSError as e:
+        logger.warning(f"Не удалось прочитать временный каталог {temp_dir}: {e}")
+        return 0
+    for entry in entries:
+        try:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            path = os.path.normpath(entry.path)
+            if path in in_use or now - entry.stat().st_mtime < min_age:
+                continue
+            if not (os.path.exists(os.path.join(path, "Local State")) or os.path.isdir(os.path.join(path, "Default"))):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            if not os.path.exists(path):
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"Удалено осиротевших профилей Chrome: {removed}")
+    return removed
+
 
 def get_chromedriver_version():
     """
@@ -185,6 +434,7 @@ def init_browser():
             logger.info(f"Используется существующий ChromeDriver: {driver_path}")
 
         driver = uc.Chrome(driver_executable_path=driver_path, options=options, use_subprocess=True)
+        track_driver_processes(driver)
         
         # Дополнительные настройки для маскировки headless режима
         try:
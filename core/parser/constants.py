@@ -7,7 +7,15 @@
     * SCREENSHOT_DIR: str - Директория для скриншотов
     * SVG_DIR: str - Директория для SVG файлов
     * DATA_DIR: str - Директория для данных
+    * ARTIFACT_STORE_DIR: str - Хранилище SVG с адресацией по содержимому
+    * THUMBNAIL_DIR: str - Директория уменьшенных копий скриншотов
     * TIMEOUT: int - Таймаут в секундах (30)
+    * ZONE_CAPTURE_WORKERS: int - Число драйверов для параллельного сбора зон
+    * OPTIONS_PIPELINE: bool - Сбор опций параллельно с обработкой зон
+    * CLAIM_DEADLINE_SECONDS: int - Бюджет времени одной заявки
+    * STAGE_DEADLINES: dict - Бюджеты времени этапов заявки
+    * DRIVER_MEMORY_LIMIT_MB: int - Порог памяти драйвера для пересоздания
+    * HOST_MIN_AVAILABLE_MB: int - Минимум свободной памяти хоста для нового драйвера
 
 CSS селекторы:
     * MODAL_BUTTON_SELECTOR: str - Селектор кнопки модального окна
@@ -24,6 +32,7 @@ CSS селекторы:
     * EMPTY_TABLE_TEXT: str - Текст пустой таблицы
 """
 # Константы для парсера Audatex
+import os
 import urllib3
 
 # Настройка пула соединений
@@ -38,9 +47,53 @@ SCREENSHOT_DIR = "static/screenshots"
 SVG_DIR = "static/svgs"
 DATA_DIR = "static/data"
 
+# Хранилище SVG с адресацией по содержимому (файлы заявок - жёсткие ссылки)
+ARTIFACT_STORE = os.getenv('ARTIFACT_STORE', '1').lower() in ('1', 'true', 'yes')
+ARTIFACT_STORE_DIR = os.getenv('ARTIFACT_STORE_DIR', 'artifact_store')
+
+# Минификация сохраняемых SVG и сжатые копии (.svg.gz, .svg.br) для раздачи
+SVG_MINIFY = os.getenv('SVG_MINIFY', '1').lower() in ('1', 'true', 'yes')
+SVG_PRECOMPRESS = os.getenv('SVG_PRECOMPRESS', '1').lower() in ('1', 'true', 'yes')
+
+# JSON результатов без отступов (меньше и быстрее запись, хуже читается вручную)
+RESULT_JSON_COMPACT = os.getenv('RESULT_JSON_COMPACT', '0').lower() in ('1', 'true', 'yes')
+
+# Уменьшенные копии скриншотов (WebP) для страниц истории: ширины в пикселях
+THUMBNAIL_DIR = "static/thumbnails"
+THUMBNAIL_WIDTHS = (480, 960, 1600)
+
 # Таймауты
 TIMEOUT = 30  # Увеличенный таймаут для надежной работы
 
+# Число драйверов для параллельного сбора зон одной заявки (1 - последовательно)
+ZONE_CAPTURE_WORKERS = max(1, int(os.getenv('ZONE_CAPTURE_WORKERS', '1')))
+
+# Собирать опции в отдельном драйвере параллельно с обработкой зон
+OPTIONS_PIPELINE = os.getenv('OPTIONS_PIPELINE', '0').lower() in ('1', 'true', 'yes')
+
+# Профиль только данных по умолчанию: без скриншотов, SVG и записи файлов графики
+DATA_ONLY_PROFILE = os.getenv('DATA_ONLY_PROFILE', '0').lower() in ('1', 'true', 'yes')
+
+# Число процессов фонового кодирования изображений
+IMAGE_ENCODER_WORKERS = max(1, int(os.getenv('IMAGE_ENCODER_WORKERS', '2')))
+
+# Мониторинг памяти драйверов: порог RSS дерева процессов драйвера (МБ),
+# минимум свободной памяти хоста для запуска нового драйвера (МБ),
+# интервал замеров (секунды) и длина временного ряда (точек)
+DRIVER_MEMORY_LIMIT_MB = int(os.getenv('DRIVER_MEMORY_LIMIT_MB', '2048'))
+HOST_MIN_AVAILABLE_MB = int(os.getenv('HOST_MIN_AVAILABLE_MB', '1024'))
+MEMORY_SAMPLE_INTERVAL = 5
+MEMORY_SERIES_LENGTH = 720
+
+# Бюджет времени одной заявки (секунды) и бюджеты этапов
+CLAIM_DEADLINE_SECONDS = int(os.getenv('CLAIM_DEADLINE_SECONDS', '1800'))
+STAGE_DEADLINES = {
+    "main_screenshot": 180,
+    "options": 600,
+    "zones": 1500,
+    "details": 300,
+}
+
 # CSS селекторы
 MODAL_BUTTON_SELECTOR = "#btn-confirm"
 MORE_ICON_SELECTOR = "#BREForm > div > div > div.gdc-contentBlock-body > div > div.list-grid-container.worklistgrid_custom_sent > div.worklist-grid-component > div.react-datagrid.z-cell-ellipsis.z-style-alternate.z-with-column-menu > div.z-inner > div.z-scroller > div.z-content-wrapper > div.z-content-wrapper-fix > div > div:nth-child(1) > div.z-last.z-cell > div"
@@ -0,0 +1,178 @@
+"""
+Бюджет времени заявки и сторож зависших драйверов
+
+Каждая заявка получает общий дедлайн и бюджеты этапов. Этапы парсинга
+проверяют бюджет в точках переключения (между зонами, зонами опций), а
+сторожевой поток следит за ним независимо от драйвера: если WebDriver завис
+внутри вызова, сторож завершает процессы только драйверов этой заявки, после
+чего зависший вызов падает, а заявка получает классифицированную ошибку
+таймаута для логики повторных попыток очереди. Очередь создаёт дедлайн сама и
+по страховочному таймауту останавливает заявку тем же способом, прежде чем
+повторить её.
+
+Основные функции:
+    * ClaimDeadline: Общий дедлайн и бюджеты этапов заявки
+    * ClaimTimeoutError: Ошибка превышения бюджета времени
+    * ClaimWatchdog: Сторожевой поток, завершающий драйверы заявки
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from .constants import CLAIM_DEADLINE_SECONDS, STAGE_DEADLINES
+from .browser import kill_driver_process_tree
+
+logger = logging.getLogger(__name__)
+
+# Тип ошибки для очереди
+TIMEOUT_ERROR_TYPE = "timeout"
+
+
+class ClaimTimeoutError(Exception):
+    """Превышен бюджет времени заявки или этапа"""
+
+    error_type = TIMEOUT_ERROR_TYPE
+
+    def __init__(self, reason, stage=None):
+        super().__init__(reason)
+        self.reason = reason
+        self.stage = stage
+
+
+class ClaimDeadline:
+    """
+    Общий дедлайн заявки и бюджеты этапов.
+
+    Этапы могут выполняться одновременно (например, опции параллельно с зонами),
+    поэтому отслеживается набор активных этапов.
+    """
+
+    def __init__(self, claim_key, total_seconds=CLAIM_DEADLINE_SECONDS, stage_budgets=None):
+        self.claim_key = claim_key
+        self.total_seconds = total_seconds
+        self.stage_budgets = dict(STAGE_DEADLINES if stage_budgets is None else stage_budgets)
+        self.started = time.monotonic()
+        self._active_stages = {}
+        self._drivers = []
+        self._lock = threading.Lock()
+        self.timed_out = False
+        self.reason = None
+        self.stage = None
+
+    def register_driver(self, driver):
+        """Добавляет драйвер заявки под наблюдение сторожа"""
+        with self._lock:
+            if driver is not None and driver not in self._drivers:
+                self._drivers.append(driver)
+
+    def unregister_driver(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+
+    def drivers(self):
+        with self._lock:
+            return list(self._drivers)
+
+    def enter_stage(self, name):
+        with self._lock:
+            self._active_stages[name] = time.monotonic()
+
+    def leave_stage(self, name):
+        with self._lock:
+            self._active_stages.pop(name, None)
+
+    @contextmanager
+    def stage(self, name):
+        self.enter_stage(name)
+        try:
+            yield
+        finally:
+            self.leave_stage(name)
+
+    def remaining(self):
+        """Секунды до общего дедлайна"""
+        return self.total_seconds - (time.monotonic() - self.started)
+
+    def exceeded(self):
+        """
+        Проверяет бюджеты.
+
+        Returns:
+            tuple|None - (причина, этап) или None если бюджет не исчерпан
+        """
+        now = time.monotonic()
+        if now - self.started > self.total_seconds:
+            return f"общий бюджет заявки {self.total_seconds} с исчерпан", None
+        with self._lock:
+            active = list(self._active_stages.items())
+        for name, stage_started in active:
+            budget = self.stage_budgets.get(name)
+            if budget and now - stage_started > budget:
+                return f"бюджет этапа '{name}' {budget} с исчерпан", name
+        return None
+
+    def mark_timed_out(self, reason, stage=None):
+        with self._lock:
+            if not self.timed_out:
+                self.timed_out = True
+                self.reason = reason
+                self.stage = stage
+
+    def check(self, stage=None):
+        """Бросает ClaimTimeoutError, если бюджет заявки исчерпан"""
+        if not self.timed_out:
+            exceeded = self.exceeded()
+            if exceeded:
+                self.mark_timed_out(*exceeded)
+        if self.timed_out:
+            raise ClaimTimeoutError(self.reason, self.stage or stage)
+
+    def abort(self, reason, stage=None):
+        """
+        Останавливает заявку: помечает бюджет исчерпанным и завершает процессы
+        её драйверов, после чего зависшие вызовы WebDriver падают.
+
+        Returns:
+            int - количество завершенных процессов
+        """
+        self.mark_timed_out(reason, stage)
+        killed = 0
+        for driver in self.drivers():
+            try:
+                killed += kill_driver_process_tree(driver)
+            except Exception as e:
+                logger.error(f"❌ Ошибка завершения драйвера заявки {self.claim_key}: {e}")
+        return killed
+
+    def as_error(self):
+        """Классифицированная ошибка для результата парсера"""
+        return {
+            "error": f"Превышен бюджет времени заявки: {self.reason}",
+            "error_type": TIMEOUT_ERROR_TYPE,
+            "timeout_stage": self.stage,
+        }
+
+
+class ClaimWatchdog(threading.Thread):
+    """Сторож: при исчерпании бюджета завершает процессы драйверов заявки"""
+
+    def __init__(self, deadline, poll_interval=1.0):
+        super().__init__(name=f"claim-watchdog-{deadline.claim_key}", daemon=True)
+        self.deadline = deadline
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            exceeded = self.deadline.exceeded()
+            if not exceeded:
+                continue
+            reason, stage = exceeded
+            logger.error(f"⏰ Заявка {self.deadline.claim_key}: {reason}, завершаем её драйверы")
+            self.deadline.abort(reason, stage)
+            return
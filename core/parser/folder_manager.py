@@ -3,14 +3,15 @@
 
 Основные функции:
     * safe_remove_directory: Безопасно удаляет директорию и все её содержимое
+    * get_claim_folders: Возвращает пути папок заявки без их создания
     * create_folders: Создаёт папки для сохранения данных с перезаписью существующих
 """
 # Модуль для управления папками
 import logging
 import os
 import shutil
-import re
 from .constants import SCREENSHOT_DIR, SVG_DIR, DATA_DIR
+from .naming import safe_claim_folder_name
 
 logger = logging.getLogger(__name__)
 
@@ -36,21 +37,14 @@ def safe_remove_directory(path):
         return False
 
 
-# Создаёт папки для сохранения данных с перезаписью существующих
-def create_folders(claim_number, vin):
+# Возвращает пути папок заявки (скриншоты, SVG, данные) без их создания
+def get_claim_folders(claim_number, vin):
     # Очищаем строки от лишних пробелов и символов табуляции
     clean_claim_number = claim_number.strip() if claim_number else ""
     clean_vin = vin.strip() if vin else ""
     
     # Безопасная обработка номера дела - заменяем все проблемные символы
-    # Заменяем все символы, которые могут вызвать проблемы в именах файлов/папок
-    safe_claim_number = re.sub(r'[<>:"/\\|?*]', '_', clean_claim_number)
-    # Дополнительно заменяем дефисы и точки на подчеркивания для безопасности
-    safe_claim_number = safe_claim_number.replace('-', '_').replace('.', '_')
-    # Убираем множественные подчеркивания
-    safe_claim_number = re.sub(r'_+', '_', safe_claim_number)
-    # Убираем подчеркивания в начале и конце
-    safe_claim_number = safe_claim_number.strip('_')
+    safe_claim_number = safe_claim_folder_name(clean_claim_number)
     
     # Проверяем, что данные не пустые
     if not safe_claim_number and not clean_vin:
@@ -58,22 +52,31 @@ def create_folders(claim_number, vin):
         raise ValueError("claim_number и vin не могут быть пустыми одновременно")
     
     folder_name = f"{safe_claim_number}_{clean_vin}"
-    logger.info(f"📁 Создаем папку с именем: '{folder_name}'")
     
     screenshot_dir = os.path.join(SCREENSHOT_DIR, folder_name)
     svg_dir = os.path.join(SVG_DIR, folder_name)
     data_dir = os.path.join(DATA_DIR, folder_name)
+    return screenshot_dir, svg_dir, data_dir
+
+
+# Создаёт папки для сохранения данных с перезаписью существующих.
+# При keep_existing=True (продолжение с контрольной точки) содержимое папок сохраняется.
+def create_folders(claim_number, vin, keep_existing=False):
+    screenshot_dir, svg_dir, data_dir = get_claim_folders(claim_number, vin)
+    folder_name = os.path.basename(data_dir)
+    logger.info(f"📁 Создаем папку с именем: '{folder_name}'")
     
-    # Удаляем существующие папки если они есть
-    safe_remove_directory(screenshot_dir)
-    safe_remove_directory(svg_dir)
-    safe_remove_directory(data_dir)
+    if keep_existing:
+        logger.info(f"♻️ Продолжение с контрольной точки: папки {folder_name} не очищаются")
+    else:
+        # Удаляем существующие папки если они есть
+        safe_remove_directory(screenshot_dir)
+        safe_remove_directory(svg_dir)
+        safe_remove_directory(data_dir)
     
     # Создаем новые папки
     logger.info(f"📁 Создаем папки для: {folder_name}")
     logger.info(f"🔍 Исходные данные: claim_number='{claim_number}', vin='{vin}'")
-    logger.info(f"🔍 Очищенные данные: clean_claim_number='{clean_claim_number}', clean_vin='{clean_vin}'")
-    logger.info(f"🔍 Безопасное имя папки: safe_claim_number='{safe_claim_number}'")
     
     try:
         os.makedirs(screenshot_dir, exist_ok=True)
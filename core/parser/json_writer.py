@@ -0,0 +1,100 @@
+"""
+Атомарная запись JSON результатов
+
+Результаты заявки перезаписываются целиком: при сохранении парсером и при
+восстановлении времени из БД. Документ сериализуется orjson (если установлен,
+иначе стандартным json), записывается во временный файл рядом с целевым и
+переименовывается поверх него, поэтому падение во время записи оставляет
+прежний файл целым. В компактном режиме (RESULT_JSON_COMPACT) отступы не
+пишутся.
+
+Оба сериализатора дают одинаковый документ: NaN и бесконечности пишутся как
+null (стандартный json иначе записал бы невалидный NaN), ключи не-строки
+приводятся к строкам, а datetime, dataclass и подклассы str/int/dict/list
+orjson сам не сериализует и передаёт стандартному json, который, как и
+раньше, бросает TypeError. Различается только запись экспоненты очень малых
+и больших чисел (1e-7 и 1e-07), значения при чтении совпадают.
+
+Основные функции:
+    * dump_json_bytes: Сериализует документ в UTF-8
+    * write_json_atomic: Атомарно записывает документ в файл
+"""
+import json
+import math
+import os
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .constants import RESULT_JSON_COMPACT
+
+if orjson is not None:
+    # Ключи не-строки приводятся к строкам, как в стандартном json; типы, которые
+    # стандартный json не сериализует, orjson тоже не сериализует
+    _ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                       | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS)
+
+
+def _finite(value):
+    """Копия документа, в которой NaN и бесконечности заменены на None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _dump_stdlib(data, compact):
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+    return json.dumps(data, ensure_ascii=False, indent=2, allow_nan=False)
+
+
+def dump_json_bytes(data, compact=None):
+    """
+    Сериализует документ: с отступом 2 или компактно, без экранирования
+    кириллицы.
+
+    Returns:
+        bytes - документ в UTF-8
+    """
+    if compact is None:
+        compact = RESULT_JSON_COMPACT
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=_ORJSON_OPTIONS | (0 if compact else orjson.OPT_INDENT_2))
+        except TypeError:
+            # Типы, которые orjson не сериализует - стандартный json
+            pass
+    try:
+        return _dump_stdlib(data, compact).encode("utf-8")
+    except ValueError:
+        # NaN и бесконечности записываются как null, как в orjson
+        return _dump_stdlib(_finite(data), compact).encode("utf-8")
+
+
+def write_json_atomic(path, data, compact=None):
+    """
+    Записывает документ во временный файл в той же папке и переименовывает
+    его в path. Ошибка сериализации не затрагивает существующий файл.
+
+    Returns:
+        str - путь записанного файла
+    """
+    payload = dump_json_bytes(data, compact)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
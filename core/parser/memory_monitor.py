@@ -0,0 +1,188 @@
+"""
+Мониторинг памяти драйверов Chrome
+
+Фоновый поток периодически измеряет RSS дерева процессов каждого драйвера,
+созданного парсером. Драйвер, превысивший порог, помечается на пересоздание:
+дополнительные драйверы зон пересоздаются между зонами, основной драйвер -
+после текущей заявки. При нехватке памяти хоста новые драйверы (заявки,
+дополнительные драйверы зон, фоновый сбор опций) не запускаются. Временные
+ряды памяти по драйверам хранятся для планирования мощностей.
+
+Основные функции:
+    * DriverMemoryMonitor: Фоновый замер памяти драйверов
+    * memory_monitor: Общий экземпляр монитора
+"""
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+import psutil
+
+from .constants import (
+    DRIVER_MEMORY_LIMIT_MB, HOST_MIN_AVAILABLE_MB, MEMORY_SAMPLE_INTERVAL, MEMORY_SERIES_LENGTH
+)
+from .browser import tracked_drivers, get_driver_process_tree
+
+logger = logging.getLogger(__name__)
+
+# Сколько временных рядов завершённых драйверов хранить
+MAX_STORED_SERIES = 50
+
+_MB = 1024 * 1024
+
+
+class DriverMemoryMonitor:
+    """
+    Замеряет память деревьев процессов драйверов и памяти хоста.
+
+    Временной ряд каждого драйвера - ограниченная очередь точек
+    {"at": unix-время, "rss_mb": МБ}.
+    """
+
+    def __init__(self, limit_mb=DRIVER_MEMORY_LIMIT_MB, host_min_available_mb=HOST_MIN_AVAILABLE_MB,
+                 interval=MEMORY_SAMPLE_INTERVAL, series_length=MEMORY_SERIES_LENGTH):
+        self.limit_mb = limit_mb
+        self.host_min_available_mb = host_min_available_mb
+        self.interval = interval
+        self.series_length = series_length
+        # Пометки хранятся по слабым ссылкам: закрытый драйвер не оставляет состояния
+        self._labels = weakref.WeakKeyDictionary()
+        self._recycle = weakref.WeakKeyDictionary()
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def ensure_started(self):
+        """Запускает фоновый поток замеров, если он ещё не запущен"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="driver-memory-monitor", daemon=True)
+            self._thread.start()
+        logger.info(f"🧠 Мониторинг памяти драйверов запущен (порог {self.limit_mb} МБ)")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def label_driver(self, driver, label):
+        """Задаёт имя драйвера для временного ряда (например, заявка и роль драйвера)"""
+        with self._lock:
+            self._labels[driver] = label
+
+    def _label(self, driver):
+        label = self._labels.get(driver)
+        if label:
+            return label
+        pids = get_driver_process_tree(driver).root_pids
+        return f"chrome-{min(pids)}" if pids else f"driver-{id(driver)}"
+
+    def measure_driver(self, driver):
+        """
+        RSS дерева процессов драйвера.
+
+        Returns:
+            float - МБ
+        """
+        rss = 0
+        for proc in get_driver_process_tree(driver).processes():
+            try:
+                rss += proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return rss / _MB
+
+    def sample(self):
+        """Один замер всех отслеживаемых драйверов"""
+        now = round(time.time(), 3)
+        for driver in tracked_drivers():
+            try:
+                rss_mb = self.measure_driver(driver)
+            except Exception as e:
+                logger.debug(f"Не удалось измерить память драйвера: {e}")
+                continue
+            with self._lock:
+                label = self._label(driver)
+                series = self._series.get(label)
+                if series is None:
+                    series = self._series[label] = deque(maxlen=self.series_length)
+                    while len(self._series) > MAX_STORED_SERIES:
+                        self._series.popitem(last=False)
+                series.append({"at": now, "rss_mb": round(rss_mb, 1)})
+                over_limit = rss_mb > self.limit_mb and driver not in self._recycle
+                if over_limit:
+                    self._recycle[driver] = rss_mb
+            if over_limit:
+                logger.warning(f"🧠 Драйвер {label}: {rss_mb:.0f} МБ > {self.limit_mb} МБ, помечен на пересоздание")
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"❌ Ошибка мониторинга памяти драйверов: {e}")
+
+    def needs_recycle(self, driver):
+        """True если драйвер превысил порог памяти и его нужно пересоздать"""
+        with self._lock:
+            return driver in self._recycle
+
+    def forget_driver(self, driver):
+        """Снимает пометки драйвера после его закрытия (временной ряд сохраняется)"""
+        with self._lock:
+            self._recycle.pop(driver, None)
+            self._labels.pop(driver, None)
+
+    def host_available_mb(self):
+        return psutil.virtual_memory().available / _MB
+
+    def host_has_capacity(self, slot="новый драйвер"):
+        """
+        Проверяет, достаточно ли памяти хоста для запуска нового драйвера.
+
+        Returns:
+            bool - False если свободной памяти меньше HOST_MIN_AVAILABLE_MB
+        """
+        try:
+            available = self.host_available_mb()
+        except Exception as e:
+            logger.debug(f"Не удалось получить память хоста: {e}")
+            return True
+        if available < self.host_min_available_mb:
+            logger.warning(
+                f"🧠 Мало памяти хоста ({available:.0f} МБ < {self.host_min_available_mb} МБ), "
+                f"{slot} не запускается"
+            )
+            return False
+        return True
+
+    def series(self):
+        """Временные ряды памяти по драйверам"""
+        with self._lock:
+            return {label: list(points) for label, points in self._series.items()}
+
+    def stats(self):
+        """Текущее состояние: последние замеры, пометки и память хоста"""
+        with self._lock:
+            latest = {label: points[-1] for label, points in self._series.items() if points}
+            recycle = len(self._recycle)
+        try:
+            host = {
+                "available_mb": round(self.host_available_mb(), 1),
+                "min_available_mb": self.host_min_available_mb,
+            }
+        except Exception:
+            host = {}
+        return {
+            "limit_mb": self.limit_mb,
+            "latest": latest,
+            "marked_for_recycle": recycle,
+            "host": host,
+        }
+
+
+# Общий монитор для всех драйверов процесса
+memory_monitor = DriverMemoryMonitor()
@@ -0,0 +1,263 @@
+"""
+Сверка времени заявок в JSON с базой данных
+
+Страницы истории и статистики раньше для каждой папки вызывали
+restore_*_from_db: каждая функция открывала свою сессию БД, читала JSON,
+исправляла одно поле и перезаписывала файл, после чего обработчик читал JSON
+ещё раз. Сверка выполняется одним фоновым проходом: собираются заявки, у
+которых не хватает времени начала, завершения или последнего обновления,
+время всех заявок читается из БД одним запросом, и каждый JSON
+перезаписывается не больше одного раза. Заявки в работе (последний JSON
+промежуточный или есть журнал прогресса) пропускаются: их JSON дополнит сам
+парсер. Время завершения старше суток сверяется один раз: после сверки в
+metadata пишется reconciled_at, и заявка больше не попадает в проход, пока
+парсер не перезапишет её JSON. Обработчики запросов только запускают проход и
+не ждут его.
+
+Основные функции:
+    * format_db_time: Время из БД в формате JSON (московское время)
+    * reconcile_metadata: Один проход сверки по всем заявкам
+    * schedule_metadata_reconciliation: Запускает проход в фоне
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import pytz
+from sqlalchemy import select, tuple_
+
+from core.database.models import ParserCarRequestStatus, DatabaseSession
+from .constants import DATA_DIR
+from .json_writer import write_json_atomic
+from .progress_journal import journal_path
+
+logger = logging.getLogger(__name__)
+
+# Минимальный интервал между проходами, запущенными со страниц (секунды)
+RECONCILE_MIN_INTERVAL = 60
+# Время завершения старше этого считается подозрительным и сверяется с БД один раз
+STALE_TIME_SECONDS = 86400
+# Префикс промежуточного JSON заявки в работе
+INTERMEDIATE_JSON_PREFIX = "data_intermediate_"
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_MOSCOW_TZ = pytz.timezone('Europe/Moscow')
+
+_reconcile_task = None
+_last_scheduled = None
+
+
+def _is_empty(value):
+    return value is None or value in ("null", "None", "")
+
+
+def format_db_time(value):
+    """
+    Время из БД в формате JSON. БД хранит московское время (UTC+3): время
+    без часового пояса считается московским, время в UTC переводится в
+    московское.
+
+    Returns:
+        str|None - "YYYY-MM-DD HH:MM:SS" или None если время не распознано
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            try:
+                value = datetime.strptime(value, TIME_FORMAT)
+            except ValueError:
+                logger.error(f"❌ Не удалось распарсить время из БД: {value}")
+                return None
+    if value.tzinfo is None:
+        value = _MOSCOW_TZ.localize(value)
+    elif value.tzinfo.utcoffset(value).total_seconds() == 0:
+        value = value.astimezone(_MOSCOW_TZ)
+    return value.strftime(TIME_FORMAT)
+
+
+def _completed_needs_check(metadata, now):
+    """Время завершения отсутствует, устарело или не позже времени начала"""
+    completed_at = metadata.get("completed_at")
+    if _is_empty(completed_at):
+        return True
+    try:
+        completed_dt = datetime.strptime(completed_at, TIME_FORMAT)
+    except (TypeError, ValueError):
+        return True
+    if (now - completed_dt).total_seconds() > STALE_TIME_SECONDS:
+        return True
+    started_at = metadata.get("started_at")
+    if not _is_empty(started_at):
+        try:
+            return completed_dt <= datetime.strptime(started_at, TIME_FORMAT)
+        except (TypeError, ValueError):
+            pass
+    return False
+
+
+def _needs_reconciliation(metadata, now):
+    # Уже сверенная заявка не проверяется, пока парсер не перезапишет её JSON
+    if metadata.get("reconciled_at"):
+        return False
+    return (_is_empty(metadata.get("started_at")) or _is_empty(metadata.get("last_updated"))
+            or _completed_needs_check(metadata, now))
+
+
+def _latest_json(folder_path):
+    json_files = [f for f in os.listdir(folder_path) if f.endswith(".json")]
+    if not json_files:
+        return None
+    return os.path.join(folder_path, max(json_files, key=lambda f: os.path.getctime(os.path.join(folder_path, f))))
+
+
+def _collect_candidates(data_dir):
+    """
+    Последние JSON завершённых заявок, время которых нужно сверить с БД.
+
+    Returns:
+        list - [(путь JSON, номер дела, VIN)]
+    """
+    candidates = []
+    if not os.path.isdir(data_dir):
+        return candidates
+    now = datetime.now()
+    for folder_name in os.listdir(data_dir):
+        folder_path = os.path.join(data_dir, folder_name)
+        if not os.path.isdir(folder_path):
+            continue
+        json_path = _latest_json(folder_path)
+        if not json_path or os.path.basename(json_path).startswith(INTERMEDIATE_JSON_PREFIX):
+            continue
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.debug(f"JSON {json_path} не читается: {e}")
+            continue
+        metadata = data.get("metadata") or {}
+        if not _needs_reconciliation(metadata, now):
+            continue
+        claim_number = data.get("claim_number") or ""
+        vin = data.get("vin_value") or ""
+        parts = folder_name.split("_")
+        if not claim_number and len(parts) > 1:
+            claim_number = parts[0]
+        if not vin and len(parts) > 1:
+            vin = parts[1]
+        # Журнал прогресса есть только у заявки в работе: её JSON дополнит сам парсер
+        if claim_number and os.path.exists(journal_path(folder_path, claim_number)):
+            continue
+        if claim_number and vin:
+            candidates.append((json_path, claim_number, vin))
+    return candidates
+
+
+async def fetch_request_times(pairs):
+    """
+    Время начала и завершения последней записи для каждой пары одним запросом.
+
+    Returns:
+        dict - {(номер дела, VIN): (started_at, completed_at)}
+    """
+    if not pairs:
+        return {}
+    status = ParserCarRequestStatus
+    query = (
+        select(status.request_id, status.vin, status.started_at, status.completed_at)
+        .where(tuple_(status.request_id, status.vin).in_(list(pairs)))
+        .order_by(status.request_id, status.vin, status.created_date.desc(), status.id.desc())
+        .distinct(status.request_id, status.vin)
+    )
+    async with DatabaseSession() as session:
+        result = await session.execute(query)
+        return {(row.request_id, row.vin): (row.started_at, row.completed_at) for row in result}
+
+
+def _apply_times(candidates, times):
+    """
+    Дописывает время из БД в JSON и отмечает заявку сверенной (reconciled_at).
+    Файл перечитывается непосредственно перед записью, чтобы не затереть
+    изменения, сделанные после сбора заявок.
+
+    Returns:
+        int - число перезаписанных файлов
+    """
+    updated = 0
+    now = datetime.now()
+    for json_path, claim_number, vin in candidates:
+        db_started, db_completed = times.get((claim_number, vin), (None, None))
+        started_at, completed_at = format_db_time(db_started), format_db_time(db_completed)
+        if not started_at and not completed_at:
+            continue
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            metadata = data.setdefault("metadata", {})
+            patch = {}
+            if started_at and _is_empty(metadata.get("started_at")):
+                patch["started_at"] = started_at
+            if completed_at and _is_empty(metadata.get("last_updated")):
+                patch["last_updated"] = completed_at
+            if completed_at and _completed_needs_check(metadata, now) and metadata.get("completed_at") != completed_at:
+                patch["completed_at"] = completed_at
+            if metadata.get("reconciled_at"):
+                continue
+            metadata.update(patch)
+            metadata["reconciled_at"] = now.strftime(TIME_FORMAT)
+            write_json_atomic(json_path, data)
+            updated += 1
+            if patch:
+                logger.info(f"✅ Время {claim_number}_{vin} восстановлено из БД: {patch}")
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось обновить время в {json_path}: {e}")
+    return updated
+
+
+async def reconcile_metadata(data_dir=DATA_DIR):
+    """
+    Один проход сверки: сбор заявок, один запрос к БД, запись изменённых JSON.
+    Работа с файлами выполняется в пуле потоков.
+
+    Returns:
+        int - число перезаписанных файлов
+    """
+    loop = asyncio.get_running_loop()
+    candidates = await loop.run_in_executor(None, _collect_candidates, data_dir)
+    if not candidates:
+        return 0
+    times = await fetch_request_times({(claim_number, vin) for _, claim_number, vin in candidates})
+    updated = await loop.run_in_executor(None, _apply_times, candidates, times)
+    logger.info(f"🕒 Сверка времени заявок с БД: проверено {len(candidates)}, обновлено {updated}")
+    return updated
+
+
+async def _run_reconciliation(data_dir):
+    try:
+        await reconcile_metadata(data_dir)
+    except Exception as e:
+        logger.warning(f"⚠️ Ошибка сверки времени заявок с БД: {e}")
+
+
+def schedule_metadata_reconciliation(data_dir=DATA_DIR, min_interval=RECONCILE_MIN_INTERVAL):
+    """
+    Запускает проход сверки в фоне, если он не выполняется и не запускался
+    последние min_interval секунд. Не ждёт завершения прохода.
+
+    Returns:
+        bool - проход запущен
+    """
+    global _reconcile_task, _last_scheduled
+    if _reconcile_task is not None and not _reconcile_task.done():
+        return False
+    now = time.monotonic()
+    if _last_scheduled is not None and now - _last_scheduled < min_interval:
+        return False
+    _last_scheduled = now
+    _reconcile_task = asyncio.get_running_loop().create_task(_run_reconciliation(data_dir))
+    return True
@@ -0,0 +1,96 @@
+"""
+Безопасные имена файлов и папок
+
+Одни и те же названия зон, деталей и работ переводятся в имена файлов много
+раз за заявку: при обработке зон, разбиении SVG и проверке деталей. Регулярные
+выражения скомпилированы один раз, результаты кешируются в ограниченном LRU.
+
+Основные функции:
+    * safe_file_name: Имя файла по названию (транслитерация, без пунктуации)
+    * is_blank_name: Проверяет, что в названии нет букв и цифр
+    * grouped_name_length: Длина имени файла группы названий без её построения
+    * safe_claim_folder_name: Безопасный номер дела для имени папки
+"""
+import re
+from functools import lru_cache
+
+from transliterate import translit
+
+# Размер кеша имён: с запасом на названия всех зон, деталей и работ заявки
+NAME_CACHE_SIZE = 4096
+
+_PUNCTUATION_RE = re.compile(r'[^\w\s-]')
+_PUNCTUATION_KEEP_COMMAS_RE = re.compile(r'[^\w\s,-]')
+_DOTS_RE = re.compile(r'\.+')
+_FOLDER_UNSAFE_RE = re.compile(r'[<>:"/\\|?*]')
+_UNDERSCORES_RE = re.compile(r'_+')
+
+
+def _transliterate(text):
+    safe_name = translit(text, 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower()
+    return _DOTS_RE.sub('', safe_name)  # Удаляем точки
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def safe_file_name(text, keep_commas=False, drop_quotes=False):
+    """
+    Имя файла по названию: пунктуация удаляется (запятые сохраняются при
+    keep_commas), кириллица транслитерируется, пробелы заменяются на "_".
+    drop_quotes удаляет апострофы транслитерации (ь, ъ).
+
+    Returns:
+        str - имя файла без расширения
+    """
+    pattern = _PUNCTUATION_KEEP_COMMAS_RE if keep_commas else _PUNCTUATION_RE
+    safe_name = _transliterate(pattern.sub('', text).strip())
+    if drop_quotes:
+        safe_name = safe_name.replace("'", "")
+    return safe_name
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def is_blank_name(text):
+    """True если после удаления пунктуации в названии ничего не осталось"""
+    return not _PUNCTUATION_RE.sub('', text).strip()
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def _part_metrics(text):
+    """
+    Длина транслитерации части группы без обрезки пробелов и число пробельных
+    символов в её начале и конце.
+    """
+    cleaned = _PUNCTUATION_KEEP_COMMAS_RE.sub('', text)
+    leading = len(cleaned) - len(cleaned.lstrip())
+    trailing = len(cleaned) - len(cleaned.rstrip())
+    return len(_transliterate(cleaned)), leading, trailing
+
+
+def grouped_name_length(parts):
+    """
+    Длина safe_file_name(",".join(parts), keep_commas=True) без построения
+    строки. Транслитерация заменяет символы по одному, поэтому длина группы
+    складывается из длин частей; обрезаются только пробелы по краям группы.
+    Каждая часть транслитерируется один раз, сколько бы групп её ни включали.
+
+    Returns:
+        int - длина имени файла группы
+    """
+    if len(parts) == 1:
+        return len(safe_file_name(parts[0], keep_commas=True))
+    total = len(parts) - 1  # Запятые между частями
+    for part in parts:
+        total += _part_metrics(part)[0]
+    return total - _part_metrics(parts[0])[1] - _part_metrics(parts[-1])[2]
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def safe_claim_folder_name(claim_number):
+    """
+    Номер дела для имени папки: проблемные символы, дефисы и точки заменяются
+    на "_", повторы "_" схлопываются.
+    """
+    safe_claim_number = _FOLDER_UNSAFE_RE.sub('_', claim_number)
+    safe_claim_number = safe_claim_number.replace('-', '_').replace('.', '_')
+    safe_claim_number = _UNDERSCORES_RE.sub('_', safe_claim_number)
+    return safe_claim_number.strip('_')
@@ -0,0 +1,148 @@
+"""
+Планировщик навигации по странице повреждений Audatex
+
+Каждый этап парсинга объявляет, в каком состоянии должна находиться страница
+(основной документ или iframe повреждений), а планировщик выполняет только те
+переходы, которые действительно нужны. Страница повреждений загружается один
+раз за заявку; повторная загрузка выполняется только как запасной путь, если
+переход внутри уже открытого iframe не удался. Все загрузки и переключения
+фреймов подсчитываются для статистики заявки.
+
+Основные функции:
+    * NavigationPlanner: Отслеживает состояние страницы и выполняет переходы
+    * build_damage_url: Формирует URL страницы повреждений из URL задачи
+"""
+import logging
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from .constants import IFRAME_ID
+from .actions import switch_to_frame_and_confirm, click_breadcrumb
+from .visual_processor import extract_zones
+from .wait_engine import wait_for_dom_quiet
+
+logger = logging.getLogger(__name__)
+
+# Состояния страницы
+STATE_UNKNOWN = "unknown"
+STATE_DEFAULT = "default_content"
+STATE_IFRAME = "damage_iframe"
+
+
+def build_damage_url(task_url):
+    """Формирует URL страницы повреждений из URL открытой задачи"""
+    return task_url.split('step')[0][:-1] + '&step=Damage+capturing'
+
+
+class NavigationPlanner:
+    """
+    Выполняет переходы между этапами парсинга с минимальным числом загрузок.
+
+    Этапы вызывают require_* методы, планировщик сравнивает требуемое
+    состояние с текущим и выполняет только недостающие шаги.
+    """
+
+    def __init__(self, driver, damage_url):
+        self.driver = driver
+        self.damage_url = damage_url
+        self.state = STATE_UNKNOWN
+        self.page_loaded = False
+        self.navigations = 0
+        self.reloads = 0
+        self.frame_switches = 0
+        self.stages = []
+
+    def _record(self, stage, action):
+        self.stages.append({"stage": stage, "action": action, "at": round(time.time(), 3)})
+        logger.info(f"🧭 Навигация [{stage}]: {action}")
+
+    def _load_damage_page(self, stage):
+        if self.page_loaded:
+            self.reloads += 1
+            self._record(stage, "повторная загрузка страницы повреждений")
+        else:
+            self._record(stage, "загрузка страницы повреждений")
+        self.navigations += 1
+        self.driver.get(self.damage_url)
+        WebDriverWait(self.driver, 30, poll_frequency=0.5).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
+        )
+        self.page_loaded = True
+        self.state = STATE_DEFAULT
+        if not switch_to_frame_and_confirm(self.driver):
+            self.driver.switch_to.default_content()
+            return False
+        self.frame_switches += 1
+        self.state = STATE_IFRAME
+        return True
+
+    def require_damage_iframe(self, stage):
+        """
+        Гарантирует, что драйвер находится в iframe страницы повреждений.
+        Страница загружается только если ещё не была загружена.
+        """
+        if self.state == STATE_IFRAME:
+            return True
+        if not self.page_loaded:
+            return self._load_damage_page(stage)
+
+        # Страница уже загружена и подтверждена - достаточно войти в iframe
+        try:
+            self.driver.switch_to.default_content()
+            WebDriverWait(self.driver, 10, poll_frequency=0.5).until(
+                EC.frame_to_be_available_and_switch_to_it((By.ID, IFRAME_ID))
+            )
+            self.frame_switches += 1
+            self.state = STATE_IFRAME
+            self._record(stage, "вход в iframe без перезагрузки")
+            return True
+        except (TimeoutException, WebDriverException) as e:
+            logger.warning(f"⚠️ Не удалось войти в iframe без перезагрузки: {e}")
+            return self._load_damage_page(stage)
+
+    def require_default_content(self, stage):
+        """Возвращает драйвер в основной документ страницы"""
+        if self.state != STATE_DEFAULT:
+            self.driver.switch_to.default_content()
+            self.state = STATE_DEFAULT
+            self._record(stage, "выход в основной документ")
+
+    def mark_default_content(self):
+        """Отмечает, что этап сам вернул драйвер в основной документ"""
+        self.state = STATE_DEFAULT
+
+    def open_zone_navigation(self, stage="zones"):
+        """
+        Открывает дерево зон через breadcrumb в уже загруженном iframe.
+        Если дерево не открылось, страница повреждений перезагружается один раз.
+
+        Returns:
+            list - зоны (пустой список при неудаче)
+        """
+        if not self.require_damage_iframe(stage):
+            return []
+
+        if click_breadcrumb(self.driver):
+            wait_for_dom_quiet(self.driver, timeout=5, network_timeout=10, label="дерево зон")
+            zones = extract_zones(self.driver)
+            if zones:
+                return zones
+
+        logger.warning("⚠️ Дерево зон не открылось без перезагрузки, перезагружаем страницу повреждений")
+        if not self._load_damage_page(stage):
+            return []
+        if not click_breadcrumb(self.driver):
+            return []
+        return extract_zones(self.driver)
+
+    def stats(self):
+        """Статистика навигации по заявке"""
+        return {
+            "navigations": self.navigations,
+            "reloads": self.reloads,
+            "frame_switches": self.frame_switches,
+            "stages": list(self.stages),
+        }
@@ -4,12 +4,14 @@
 """
 
 import logging
-import time
 import re
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
+from selectolax.lexbor import LexborHTMLParser
+from .wait_engine import wait_for_dom_quiet
+from .deadline import ClaimTimeoutError
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,7 @@ logger = logging.getLogger(__name__)
 OPTION_TIMEOUT = 5  # Уменьшаем с 15 до 5 секунд
 FAST_POLL_INTERVAL = 0.1
 SECTION_TIMEOUT = 5  # Уменьшаем с 10 до 5 секунд
+CONTENT_QUIET_MAX_WAIT = 1  # Предел ожидания тишины DOM после загрузки контента опций
 OPTION_POLL_INTERVAL = 0.2
 
 
@@ -44,7 +47,11 @@ def wait_for_content_loaded(driver, timeout=SECTION_TIMEOUT):
         )
         
         # Дополнительная проверка, что контент действительно загружен
-        time.sleep(0.5)  # Небольшая пауза для стабилизации
+        # Не дольше CONTENT_QUIET_MAX_WAIT: на странице с непрерывными мутациями
+        # ожидание заканчивается немногим позже прежней паузы 0.5 с
+        quiet_timeout = min(timeout, CONTENT_QUIET_MAX_WAIT)
+        wait_for_dom_quiet(driver, timeout=quiet_timeout, quiet_ms=200, network_timeout=quiet_timeout,
+                           label="контент опций")
         
         return content_element
         
@@ -684,6 +691,43 @@ def find_all_option_elements_in_container(content_container):
     return option_elements, errors
 
 
+def build_option_from_text(option_text, is_selected, section_suffix=""):
+    """Формирует данные опции по её тексту с фильтрацией артефактов"""
+    errors = []
+    code, title = parse_option_code_title(option_text)
+    
+    # Логируем результат парсинга для диагностики
+    logger.debug(f"🔍 Парсинг: '{option_text}' -> код='{code}', название='{title}'")
+    
+    # Проверяем что у нас есть либо код либо осмысленное название
+    if not code and not title:
+        errors.append(f"Отфильтрован пустой результат парсинга: '{option_text}'")
+        return None, errors
+    
+    # Проверяем на подозрительные короткие названия без кода
+    if not code and title and len(title) < 5:
+        suspicious_words = ["кпп", "лкп", "бензин", "дизель", "газ", "акп", "мкп"]
+        if title.lower() in suspicious_words:
+            errors.append(f"Отфильтровано подозрительное короткое название: '{title}'")
+            return None, errors
+    
+    final_title = f"{title}_{section_suffix}" if section_suffix and title else title
+    
+    # Проверяем финальное название на осмысленность
+    if final_title and len(final_title.replace("_", " ").strip()) >= 3:
+        status_mark = "✅" if is_selected else "❌"
+        logger.debug(f"{status_mark} Опция: {code} - {final_title}")
+        return {
+            "code": code,
+            "title": final_title,
+            "selected": is_selected,
+            "source": "regular_option"
+        }, errors
+    
+    errors.append(f"Отфильтровано слишком короткое финальное название: '{final_title}'")
+    return None, errors
+
+
 def extract_option_from_element(option_element, section_suffix=""):
     """Универсально извлекает данные опции из элемента с улучшенной фильтрацией"""
     option_data = None
@@ -731,38 +775,8 @@ def extract_option_from_element(option_element, section_suffix=""):
                 pass
         
         if option_text:
-            code, title = parse_option_code_title(option_text)
-            
-            # Логируем результат парсинга для диагностики
-            logger.debug(f"🔍 Парсинг: '{option_text}' -> код='{code}', название='{title}'")
-            
-            # Проверяем что у нас есть либо код либо осмысленное название
-            if not code and not title:
-                errors.append(f"Отфильтрован пустой результат парсинга: '{option_text}'")
-                return None, errors
-            
-            # Проверяем на подозрительные короткие названия без кода
-            if not code and title and len(title) < 5:
-                suspicious_words = ["кпп", "лкп", "бензин", "дизель", "газ", "акп", "мкп"]
-                if title.lower() in suspicious_words:
-                    errors.append(f"Отфильтровано подозрительное короткое название: '{title}'")
-                    return None, errors
-            
-            final_title = f"{title}_{section_suffix}" if section_suffix and title else title
-            
-            # Проверяем финальное название на осмысленность
-            if final_title and len(final_title.replace("_", " ").strip()) >= 3:
-                option_data = {
-                    "code": code,
-                    "title": final_title,
-                    "selected": is_selected,
-                    "source": "regular_option"
-                }
-                
-                status_mark = "✅" if is_selected else "❌"
-                logger.debug(f"{status_mark} Опция: {code} - {final_title}")
-            else:
-                errors.append(f"Отфильтровано слишком короткое финальное название: '{final_title}'")
+            option_data, build_errors = build_option_from_text(option_text, is_selected, section_suffix)
+            errors.extend(build_errors)
         else:
             errors.append("Не найден текст опции")
             
@@ -877,6 +891,56 @@ def extract_options_without_sections(content_container):
     return options, errors
 
 
+def finalize_zone_options(zone, options, all_errors, processing_notes):
+    """Удаляет дубликаты опций зоны и дополняет заметки итоговой статистикой"""
+    # Удаляем дубликаты по полному совпадению title и code
+    initial_count = len(options)
+    unique_options = []
+    seen_combinations = set()
+    
+    for option in options:
+        # Создаем уникальный ключ из комбинации code и title
+        option_key = (option.get("code", ""), option.get("title", ""))
+        
+        if option_key not in seen_combinations:
+            unique_options.append(option)
+            seen_combinations.add(option_key)
+        else:
+            logger.debug(f"🔄 Удален дубликат: {option.get('code', '')} - {option.get('title', '')}")
+    
+    # Заменяем options на уникальные
+    options = unique_options
+    duplicates_removed = initial_count - len(options)
+    if duplicates_removed > 0:
+        logger.info(f"🔄 Удалено дубликатов в зоне '{zone['title']}': {duplicates_removed}")
+    
+    # Финальная статистика
+    total_found = len(options)
+    error_count = len(all_errors)
+    
+    if total_found > 0:
+        logger.info(f"✅ Зона '{zone['title']}': извлечено {total_found} уникальных опций, ошибок: {error_count}")
+        processing_notes.append(f"Успешно извлечено {total_found} уникальных опций")
+        
+        # Логируем первые несколько опций для подтверждения
+        logger.info(f"📋 Первые опции в зоне '{zone['title']}':")
+        for i, option in enumerate(options[:3]):
+            status = "✅" if option.get("selected") else "❌"
+            logger.info(f"    {i+1}. {status} {option.get('code', '')} - {option.get('title', '')}")
+        if total_found > 3:
+            logger.info(f"    ... и еще {total_found - 3} опций")
+    else:
+        warning_msg = f"Зона '{zone['title']}': опции не найдены"
+        logger.warning(f"⚠️ {warning_msg}")
+        processing_notes.append("НЕ НАЙДЕНО ОПЦИЙ - возможно новая неизвестная структура")
+    
+    if error_count > 0:
+        processing_notes.append(f"Обнаружено {error_count} ошибок при обработке")
+        logger.warning(f"⚠️ Зона '{zone['title']}': ошибок при обработке: {error_count}")
+    
+    return options
+
+
 def extract_zone_options_universal(driver, zone):
     """Универсальная функция извлечения опций из любой зоны с обобщенным алгоритмом"""
     logger.info(f"🔧 Обрабатываем зону: '{zone['title']}'")
@@ -912,18 +976,32 @@ def extract_zone_options_universal(driver, zone):
         
         logger.info(f"🔄 Ожидаем загрузку контента для зоны '{zone['title']}'...")
         
-        # Увеличенная пауза для гарантированной загрузки
-        time.sleep(1.0)
-        
         content_container = wait_for_content_loaded(driver)
         logger.info(f"✅ Контент загружен для зоны '{zone['title']}'")
         
+        # Основной путь: один снимок HTML контейнера и разбор в Python через selectolax
+        snapshot_root = take_container_snapshot_safely(driver, content_container, zone)
+        if snapshot_root is not None and not snapshot_text(snapshot_root):
+            logger.warning(f"⚠️ Зона '{zone['title']}': контейнер пустой, пробуем еще раз...")
+            wait_for_dom_quiet(driver, timeout=2.0, quiet_ms=500, network_timeout=2.0,
+                               label=f"пустая зона опций {zone['title']}")
+            content_container = wait_for_content_loaded(driver)
+            snapshot_root = take_container_snapshot_safely(driver, content_container, zone)
+            if snapshot_root is not None and not snapshot_text(snapshot_root):
+                logger.error(f"❌ Зона '{zone['title']}': контейнер остается пустым после повторной попытки")
+                return [], [f"Контейнер зоны '{zone['title']}' пустой"], ["Пустой контейнер"]
+        
+        if snapshot_root is not None:
+            return extract_zone_options_from_snapshot(snapshot_root, zone)
+        
+        # Запасной путь: поэлементный обход через WebDriver
         # Дополнительная проверка, что контент действительно содержит данные
         try:
             container_text = content_container.text.strip()
             if not container_text:
                 logger.warning(f"⚠️ Зона '{zone['title']}': контейнер пустой, пробуем еще раз...")
-                time.sleep(2.0)  # Ждем еще 2 секунды
+                wait_for_dom_quiet(driver, timeout=2.0, quiet_ms=500, network_timeout=2.0,
+                                   label=f"пустая зона опций {zone['title']}")
                 content_container = wait_for_content_loaded(driver)
                 container_text = content_container.text.strip()
                 if not container_text:
@@ -1020,47 +1098,9 @@ def extract_zone_options_universal(driver, zone):
             processing_notes.append("Обработано как зона без секций")
             logger.info(f"📋 Извлечено {len(regular_options)} опций без секций в зоне '{zone['title']}'")
         
-        # Удаляем дубликаты по полному совпадению title и code
-        initial_count = len(options)
-        unique_options = []
-        seen_combinations = set()
+        options = finalize_zone_options(zone, options, all_errors, processing_notes)
         
-        for option in options:
-            # Создаем уникальный ключ из комбинации code и title
-            option_key = (option.get("code", ""), option.get("title", ""))
-            
-            if option_key not in seen_combinations:
-                unique_options.append(option)
-                seen_combinations.add(option_key)
-            else:
-                logger.debug(f"🔄 Удален дубликат: {option.get('code', '')} - {option.get('title', '')}")
-        
-        # Заменяем options на уникальные
-        options = unique_options
-        duplicates_removed = initial_count - len(options)
-        if duplicates_removed > 0:
-            logger.info(f"🔄 Удалено дубликатов в зоне '{zone['title']}': {duplicates_removed}")
-        
-        # Финальная статистика
-        total_found = len(options)
-        error_count = len(all_errors)
-        
-        if total_found > 0:
-            logger.info(f"✅ Зона '{zone['title']}': извлечено {total_found} уникальных опций, ошибок: {error_count}")
-            processing_notes.append(f"Успешно извлечено {total_found} уникальных опций")
-            
-            # Логируем первые несколько опций для подтверждения
-            logger.info(f"📋 Первые опции в зоне '{zone['title']}':")
-            for i, option in enumerate(options[:3]):
-                status = "✅" if option.get("selected") else "❌"
-                logger.info(f"    {i+1}. {status} {option.get('code', '')} - {option.get('title', '')}")
-            if total_found > 3:
-                logger.info(f"    ... и еще {total_found - 3} опций")
-        else:
-            warning_msg = f"Зона '{zone['title']}': опции не найдены"
-            logger.warning(f"⚠️ {warning_msg}")
-            processing_notes.append("НЕ НАЙДЕНО ОПЦИЙ - возможно новая неизвестная структура")
-            
+        if not options:
             # Дополнительная диагностика для пустых зон
             try:
                 all_divs = content_container.find_elements(By.TAG_NAME, "div")
@@ -1069,10 +1109,6 @@ def extract_zone_options_universal(driver, zone):
             except:
                 pass
         
-        if error_count > 0:
-            processing_notes.append(f"Обнаружено {error_count} ошибок при обработке")
-            logger.warning(f"⚠️ Зона '{zone['title']}': ошибок при обработке: {error_count}")
-        
         return options, all_errors, processing_notes
         
     except (TimeoutException, WebDriverException) as e:
@@ -1234,7 +1270,541 @@ def extract_all_selected_options_from_container(content_container):
     return options, errors
 
 
-def collect_all_options_extended(driver):
+# ---------------------------------------------------------------------------
+# Пакетное извлечение опций: HTML контейнера зоны снимается одним вызовом
+# execute_script и разбирается в Python через selectolax теми же правилами,
+# что и поэлементный обход WebDriver выше.
+# ---------------------------------------------------------------------------
+
+# Атрибуты, которыми снимок дополняет копию контейнера
+SNAPSHOT_IDX_ATTR = "data-snapshot-idx"
+SNAPSHOT_TEXT_ATTR = "data-snapshot-text"
+SNAPSHOT_CHECKED_ATTR = "data-snapshot-checked"
+
+# Копирует контейнер и переносит в копию то, чего нет в HTML: отображаемый текст
+# (как WebElement.text - пусто для невидимых элементов) и состояние чекбоксов.
+# Живой DOM страницы не изменяется.
+CONTAINER_SNAPSHOT_JS = """
+    const root = arguments[0];
+    function isRendered(el) {
+        if (!el.getClientRects().length) {
+            return false;
+        }
+        const style = window.getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.visibility !== 'collapse';
+    }
+    const copy = root.cloneNode(true);
+    const originals = [root, ...root.querySelectorAll('*')];
+    const copies = [copy, ...copy.querySelectorAll('*')];
+    for (let i = 0; i < originals.length; i++) {
+        const el = originals[i];
+        const target = copies[i];
+        target.setAttribute('data-snapshot-idx', String(i));
+        if (el instanceof HTMLElement) {
+            target.setAttribute('data-snapshot-text', isRendered(el) ? el.innerText : '');
+        }
+        if (el.tagName === 'INPUT' && el.checked) {
+            target.setAttribute('data-snapshot-checked', '1');
+        }
+    }
+    return copy.outerHTML;
+"""
+
+
+def take_container_snapshot(driver, content_container):
+    """Снимает HTML контейнера одним запросом и возвращает корневой узел selectolax"""
+    html = driver.execute_script(CONTAINER_SNAPSHOT_JS, content_container)
+    if not html:
+        return None
+    return LexborHTMLParser(html).css_first(f"[{SNAPSHOT_IDX_ATTR}='0']")
+
+
+def take_container_snapshot_safely(driver, content_container, zone):
+    """Снимок контейнера зоны; при ошибке возвращает None для перехода на поэлементный обход"""
+    try:
+        snapshot_root = take_container_snapshot(driver, content_container)
+        if snapshot_root is None:
+            logger.warning(f"⚠️ Зона '{zone['title']}': пустой снимок контейнера, используем поэлементный обход")
+        return snapshot_root
+    except Exception as e:
+        logger.warning(f"⚠️ Зона '{zone['title']}': не удалось снять HTML контейнера ({e}), используем поэлементный обход")
+        return None
+
+
+def snapshot_text(node):
+    """Отображаемый текст узла снимка (аналог WebElement.text)"""
+    return (node.attributes.get(SNAPSHOT_TEXT_ATTR) or "").strip()
+
+
+def _snapshot_key(node):
+    return node.attributes.get(SNAPSHOT_IDX_ATTR)
+
+
+def snapshot_find_all(node, selector):
+    """Аналог find_elements: потомки узла по CSS селектору (без самого узла)"""
+    own_key = _snapshot_key(node)
+    return [found for found in node.css(selector) if _snapshot_key(found) != own_key]
+
+
+def snapshot_find_first(node, selector):
+    """Аналог find_element: первый потомок по селектору или None"""
+    found = snapshot_find_all(node, selector)
+    return found[0] if found else None
+
+
+def snapshot_following_siblings(node):
+    """Следующие за узлом элементы того же родителя (текстовые узлы пропускаются)"""
+    current = node.next
+    while current is not None:
+        if _snapshot_key(current) is not None:
+            yield current
+        current = current.next
+
+
+def extract_sections_from_snapshot(root):
+    """Извлекает секции из снимка контейнера (аналог extract_sections_from_container)"""
+    sections = []
+    errors = []
+    
+    try:
+        section_selectors = [
+            "div.model-options-sub-page-title",
+            "div[class*='sub-page-title']",
+            "div[id*='sub-page-title']"
+        ]
+        
+        seen_texts = set()
+        for selector in section_selectors:
+            try:
+                found_sections = snapshot_find_all(root, selector)
+            except Exception as e:
+                logger.debug(f"⚠️ Ошибка поиска секций через {selector}: {e}")
+                continue
+            if found_sections:
+                logger.debug(f"🔍 Найдено {len(found_sections)} секций через селектор: {selector}")
+            for section_node in found_sections:
+                section_text = snapshot_text(section_node)
+                if section_text and section_text not in seen_texts:
+                    sections.append({
+                        "element": section_node,
+                        "text": section_text
+                    })
+                    seen_texts.add(section_text)
+                    logger.debug(f"📋 Найдена секция: '{section_text}'")
+        
+    except Exception as e:
+        error_msg = f"Ошибка извлечения секций: {e}"
+        logger.warning(f"⚠️ {error_msg}")
+        errors.append(error_msg)
+    
+    logger.info(f"📋 Извлечено {len(sections)} секций, ошибок: {len(errors)}")
+    return sections, errors
+
+
+def extract_azt_options_from_snapshot(root):
+    """Извлекает опции AZT зоны из снимка контейнера"""
+    options = []
+    errors = []
+    
+    try:
+        azt_containers = []
+        for container_selector in ["#paint-system-options", "#azt-paint-system-options",
+                                   "div[id*='paint-system']", "div[id*='azt']"]:
+            try:
+                azt_containers = snapshot_find_all(root, container_selector)
+            except Exception:
+                continue
+            if azt_containers:
+                logger.info(f"🎯 Найден AZT контейнер через: {container_selector}")
+                break
+        
+        if not azt_containers:
+            logger.debug("ℹ️ AZT контейнер не найден")
+            return options, errors
+        
+        li_nodes = []
+        for container in azt_containers:
+            for ul in snapshot_find_all(container, "ul.ps-azt-list"):
+                li_nodes.extend(snapshot_find_all(ul, "li"))
+            if li_nodes:
+                logger.info(f"🎯 Найдено {len(li_nodes)} AZT опций в ul.ps-azt-list")
+                break
+            for fallback in ["ul[class*='azt-list'] li", "ul[class*='azt'] li", "li[class*='azt']"]:
+                try:
+                    li_nodes = snapshot_find_all(container, fallback)
+                except Exception:
+                    continue
+                if li_nodes:
+                    logger.info(f"🎯 Найдено {len(li_nodes)} AZT опций через fallback: {fallback}")
+                    break
+            if li_nodes:
+                break
+        
+        if not li_nodes:
+            logger.info("ℹ️ AZT опции не найдены")
+            return options, errors
+        
+        logger.info(f"🔧 Обрабатываем {len(li_nodes)} AZT элементов")
+        
+        for i, li in enumerate(li_nodes):
+            description_text = ""
+            for desc_selector in ["div.ps-azt-description-text", "div[class*='description-text']",
+                                  "div[class*='azt-description']"]:
+                desc_node = snapshot_find_first(li, desc_selector)
+                if desc_node is not None:
+                    description_text = snapshot_text(desc_node)
+                    if description_text:
+                        break
+            
+            if not description_text:
+                error_msg = f"AZT элемент {i+1}: не найдено описание"
+                logger.debug(f"⚠️ {error_msg}")
+                errors.append(error_msg)
+                continue
+            
+            checkbox = snapshot_find_first(li, "input[type='checkbox']")
+            is_selected = checkbox is not None and (
+                SNAPSHOT_CHECKED_ATTR in checkbox.attributes or "checked" in checkbox.attributes
+            )
+            
+            options.append({
+                "code": "",
+                "title": f"AZT - {description_text}",
+                "selected": is_selected,
+                "source": "azt_zone"
+            })
+            
+            status_mark = "✅" if is_selected else "❌"
+            logger.debug(f"{status_mark} AZT опция {i+1}: AZT - {description_text}")
+        
+        logger.info(f"✅ Извлечено {len(options)} AZT опций, ошибок: {len(errors)}")
+        
+    except Exception as e:
+        error_msg = f"Критическая ошибка извлечения AZT: {e}"
+        logger.error(f"❌ {error_msg}")
+        errors.append(error_msg)
+    
+    return options, errors
+
+
+def extract_option_from_snapshot_node(option_node, section_suffix=""):
+    """Извлекает данные опции из узла снимка (аналог extract_option_from_element)"""
+    errors = []
+    
+    try:
+        is_selected = "selected" in (option_node.attributes.get("class") or "")
+        
+        option_text = ""
+        text_selectors = [
+            "span.model-option-description",
+            "span[class*='option-description']", 
+            "span[class*='description']",
+            "*[class*='description']",
+            "span.mo-white-space",
+            "span[class*='white-space']",
+            "span",
+            "div",
+            "label"
+        ]
+        
+        for text_selector in text_selectors:
+            try:
+                text_nodes = snapshot_find_all(option_node, text_selector)
+            except Exception:
+                continue
+            for text_node in text_nodes:
+                candidate_text = snapshot_text(text_node)
+                if candidate_text and len(candidate_text) > 2:
+                    option_text = candidate_text
+                    break
+            if option_text:
+                break
+        
+        if not option_text:
+            option_text = snapshot_text(option_node).split('\n')[0].strip()
+        
+        if not option_text:
+            errors.append("Не найден текст опции")
+            return None, errors
+        
+        option_data, build_errors = build_option_from_text(option_text, is_selected, section_suffix)
+        errors.extend(build_errors)
+        return option_data, errors
+        
+    except Exception as e:
+        error_msg = f"Ошибка извлечения опции: {e}"
+        logger.debug(f"⚠️ {error_msg}")
+        errors.append(error_msg)
+        return None, errors
+
+
+def find_all_option_nodes_in_snapshot(node):
+    """Находит все узлы опций в снимке (аналог find_all_option_elements_in_container)"""
+    option_nodes = []
+    errors = []
+    seen_keys = set()
+    
+    option_selectors = [
+        "div.model-option",
+        "div[class*='model-option']",
+        "div[class*='option']",
+        "*[class*='model-option']",
+        "div.isolated-model-option-in-group",
+        "div[class*='isolated-model-option-in-group']",
+        "*[class*='isolated-model-option-in-group']",
+        "div[id^='s-']",
+        "div[data-value]",
+        "div[data-parent]",
+        "div:has(span.model-option-description)",
+        "div:has(span[class*='option-description'])",
+        "div.model-option-group div[class*='model-option']",
+        "div.model-option-group div[class*='option']",
+        "div.model-option-sub-group-content div[class*='model-option']",
+        "div.model-option-sub-group-content div[class*='option']"
+    ]
+    
+    for selector in option_selectors:
+        try:
+            found_nodes = snapshot_find_all(node, selector)
+        except Exception as e:
+            error_msg = f"Ошибка поиска через {selector}: {e}"
+            logger.debug(f"⚠️ {error_msg}")
+            errors.append(error_msg)
+            continue
+        for found in found_nodes:
+            key = _snapshot_key(found)
+            if key not in seen_keys:
+                seen_keys.add(key)
+                option_nodes.append(found)
+    
+    logger.debug(f"🔍 Всего найдено {len(option_nodes)} уникальных узлов опций")
+    return option_nodes, errors
+
+
+def extract_options_with_sections_from_snapshot(sections):
+    """Извлекает опции сгруппированные по секциям из снимка"""
+    options = []
+    errors = []
+    
+    logger.info(f"🔧 Извлекаем опции по секциям (найдено {len(sections)} секций)")
+    
+    for section in sections:
+        section_name = section["text"]
+        try:
+            next_nodes = []
+            for sibling in snapshot_following_siblings(section["element"]):
+                sibling_class = sibling.attributes.get("class") or ""
+                if any(sec_class in sibling_class for sec_class in ["sub-page-title", "section-title"]):
+                    break
+                next_nodes.append(sibling)
+                if len(next_nodes) > 20:
+                    break
+            
+            section_option_count = 0
+            for sibling in next_nodes:
+                inner_nodes, inner_errors = find_all_option_nodes_in_snapshot(sibling)
+                errors.extend(inner_errors)
+                for option_node in inner_nodes:
+                    option_data, option_errors = extract_option_from_snapshot_node(option_node, section_name)
+                    errors.extend(option_errors)
+                    if option_data is not None:
+                        options.append(option_data)
+                        section_option_count += 1
+            
+            logger.info(f"📋 Секция '{section_name}': найдено {section_option_count} валидных опций")
+            
+        except Exception as e:
+            error_msg = f"Ошибка обработки секции '{section_name}': {e}"
+            logger.warning(f"⚠️ {error_msg}")
+            errors.append(error_msg)
+            continue
+    
+    return options, errors
+
+
+def extract_regular_options_from_snapshot(root):
+    """Извлекает опции regular-options секции из снимка"""
+    options = []
+    errors = []
+    
+    try:
+        regular_container = None
+        for container_selector in ["#regular-options", "div#regular-options", "div[class*='regular-options']"]:
+            regular_container = snapshot_find_first(root, container_selector)
+            if regular_container is not None:
+                logger.info(f"🎯 Найден контейнер regular-options через: {container_selector}")
+                break
+        
+        if regular_container is None:
+            logger.debug("ℹ️ Контейнер regular-options не найден")
+            return options, errors
+        
+        isolated_nodes = []
+        for selector in ["div.isolated-model-option-in-group",
+                         "[class*='isolated-model-option-in-group']",
+                         "[id^='s-']"]:
+            isolated_nodes = snapshot_find_all(regular_container, selector)
+            logger.info(f"🔍 Найдено {len(isolated_nodes)} элементов через: {selector}")
+            if isolated_nodes:
+                break
+        
+        if not isolated_nodes:
+            logger.warning("⚠️ Не найдено элементов опций в regular-options")
+            return options, errors
+        
+        for i, option_node in enumerate(isolated_nodes):
+            option_data, option_errors = extract_option_from_snapshot_node(option_node, "regular")
+            errors.extend(option_errors)
+            if option_data:
+                options.append(option_data)
+                logger.debug(f"✅ Regular опция {i+1}: {option_data.get('title', 'БЕЗ НАЗВАНИЯ')}")
+        
+        logger.info(f"✅ Извлечено {len(options)} regular опций, ошибок: {len(errors)}")
+        
+    except Exception as e:
+        error_msg = f"Критическая ошибка извлечения regular опций: {e}"
+        logger.error(f"❌ {error_msg}")
+        errors.append(error_msg)
+    
+    return options, errors
+
+
+def extract_all_selected_options_from_snapshot(root):
+    """Извлекает опции зоны 'Все выбранные опции' из снимка"""
+    options = []
+    errors = []
+    
+    try:
+        all_selected_container = None
+        for selector in ["#all-selected-options", "div.all-selected-options", "div[id*='all-selected']"]:
+            all_selected_container = snapshot_find_first(root, selector)
+            if all_selected_container is not None:
+                logger.info(f"🎯 Найден контейнер выбранных опций через: {selector}")
+                break
+        
+        if all_selected_container is None:
+            logger.warning("⚠️ Контейнер выбранных опций не найден")
+            return options, errors
+        
+        option_containers = snapshot_find_all(all_selected_container, "div.all-selected-container")
+        logger.info(f"🔍 Найдено {len(option_containers)} контейнеров выбранных опций")
+        
+        for i, option_container in enumerate(option_containers):
+            container_id = option_container.attributes.get("id") or f"без-id-{i+1}"
+            
+            category = ""
+            for cat_selector in ["span[id*='-category']", "span[class*='category']"]:
+                category_node = snapshot_find_first(option_container, cat_selector)
+                if category_node is not None:
+                    category = snapshot_text(category_node)
+                    if category:
+                        break
+            
+            description = ""
+            for desc_selector in ["span[id*='-description']", "span.model-option-description",
+                                  "span[class*='description']"]:
+                description_node = snapshot_find_first(option_container, desc_selector)
+                if description_node is not None:
+                    description = snapshot_text(description_node)
+                    if description:
+                        break
+            
+            if not description:
+                error_msg = f"Выбранная опция {i+1} (id: {container_id}): не найдено описание"
+                logger.warning(f"⚠️ {error_msg}")
+                errors.append(error_msg)
+                continue
+            
+            if not category:
+                error_msg = f"Выбранная опция {i+1} (id: {container_id}): не найдена категория"
+                logger.warning(f"⚠️ {error_msg}")
+                errors.append(error_msg)
+                category = "Неизвестная категория"
+            
+            code, title = parse_option_code_title(description)
+            options.append({
+                "code": code,
+                "title": title,
+                "category": category,
+                "selected": True,
+                "source": "all_selected_zone",
+                "original_description": description,
+                "container_id": container_id
+            })
+        
+        logger.info(f"✅ Извлечено {len(options)} выбранных опций, ошибок: {len(errors)}")
+        
+    except Exception as e:
+        error_msg = f"Критическая ошибка извлечения выбранных опций: {e}"
+        logger.error(f"❌ {error_msg}")
+        errors.append(error_msg)
+    
+    return options, errors
+
+
+def extract_zone_options_from_snapshot(root, zone):
+    """Разбирает снимок контейнера зоны и возвращает (options, errors, processing_notes)"""
+    options = []
+    all_errors = []
+    processing_notes = []
+    
+    # Проверяем на пустую зону
+    no_options_msg = snapshot_find_first(root, "#model-option-group-message")
+    if no_options_msg is not None and "Нет соответствующих модельных опций для данной зоны" in snapshot_text(no_options_msg):
+        logger.info(f"ℹ️ Зона '{zone['title']}': пустая зона")
+        return [{
+            "code": "",
+            "title": "Нет соответствующих модельных опций для данной зоны",
+            "selected": False,
+            "source": "empty_zone"
+        }], [], ["Зона пустая - содержит официальное сообщение об отсутствии опций"]
+    
+    # Проверяем на зону "Все выбранные опции"
+    if zone.get('id') == 'model-options-section-all-selected' or 'all-selected' in zone.get('id', ''):
+        all_selected_options, all_selected_errors = extract_all_selected_options_from_snapshot(root)
+        all_errors.extend(all_selected_errors)
+        if all_selected_options:
+            logger.info(f"✅ Зона '{zone['title']}': обработана как 'Все выбранные опции'")
+            processing_notes.append("Обработано как зона 'Все выбранные опции'")
+            return all_selected_options, all_errors, processing_notes
+        logger.warning(f"⚠️ Зона '{zone['title']}': не найдены выбранные опции")
+    
+    # Проверяем на AZT зону
+    azt_options, azt_errors = extract_azt_options_from_snapshot(root)
+    all_errors.extend(azt_errors)
+    if azt_options:
+        logger.info(f"✅ Зона '{zone['title']}': обработана как AZT зона")
+        processing_notes.append("Обработано как AZT зона")
+        return azt_options, all_errors, processing_notes
+    
+    sections, section_errors = extract_sections_from_snapshot(root)
+    all_errors.extend(section_errors)
+    
+    if sections:
+        section_options, section_option_errors = extract_options_with_sections_from_snapshot(sections)
+        all_errors.extend(section_option_errors)
+        options.extend(section_options)
+        processing_notes.append(f"Обработано {len(sections)} секций с опциями")
+        logger.info(f"📋 Извлечено {len(section_options)} опций из секций в зоне '{zone['title']}'")
+    else:
+        regular_options, regular_errors = extract_regular_options_from_snapshot(root)
+        all_errors.extend(regular_errors)
+        options.extend(regular_options)
+        processing_notes.append("Обработано как зона без секций")
+        logger.info(f"📋 Извлечено {len(regular_options)} опций без секций в зоне '{zone['title']}'")
+    
+    options = finalize_zone_options(zone, options, all_errors, processing_notes)
+    
+    if not options:
+        logger.warning(
+            f"    🔍 Диагностика: найдено {len(snapshot_find_all(root, 'div'))} div и "
+            f"{len(snapshot_find_all(root, 'span'))} span элементов"
+        )
+    
+    return options, all_errors, processing_notes
+
+
+def collect_all_options_extended(driver, deadline=None):
     """Расширенная функция сбора всех опций со всех зон с детальной отчетностью"""
     logger.info("🎯 НАЧИНАЕМ РАСШИРЕННЫЙ СБОР ВСЕХ ОПЦИЙ")
         
@@ -1249,10 +1819,11 @@ def collect_all_options_extended(driver):
         return []
     
     for i, zone in enumerate(zones):
-        # Пауза между переходами к разным зонам
-        if i > 0:  # Не делаем паузу перед первой зоной
-            time.sleep(1.0)
-            
+        # Бюджет времени заявки проверяется перед каждой зоной опций
+        if deadline:
+            deadline.check("options")
+        # Готовность контента зоны ожидается событийно в extract_zone_options_universal,
+        # поэтому фиксированные паузы между зонами не нужны
         zone_options, zone_errors, processing_notes = extract_zone_options_universal(driver, zone)
         
         zone_data = {
@@ -1283,9 +1854,6 @@ def collect_all_options_extended(driver):
                 logger.warning(f"        • {error}")
             if len(zone_errors) > 3:
                 logger.warning(f"        • ... и еще {len(zone_errors) - 3} ошибок")
-        
-        # Увеличенная пауза между зонами для стабильности
-        time.sleep(1.0)
     
     total_zones = len(all_zones_data)
     total_options = sum(zone["total_options"] for zone in all_zones_data)
@@ -1315,10 +1883,8 @@ def collect_all_options(driver):
     all_zones_data = []
     
     for i, zone in enumerate(zones):
-        # Пауза между переходами к разным зонам
-        if i > 0:  # Не делаем паузу перед первой зоной
-            time.sleep(1.0)
-            
+        # Готовность контента зоны ожидается событийно в extract_zone_options_universal,
+        # поэтому фиксированные паузы между зонами не нужны
         zone_options, zone_errors, processing_notes = extract_zone_options_universal(driver, zone)
         
         zone_data = {
@@ -1331,20 +1897,17 @@ def collect_all_options(driver):
         
         all_zones_data.append(zone_data)
         logger.info(f"📊 Зона '{zone['title']}': {zone_data['selected_count']}/{zone_data['total_options']} опций выбрано")
-        
-        # Увеличенная пауза между зонами для стабильности
-        time.sleep(1.0)
     
     logger.info(f"🎯 СБОР ОПЦИЙ ЗАВЕРШЕН: обработано {len(all_zones_data)} зон")
     return all_zones_data
 
 
-def process_vehicle_options(driver, claim_number="", vin=""):
+def process_vehicle_options(driver, claim_number="", vin="", deadline=None):
     """Основная функция обработки опций автомобиля"""
     logger.info(f"🚗 Начинаем обработку опций для дела {claim_number}, VIN {vin}")
     
     try:
-        options_data = collect_all_options_extended(driver)
+        options_data = collect_all_options_extended(driver, deadline=deadline)
         
         if not options_data:
             return {
@@ -1374,6 +1937,8 @@ def process_vehicle_options(driver, claim_number="", vin=""):
         logger.info(f"✅ ОБРАБОТКА ОПЦИЙ ЗАВЕРШЕНА: {total_selected}/{total_options} опций выбрано в {total_zones} зонах, ошибок: {total_errors}")
         return result
         
+    except ClaimTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА при обработке опций: {e}")
         return {
@@ -4,19 +4,16 @@
 Основные функции:
     * create_zones_table: Формирует HTML-таблицу зон
     * save_data_to_json: Сохраняет данные в JSON файл
-    * restore_started_at_from_db: Восстанавливает started_at из базы данных
-    * restore_last_updated_from_db: Восстанавливает last_updated из базы данных
-    * restore_completed_at_from_db: Восстанавливает completed_at из базы данных
+    * load_resume_checkpoint: Читает контрольную точку из журнала прогресса
 """
 # Модуль для создания выходных данных
 import logging
 import os
-import json
 from datetime import datetime
 import pytz
 from pathlib import Path
-from core.database.models import ParserCarRequestStatus, DatabaseSession, get_moscow_time
-from sqlalchemy import text
+from .progress_journal import journal_path, read_journal, zone_is_complete
+from .json_writer import write_json_atomic
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +37,7 @@ def create_zones_table(zone_data):
 
 
 # Сохраняет данные в JSON
-def save_data_to_json(vin_value, zone_data, main_screenshot_path, main_svg_path, zones_table, all_svgs_zip, data_dir, claim_number, options_data=None, vin_status="Нет", started_at=None, completed_at=None, is_intermediate=False):
+def save_data_to_json(vin_value, zone_data, main_screenshot_path, main_svg_path, zones_table, all_svgs_zip, data_dir, claim_number, options_data=None, vin_status="Нет", started_at=None, completed_at=None, is_intermediate=False, navigation_stats=None, stage_timings=None, refresh=None):
     # Проверяем, что папка существует
     if not os.path.exists(data_dir):
         logger.error(f"❌ Папка {data_dir} не существует, создаем её")
@@ -116,6 +113,16 @@ def save_data_to_json(vin_value, zone_data, main_screenshot_path, main_svg_path,
         "total_options": options_data.get("statistics", {}).get("total_options", 0) if options_data else 0,
         "options_success": options_data.get("success", False) if options_data else False
     }
+    if navigation_stats:
+        metadata["navigation"] = {
+            "navigations": navigation_stats.get("navigations", 0),
+            "reloads": navigation_stats.get("reloads", 0),
+            "frame_switches": navigation_stats.get("frame_switches", 0)
+        }
+    if stage_timings:
+        metadata["stage_timings"] = stage_timings
+    if refresh:
+        metadata["refresh"] = refresh
     
     def normalize_path(path):
         if not path:
@@ -146,8 +153,7 @@ def save_data_to_json(vin_value, zone_data, main_screenshot_path, main_svg_path,
         "metadata": metadata,
         "claim_number": claim_number
     }
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json_atomic(json_path, data)
     logger.info(f"Данные сохранены в {json_path}")
     logger.info(f"📊 VIN статус '{vin_status}' сохранен в JSON")
     logger.info(f"⏱️ Время начала: {metadata['started_at']}, завершения: {metadata['completed_at']}")
@@ -182,308 +188,53 @@ def save_data_to_json(vin_value, zone_data, main_screenshot_path, main_svg_path,
     return json_path
 
 
-async def restore_started_at_from_db(json_path: str, claim_number: str, vin_number: str) -> bool:
+def load_resume_checkpoint(data_dir, claim_number, run_generation):
     """
-    Восстанавливает started_at из БД если в JSON он null
-    Учитывает часовой пояс: БД хранит в UTC+3, JSON должен показывать московское время
-    """
-    try:
-        # Читаем JSON файл
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Проверяем, есть ли started_at и равен ли он null
-        metadata = data.get('metadata', {})
-        started_at = metadata.get('started_at')
-        
-        # Проверяем, нужно ли восстановление
-        should_restore = (started_at is None or started_at == "null" or started_at == "None" or started_at == "")
-        
-        # Восстанавливаем только если started_at null или пустой
-        # Если started_at есть, но неправильный - не трогаем его
-        
-        if should_restore:
-            logger.info(f"🔍 Восстанавливаем started_at из БД для {claim_number}_{vin_number}")
-            
-            # Ищем в БД
-            async with DatabaseSession() as session:
-                result = await session.execute(
-                    text(f"""
-                    SELECT started_at 
-                    FROM parser_car_request_status 
-                    WHERE request_id = '{claim_number}' AND vin = '{vin_number}'
-                    ORDER BY created_date DESC, id DESC 
-                    LIMIT 1
-                    """)
-                )
-                db_started_at = result.scalar()
-                
-                logger.info(f"🔍 Получено из БД для {claim_number}_{vin_number}: {db_started_at} (тип: {type(db_started_at)})")
-                
-                if db_started_at:
-                    # Обрабатываем разные типы данных из БД
-                    if isinstance(db_started_at, str):
-                        # Если это строка, парсим её
-                        try:
-                            # Пробуем парсить как ISO формат с часовым поясом
-                            db_started_at = datetime.fromisoformat(db_started_at)
-                        except ValueError:
-                            # Пробуем другие форматы
-                            try:
-                                db_started_at = datetime.strptime(db_started_at, "%Y-%m-%d %H:%M:%S")
-                            except ValueError:
-                                logger.error(f"❌ Не удалось распарсить время из БД: {db_started_at}")
-                                return False
-                    
-                    # В БД время хранится в UTC+3 (московское время)
-                    # Конвертируем в московское время для JSON
-                    if db_started_at.tzinfo is None:
-                        # Если время без часового пояса, считаем его московским
-                        moscow_tz = pytz.timezone('Europe/Moscow')
-                        db_started_at = moscow_tz.localize(db_started_at)
-                    elif db_started_at.tzinfo.utcoffset(db_started_at).total_seconds() == 0:
-                        # Если время в UTC, конвертируем в московское
-                        moscow_tz = pytz.timezone('Europe/Moscow')
-                        db_started_at = db_started_at.astimezone(moscow_tz)
-                    # Если время уже в московском часовом поясе (+03), оставляем как есть
-                    
-                    # Форматируем время в московском часовом поясе для JSON
-                    formatted_time = db_started_at.strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    logger.info(f"🔍 Обработка времени для {claim_number}_{vin_number}:")
-                    logger.info(f"  Исходное из БД: {db_started_at}")
-                    logger.info(f"  Часовой пояс: {db_started_at.tzinfo}")
-                    logger.info(f"  Итоговое для JSON: {formatted_time}")
-                    
-                    # Обновляем JSON
-                    metadata['started_at'] = formatted_time
-                    data['metadata'] = metadata
-                    
-                    # Сохраняем обновленный JSON
-                    with open(json_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                    
-                    logger.info(f"✅ started_at восстановлен из БД: {formatted_time} (МСК)")
-                    return True
-                else:
-                    logger.warning(f"⚠️ started_at не найден в БД для {claim_number}_{vin_number}")
-                    return False
-        else:
-            logger.info(f"✅ started_at уже есть в JSON: {started_at}")
-            return True
-            
-    except Exception as e:
-        logger.error(f"❌ Ошибка восстановления started_at: {e}")
-        return False
-
-
-async def restore_last_updated_from_db(json_path: str, claim_number: str, vin_number: str) -> bool:
-    """
-    Восстанавливает last_updated из БД если в JSON он неправильный
-    Учитывает часовой пояс: БД хранит в UTC+3, JSON должен показывать московское время
-    """
-    try:
-        # Читаем JSON файл
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Проверяем, есть ли last_updated и правильный ли он
-        metadata = data.get('metadata', {})
-        last_updated = metadata.get('last_updated')
-        
-        # Проверяем, нужно ли восстановление
-        should_restore = (last_updated is None or last_updated == "null" or last_updated == "None" or last_updated == "")
-        
-        # Восстанавливаем только если last_updated null или пустой
-        # Если last_updated есть, но неправильный - не трогаем его
-        
-        if should_restore:
-            logger.info(f"🔍 Восстанавливаем last_updated из БД для {claim_number}_{vin_number}")
-            
-            # Ищем в БД
-            async with DatabaseSession() as session:
-                result = await session.execute(
-                    text(f"""
-                    SELECT completed_at 
-                    FROM parser_car_request_status 
-                    WHERE request_id = '{claim_number}' AND vin = '{vin_number}'
-                    ORDER BY created_date DESC, id DESC 
-                    LIMIT 1
-                    """)
-                )
-                db_completed_at = result.scalar()
-                
-                logger.info(f"🔍 Получено completed_at из БД для {claim_number}_{vin_number}: {db_completed_at} (тип: {type(db_completed_at)})")
-                
-                if db_completed_at:
-                    # Обрабатываем разные типы данных из БД
-                    if isinstance(db_completed_at, str):
-                        # Если это строка, парсим её
-                        try:
-                            # Пробуем парсить как ISO формат с часовым поясом
-                            db_completed_at = datetime.fromisoformat(db_completed_at)
-                        except ValueError:
-                            # Пробуем другие форматы
-                            try:
-                                db_completed_at = datetime.strptime(db_completed_at, "%Y-%m-%d %H:%M:%S")
-                            except ValueError:
-                                logger.error(f"❌ Не удалось распарсить время из БД: {db_completed_at}")
-                                return False
-                    
-                    # В БД время хранится в UTC+3 (московское время)
-                    # Конвертируем в московское время для JSON
-                    if db_completed_at.tzinfo is None:
-                        # Если время без часового пояса, считаем его московским
-                        moscow_tz = pytz.timezone('Europe/Moscow')
-                        db_completed_at = moscow_tz.localize(db_completed_at)
-                    elif db_completed_at.tzinfo.utcoffset(db_completed_at).total_seconds() == 0:
-                        # Если время в UTC, конвертируем в московское
-                        moscow_tz = pytz.timezone('Europe/Moscow')
-                        db_completed_at = db_completed_at.astimezone(moscow_tz)
-                    # Если время уже в московском часовом поясе (+03), оставляем как есть
-                    
-                    # Форматируем время в московском часовом поясе для JSON
-                    formatted_time = db_completed_at.strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    logger.info(f"🔍 Обработка last_updated для {claim_number}_{vin_number}:")
-                    logger.info(f"  Исходное из БД: {db_completed_at}")
-                    logger.info(f"  Часовой пояс: {db_completed_at.tzinfo}")
-                    logger.info(f"  Итоговое для JSON: {formatted_time}")
-                    
-                    # Обновляем JSON
-                    metadata['last_updated'] = formatted_time
-                    data['metadata'] = metadata
-                    
-                    # Сохраняем обновленный JSON
-                    with open(json_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                    
-                    logger.info(f"✅ last_updated восстановлен из БД: {formatted_time} (МСК)")
-                    return True
-                else:
-                    logger.warning(f"⚠️ completed_at не найден в БД для {claim_number}_{vin_number}")
-                    return False
-        else:
-            logger.info(f"✅ last_updated уже правильный в JSON: {last_updated}")
-            return True
-            
-    except Exception as e:
-        logger.error(f"❌ Ошибка восстановления last_updated: {e}")
-        return False
-
-
-async def restore_completed_at_from_db(json_path: str, claim_number: str, vin_number: str, force_restore: bool = False) -> bool:
-    """
-    Восстанавливает completed_at из БД если в JSON он null или неправильный
-    Учитывает часовой пояс: БД хранит в UTC+3, JSON должен показывать московское время
+    Читает контрольную точку из журнала прогресса заявки.
     
-    Args:
-        json_path: Путь к JSON файлу
-        claim_number: Номер заявки
-        vin_number: VIN номер
-        force_restore: Принудительное восстановление из БД
+    Контрольная точка действительна только для того же поколения запуска
+    (run_generation): повторная попытка той же заявки из очереди продолжает
+    работу, а новая заявка с теми же номерами начинает заново.
+    
+    Returns:
+        dict|None - {"options_data", "main_screenshot_path", "main_svg_path",
+            "zone_entries": {название зоны: [записи zone_data]}}
+            или None если продолжать нечего
     """
-    try:
-        # Читаем JSON файл
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Проверяем, есть ли completed_at и правильный ли он
-        metadata = data.get('metadata', {})
-        completed_at = metadata.get('completed_at')
-        
-        # Проверяем, нужно ли восстановление
-        should_restore = (completed_at is None or completed_at == "null" or completed_at == "None" or completed_at == "")
-        
-        # Также проверяем корректность времени, если оно есть
-        if not should_restore and completed_at:
-            try:
-                # Парсим время из JSON
-                json_completed_dt = datetime.strptime(completed_at, "%Y-%m-%d %H:%M:%S")
-                # Проверяем, что время не слишком старое (признак неправильного времени)
-                current_time = datetime.now()
-                time_diff = (current_time - json_completed_dt).total_seconds()
-                if time_diff > 86400:  # Если разница больше 24 часов
-                    should_restore = True
-                    logger.info(f"🔍 completed_at в JSON слишком старое для {claim_number}_{vin_number}: {completed_at}")
-            except:
-                should_restore = True
-        
-        # Если принудительное восстановление, то восстанавливаем в любом случае
-        if force_restore:
-            should_restore = True
-            logger.info(f"🔍 Принудительное восстановление completed_at для {claim_number}_{vin_number}")
-        
-        if should_restore:
-            logger.info(f"🔍 Восстанавливаем completed_at из БД для {claim_number}_{vin_number}")
-            
-            # Ищем в БД
-            async with DatabaseSession() as session:
-                result = await session.execute(
-                    text(f"""
-                    SELECT completed_at 
-                    FROM parser_car_request_status 
-                    WHERE request_id = '{claim_number}' AND vin = '{vin_number}'
-                    ORDER BY created_date DESC, id DESC 
-                    LIMIT 1
-                    """)
-                )
-                db_completed_at = result.scalar()
-                
-                logger.info(f"🔍 Получено completed_at из БД для {claim_number}_{vin_number}: {db_completed_at} (тип: {type(db_completed_at)})")
-                
-                if db_completed_at:
-                    # Обрабатываем разные типы данных из БД
-                    if isinstance(db_completed_at, str):
-                        # Если это строка, парсим её
-                        try:
-                            # Пробуем парсить как ISO формат с часовым поясом
-                            db_completed_at = datetime.fromisoformat(db_completed_at)
-                        except ValueError:
-                            # Пробуем другие форматы
-                            try:
-                                db_completed_at = datetime.strptime(db_completed_at, "%Y-%m-%d %H:%M:%S")
-                            except ValueError:
-                                logger.error(f"❌ Не удалось распарсить время из БД: {db_completed_at}")
-                                return False
-                    
-                    # В БД время хранится в UTC+3 (московское время)
-                    # Конвертируем в московское время для JSON
-                    if db_completed_at.tzinfo is None:
-                        # Если время без часового пояса, считаем его московским
-                        moscow_tz = pytz.timezone('Europe/Moscow')
-                        db_completed_at = moscow_tz.localize(db_completed_at)
-                    elif db_completed_at.tzinfo.utcoffset(db_completed_at).total_seconds() == 0:
-                        # Если время в UTC, конвертируем в московское
-                        moscow_tz = pytz.timezone('Europe/Moscow')
-                        db_completed_at = db_completed_at.astimezone(moscow_tz)
-                    # Если время уже в московском часовом поясе (+03), оставляем как есть
-                    
-                    # Форматируем время в московском часовом поясе для JSON
-                    formatted_time = db_completed_at.strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    logger.info(f"🔍 Обработка completed_at для {claim_number}_{vin_number}:")
-                    logger.info(f"  Исходное из БД: {db_completed_at}")
-                    logger.info(f"  Часовой пояс: {db_completed_at.tzinfo}")
-                    logger.info(f"  Итоговое для JSON: {formatted_time}")
-                    
-                    # Обновляем JSON
-                    metadata['completed_at'] = formatted_time
-                    data['metadata'] = metadata
-                    
-                    # Сохраняем обновленный JSON
-                    with open(json_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, ensure_ascii=False, indent=2)
-                    
-                    logger.info(f"✅ completed_at восстановлен из БД: {formatted_time} (МСК)")
-                    return True
-                else:
-                    logger.warning(f"⚠️ completed_at не найден в БД для {claim_number}_{vin_number}")
-                    return False
-        else:
-            logger.info(f"✅ completed_at уже правильный в JSON: {completed_at}")
-            return True
-            
-    except Exception as e:
-        logger.error(f"❌ Ошибка восстановления completed_at: {e}")
-        return False 
\ No newline at end of file
+    if not run_generation:
+        return None
+    path = journal_path(data_dir, claim_number)
+    records = read_journal(path)
+    starts = [record for record in records if record.get("type") == "start"]
+    if not starts:
+        return None
+    if starts[0].get("run_generation") != run_generation:
+        logger.info(f"🔍 Журнал {path} от другого запуска, начинаем заново")
+        return None
+    
+    zone_entries = {}
+    options_data = None
+    for record in records:
+        kind = record.get("type")
+        if kind == "zone":
+            entries = record.get("entries") or []
+            title = record.get("title", "")
+            # Пустой результат, заглушки ошибок и SVG зоны без деталей собираются заново
+            if not zone_is_complete(entries):
+                zone_entries.pop(title, None)
+                continue
+            zone_entries[title] = entries
+        elif kind in ("start", "options"):
+            if (record.get("options_data") or {}).get("success"):
+                options_data = record["options_data"]
+    
+    logger.info(
+        f"♻️ Найдена контрольная точка: зон завершено {len(zone_entries)}, "
+        f"опции {'собраны' if options_data else 'не собраны'}"
+    )
+    return {
+        "options_data": options_data,
+        "main_screenshot_path": starts[-1].get("main_screenshot_path", ""),
+        "main_svg_path": starts[-1].get("main_svg_path", ""),
+        "zone_entries": zone_entries,
+    }
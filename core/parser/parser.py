@@ -4,7 +4,7 @@
 Основные функции:
     * search_and_extract: Поиск и извлечение данных по номеру заявки и VIN
     * login_audatex: Асинхронный вход в Audatex и запуск парсинга  
-    * terminate_all_processes_and_restart: Завершение всех процессов Chrome и перезапуск парсера
+    * terminate_all_processes_and_restart: Завершение процессов Chrome парсера и очистка профилей
 """
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
@@ -16,9 +16,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException
 import logging
-import time
 import pickle
-import psutil
 import os
 import json
 from datetime import datetime
@@ -33,31 +31,42 @@ from PIL import Image
 from io import BytesIO
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
-import subprocess
 from webdriver_manager.core.os_manager import ChromeType
 import shutil
 import requests
 import zipfile
-import platform
 import sys
 
 # Импорт констант и функций
 from .constants import *
-from .browser import kill_chrome_processes, get_chromedriver_version, init_browser
+from .browser import (
+    kill_chrome_processes, get_chromedriver_version, init_browser, quit_driver,
+    tracked_drivers, kill_driver_process_tree, cleanup_orphaned_profiles
+)
 from .auth import load_cookies, perform_login, check_if_authorized
-from .folder_manager import create_folders
-from .output_manager import create_zones_table, save_data_to_json
+from .folder_manager import create_folders, get_claim_folders
+from .output_manager import create_zones_table, save_data_to_json, load_resume_checkpoint
 from core.database.models import get_moscow_time
 from .visual_processor import (
-    is_zone_file, split_svg_by_details, save_svg_sync, 
-    save_main_screenshot_and_svg, extract_zones, 
+    save_svg_sync, save_main_screenshot_and_svg,
     process_zone, process_pictograms, ensure_zone_details_extracted
 )
+from .thumbnails import submit_thumbnails
 from .option_processor import process_vehicle_options
+from .navigation import NavigationPlanner, build_damage_url
+from .zone_capture import capture_zones, BrowserClosedError
+from .pipeline import StageTimer, start_options_collection, join_options_collection
+from .deadline import ClaimDeadline, ClaimWatchdog, ClaimTimeoutError
+from .memory_monitor import memory_monitor
+from .artifact_pipeline import ArtifactPipeline
+from .progress_journal import ProgressJournal, journal_path, zone_is_complete
+from .refresh import (
+    RefreshPlan, merge_with_previous_result, STAGE_MAIN_SCREENSHOT, STAGE_OPTIONS, STAGE_ZONES
+)
+from .wait_engine import wait_for_dom_quiet
 from .actions import (
     wait_for_table, click_cansel_button, click_request_type_button,
-    search_in_table, click_more_icon, open_task, 
-    switch_to_frame_and_confirm, click_breadcrumb, is_table_empty,
+    search_in_table, click_more_icon, open_task, is_table_empty,
     find_claim_data, get_vin_status
 )
 
@@ -69,7 +78,8 @@ logger = logging.getLogger(__name__)
 
 
 # Основная функция
-def search_and_extract(driver, claim_number, vin_number, svg_collection=True, started_at=None):
+def search_and_extract(driver, claim_number, vin_number, svg_collection=True, started_at=None, zone_workers=None, pipeline_options=None,
+                       deadline=None, run_generation=None, refresh=None, data_only=None):
     """
     Поиск и извлечение данных по номеру заявки и VIN.
     
@@ -79,10 +89,27 @@ def search_and_extract(driver, claim_number, vin_number, svg_collection=True, st
         vin_number: str - VIN автомобиля из формы
         svg_collection: bool - собирать SVG (по умолчанию True)
         started_at: datetime|str|None - время старта (опционально)
+        zone_workers: int|None - число драйверов для сбора зон (по умолчанию ZONE_CAPTURE_WORKERS)
+        pipeline_options: bool|None - собирать опции параллельно с зонами (по умолчанию OPTIONS_PIPELINE)
+        deadline: ClaimDeadline|None - бюджет времени заявки и её этапов
+        run_generation: str|None - поколение запуска заявки; повторная попытка того же
+            поколения продолжает работу с контрольной точки промежуточного JSON
+        refresh: RefreshPlan|None - этапы частичного обновления (по умолчанию полный сбор)
+        data_only: bool|None - профиль только данных: без скриншотов, SVG и записи файлов
+            графики (по умолчанию DATA_ONLY_PROFILE)
     
     Returns:
         dict - результат парсинга или описание ошибки
+    
+    Raises:
+        ClaimTimeoutError - если исчерпан бюджет времени заявки
     """
+    if data_only is None:
+        data_only = DATA_ONLY_PROFILE
+    if data_only:
+        # Профиль только данных не сохраняет SVG независимо от флага
+        svg_collection = False
+        logger.info("📄 Профиль только данных: скриншоты, SVG и файлы графики не создаются")
     logger.info(f"🎛️ Флаг сбора SVG: {'ВКЛЮЧЕН' if svg_collection else 'ОТКЛЮЧЕН'}")
     
     # Проверяем и нормализуем started_at
@@ -115,7 +142,7 @@ def search_and_extract(driver, claim_number, vin_number, svg_collection=True, st
         return {"error": "Не удалось открыть задачу"}
     logger.info("Ожидание загрузки страницы после открытия задачи")
     WebDriverWait(driver, 30, poll_frequency=0.5).until(EC.presence_of_element_located((By.CSS_SELECTOR, "body")))
-    time.sleep(1)
+    wait_for_dom_quiet(driver, timeout=5, network_timeout=10, label="открытие задачи")
     current_url = driver.current_url
     logger.info(f"Текущий URL: {current_url}")
     
@@ -130,27 +157,62 @@ def search_and_extract(driver, claim_number, vin_number, svg_collection=True, st
         logger.error(f"❌ Ошибка при получении VIN статуса: {e}")
         vin_status = "Нет"
     
+    plan = refresh or RefreshPlan()
+    if plan.is_partial:
+        logger.info(f"🔀 Частичное обновление заявки: {plan}")
+    
+    # Контрольная точка того же запуска: папки не очищаются, готовые этапы пропускаются
+    resume = None
+    if run_generation:
+        try:
+            resume = load_resume_checkpoint(get_claim_folders(claim_number, vin_number)[2], claim_number, run_generation)
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось прочитать контрольную точку: {e}")
+    
     try:
-        screenshot_dir, svg_dir, data_dir = create_folders(claim_number, vin_number)
+        # Частичное обновление дополняет существующую запись, поэтому папки не очищаются
+        screenshot_dir, svg_dir, data_dir = create_folders(
+            claim_number, vin_number, keep_existing=resume is not None or plan.is_partial
+        )
     except Exception as e:
         logger.error(f"❌ Ошибка при создании папок: {e}")
         return {"error": f"Ошибка создания папок: {str(e)}"}
     
-    # Формируем URL страницы повреждений для повторного использования
-    base_url = current_url.split('step')[0][:-1] + '&step=Damage+capturing'
+    # Планировщик загружает страницу повреждений один раз на заявку
+    base_url = build_damage_url(current_url)
     logger.info(f"Сформирован URL повреждений: {base_url}")
+    navigator = NavigationPlanner(driver, base_url)
+    timer = StageTimer(deadline)
+    # Скриншоты и SVG зон обрабатываются в пуле процессов, пока драйвер продолжает работу
+    artifacts = ArtifactPipeline()
+    # Журнал прогресса: одна строка на зону вместо перезаписи промежуточного JSON
+    journal = ProgressJournal(journal_path(data_dir, claim_number), run_generation, resume=resume is not None)
     
-    # Переходим на страницу повреждений для main screenshot
-    logger.info(f"Переход на URL повреждений для main screenshot: {base_url}")
-    driver.get(base_url)
-    logger.info("Ожидание загрузки страницы повреждений")
-    WebDriverWait(driver, 30, poll_frequency=0.5).until(EC.presence_of_element_located((By.CSS_SELECTOR, "body")))
-    time.sleep(1)
-    if not switch_to_frame_and_confirm(driver):
-        driver.switch_to.default_content()
-        return {"error": f"Не удалось переключиться на фрейм {IFRAME_ID}"}
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    main_screenshot_relative, main_svg_relative = save_main_screenshot_and_svg(driver, screenshot_dir, svg_dir, timestamp, claim_number, vin_number, svg_collection)
+    if zone_workers is None:
+        zone_workers = ZONE_CAPTURE_WORKERS
+    if pipeline_options is None:
+        pipeline_options = OPTIONS_PIPELINE
+    if pipeline_options and not (plan.wants(STAGE_OPTIONS) and plan.wants(STAGE_ZONES)):
+        pipeline_options = False
+    if pipeline_options and not memory_monitor.host_has_capacity("Драйвер фонового сбора опций"):
+        pipeline_options = False
+    
+    if resume and resume["main_screenshot_path"]:
+        logger.info("♻️ Основной скриншот взят из контрольной точки")
+        main_screenshot_relative, main_svg_relative = resume["main_screenshot_path"], resume["main_svg_path"]
+    elif not plan.wants(STAGE_MAIN_SCREENSHOT):
+        logger.info("⏭️ Основной скриншот не запрошен")
+        main_screenshot_relative, main_svg_relative = "", ""
+    elif data_only:
+        logger.info("⏭️ Профиль только данных: основной скриншот и SVG не сохраняются")
+        main_screenshot_relative, main_svg_relative = "", ""
+    else:
+        # Страница повреждений для main screenshot
+        with timer.stage("main_screenshot"):
+            if not navigator.require_damage_iframe("main_screenshot"):
+                return {"error": f"Не удалось переключиться на фрейм {IFRAME_ID}"}
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            main_screenshot_relative, main_svg_relative = save_main_screenshot_and_svg(driver, screenshot_dir, svg_dir, timestamp, claim_number, vin_number, svg_collection)
     
     # Исправляем проблему с None при ошибке скриншота
     if main_screenshot_relative is None:
@@ -161,38 +223,65 @@ def search_and_extract(driver, claim_number, vin_number, svg_collection=True, st
         logger.warning("⚠️ Основной SVG не был сохранен, устанавливаем пустой путь")
     
     # Выходим из фрейма для сбора опций
-    driver.switch_to.default_content()
+    navigator.require_default_content("options")
     
-    # СНАЧАЛА СОБИРАЕМ ОПЦИИ АВТОМОБИЛЯ (до обработки зон)
-    logger.info("🚗 ЭТАП 1: Сбор опций автомобиля")
-    options_result = process_vehicle_options(driver, claim_number, vin_number)
+    # Cookies сессии нужны дополнительным драйверам (зоны и фоновые опции)
+    session_cookies = driver.get_cookies() if zone_workers > 1 or pipeline_options else None
     
-    # ВОЗВРАЩАЕМСЯ К СТРАНИЦЕ ПОВРЕЖДЕНИЙ ДЛЯ СБОРА SVG
-    logger.info("🔄 Возвращаемся к странице повреждений для сбора SVG")
-    logger.info(f"Переход на URL повреждений для SVG: {base_url}")
-    driver.get(base_url)
-    logger.info("Ожидание загрузки страницы повреждений для SVG")
-    WebDriverWait(driver, 30, poll_frequency=0.5).until(EC.presence_of_element_located((By.CSS_SELECTOR, "body")))
-    time.sleep(1)
-    if not switch_to_frame_and_confirm(driver):
-        driver.switch_to.default_content()
-        return {"error": f"Не удалось переключиться на фрейм {IFRAME_ID} для SVG"}
-    
-    if not click_breadcrumb(driver):
-        driver.switch_to.default_content()
-        return {"error": "Не удалось кликнуть по breadcrumb"}
-    zones = extract_zones(driver)
-    if not zones:
-        driver.switch_to.default_content()
-        return {"error": "Зоны не найдены"}
+    options_result = resume["options_data"] if resume else None
+    options_job = None
+    if options_result:
+        logger.info("♻️ Опции взяты из контрольной точки")
+    elif not plan.wants(STAGE_OPTIONS):
+        logger.info("⏭️ Сбор опций не запрошен")
+    elif pipeline_options:
+        # Конвейер: опции собирает отдельный драйвер, пока основной обрабатывает зоны
+        options_job = start_options_collection(session_cookies, base_url, claim_number, vin_number, timer, deadline=deadline)
+    else:
+        # СНАЧАЛА СОБИРАЕМ ОПЦИИ АВТОМОБИЛЯ (до обработки зон)
+        logger.info("🚗 ЭТАП 1: Сбор опций автомобиля")
+        with timer.stage("options"):
+            options_result = process_vehicle_options(driver, claim_number, vin_number, deadline=deadline)
+        navigator.mark_default_content()
+    
+    if plan.wants(STAGE_ZONES):
+        # Возвращаемся в уже загруженный iframe и открываем дерево зон через breadcrumb
+        logger.info("🔄 Возвращаемся к дереву зон для сбора SVG")
+        zones = navigator.open_zone_navigation("zones")
+        if not zones:
+            driver.switch_to.default_content()
+            if options_job:
+                join_options_collection(*options_job)
+            return {"error": "Зоны не найдены", "navigation": navigator.stats()}
+        if plan.zone_titles:
+            zones = [zone for zone in zones if plan.includes_zone(zone["title"])]
+            if not zones:
+                driver.switch_to.default_content()
+                if options_job:
+                    join_options_collection(*options_job)
+                return {"error": f"Выбранные зоны не найдены: {', '.join(plan.zone_titles)}", "navigation": navigator.stats()}
+            logger.info(f"🔀 Обновляются зоны: {[zone['title'] for zone in zones]}")
+    else:
+        logger.info("⏭️ Сбор зон не запрошен")
+        zones = []
     
     # ЗАТЕМ ОБРАБАТЫВАЕМ ЗОНЫ И SVG
     logger.info("🎨 ЭТАП 2: Обработка зон и SVG")
     
-    # Промежуточное сохранение JSON перед обработкой зон
+    # Зоны, завершённые до контрольной точки, не обрабатываются повторно
+    preloaded = {}
+    if resume:
+        zone_entries = dict(resume["zone_entries"])
+        for index, zone in enumerate(zones):
+            if zone["title"] in zone_entries:
+                preloaded[index] = zone_entries.pop(zone["title"])
+    
+    # Промежуточный JSON сохраняется один раз: по нему страницы истории видят заявку в работе,
+    # прогресс по зонам дописывается в журнал
     logger.info("💾 Промежуточное сохранение JSON перед обработкой зон")
+    preloaded_data = [entry for index in sorted(preloaded) for entry in preloaded[index]]
     intermediate_json_path = save_data_to_json(
-        vin_number, [], main_screenshot_relative, main_svg_relative, 
+        vin_number, preloaded_data, main_screenshot_relative, main_svg_relative, 
         "", "", data_dir, claim_number, options_result, vin_status,
         started_at=started_at, completed_at=datetime.now(), is_intermediate=True
     )
@@ -200,39 +289,80 @@ def search_and_extract(driver, claim_number, vin_number, svg_collection=True, st
         logger.info(f"✅ Промежуточный JSON сохранен: {intermediate_json_path}")
     else:
         logger.warning("⚠️ Не удалось сохранить промежуточный JSON")
+    journal.start(main_screenshot_relative, main_svg_relative, options_result, len(zones), started_at=started_at)
     
-    for zone in zones:
-        try:
-            # Проверяем, что браузер еще работает
-            try:
-                driver.current_url
-            except Exception as browser_error:
-                logger.error(f"❌ Браузер закрыт во время обработки зоны {zone.get('title', 'Unknown')}: {browser_error}")
-                return {"error": "Браузер был закрыт во время выполнения", "browser_closed": True}
-                
-            zone_result = process_zone(driver, zone, screenshot_dir, svg_dir, claim_number=claim_number, vin=vin_number, svg_collection=svg_collection)
-            zone_data.extend(zone_result)
-            
-            # Промежуточное сохранение после каждой зоны
-            logger.info(f"💾 Промежуточное сохранение после зоны: {zone.get('title', 'Unknown')}")
-            intermediate_json_path = save_data_to_json(
-                vin_number, zone_data, main_screenshot_relative, main_svg_relative, 
-                "", "", data_dir, claim_number, options_result, vin_status,
-                started_at=started_at, completed_at=datetime.now(), is_intermediate=True
+    def process_one_zone(zone_driver, zone):
+        zone_result = process_zone(zone_driver, zone, screenshot_dir, svg_dir, claim_number=claim_number, vin=vin_number,
+                                   svg_collection=svg_collection, deadline=deadline, data_only=data_only,
+                                   artifacts=artifacts)
+        if zone_result and not any(entry.get("graphics_not_available") for entry in zone_result):
+            # В журнал попадает только зона, изображения и SVG которой уже сохранены в фоне;
+            # детали SVG зоны заполняются по результату разбиения
+            artifacts.on_zone_saved(zone_result, partial(record_saved_zone, zone.get("title", "")))
+        return zone_result
+    
+    def record_saved_zone(title, entries):
+        if not data_only and not all(entry.get("screenshot_path") for entry in entries):
+            logger.info(f"📝 Зона {title} без скриншота не записана в журнал, при продолжении соберётся заново")
+            return
+        if zone_is_complete(entries):
+            journal.record_zone(title, entries)
+    
+    # Зоны распределяются между драйверами, результат собирается в исходном порядке
+    try:
+        with timer.stage("zones"):
+            zone_data = capture_zones(
+                driver, zones, process_one_zone,
+                workers=zone_workers, damage_url=base_url, cookies=session_cookies,
+                deadline=deadline, preloaded=preloaded
             )
-            if intermediate_json_path:
-                logger.info(f"✅ Промежуточный JSON обновлен после зоны {zone.get('title', 'Unknown')}")
-            
-        except Exception as e:
-            logger.error(f"❌ Ошибка при обработке зоны {zone.get('title', 'Unknown')}: {e}")
-            # Продолжаем обработку других зон
-            continue
+    except BrowserClosedError:
+        if options_job:
+            join_options_collection(*options_job)
+        if deadline:
+            # Браузер мог закрыть сторож бюджета времени
+            deadline.check("zones")
+        return {"error": "Браузер был закрыт во время выполнения", "browser_closed": True}
     
     driver.switch_to.default_content()
+    navigator.mark_default_content()
+    
+    # Join: дожидаемся фоновых опций, при неудаче собираем их основным драйвером
+    if options_job:
+        with timer.stage("options_join"):
+            options_result = join_options_collection(*options_job)
+        if options_result is None:
+            with timer.stage("options_fallback"):
+                options_result = process_vehicle_options(driver, claim_number, vin_number, deadline=deadline)
+        try:
+            journal.record_options(options_result)
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка записи опций в журнал: {e}")
     
     # ГАРАНТИРУЕМ извлечение деталей из всех зон
     logger.info(f"🔧 Запускаем финальную проверку извлечения деталей для {len(zone_data)} зон")
-    zone_data = ensure_zone_details_extracted(zone_data, svg_dir, claim_number=claim_number, vin=vin_number, svg_collection=svg_collection)
+    with timer.stage("details"):
+        zone_data = ensure_zone_details_extracted(
+            zone_data, svg_dir, claim_number=claim_number, vin=vin_number,
+            svg_collection=svg_collection, data_only=data_only, artifacts=artifacts
+        )
+    
+    # Частичное обновление дополняет последний финальный результат заявки
+    if plan.is_partial:
+        zone_data, options_result, main_screenshot_relative, main_svg_relative = merge_with_previous_result(
+            data_dir, plan, zone_data, options_result, main_screenshot_relative, main_svg_relative
+        )
+    
+    # Финальный JSON ждёт только изображения, на которые ссылаются зоны
+    with timer.stage("artifacts"):
+        artifact_stats = artifacts.resolve(zone_data)
+    
+    # Уменьшенные копии скриншотов для страниц истории создаются в фоне
+    if not data_only:
+        try:
+            submit_thumbnails([main_screenshot_relative] + [zone.get("screenshot_path") for zone in zone_data])
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось запустить создание копий скриншотов: {e}")
     
     zones_table = create_zones_table(zone_data)
     
@@ -240,10 +370,23 @@ def search_and_extract(driver, claim_number, vin_number, svg_collection=True, st
     completed_at = get_moscow_time()
     logger.info(f"✅ Парсер завершен в: {completed_at.strftime('%H:%M:%S')} (МСК)")
     
+    navigation_stats = navigator.stats()
+    logger.info(
+        f"🧭 Навигация по заявке: загрузок {navigation_stats['navigations']}, "
+        f"перезагрузок {navigation_stats['reloads']}, переключений фрейма {navigation_stats['frame_switches']}"
+    )
+    stage_timings = timer.summary()
+    stage_timings["pipeline_options"] = bool(pipeline_options)
+    stage_timings["data_only"] = bool(data_only)
+    stage_timings["artifacts"] = artifact_stats
+    if "options_overlap" in stage_timings:
+        logger.info(f"⏱️ Перекрытие опций с зонами: {stage_timings['options_overlap']:.2f} с")
+    
     json_path = save_data_to_json(
         vin_number, zone_data, main_screenshot_relative, main_svg_relative, 
         zones_table, "", data_dir, claim_number, options_result, vin_status,
-        started_at=started_at, completed_at=completed_at
+        started_at=started_at, completed_at=completed_at, navigation_stats=navigation_stats,
+        stage_timings=stage_timings, refresh=plan.as_dict() if plan.is_partial else None
     )
     
     # Проверяем, что JSON файл был успешно сохранен
@@ -252,6 +395,8 @@ def search_and_extract(driver, claim_number, vin_number, svg_collection=True, st
         return {"error": "Ошибка сохранения данных"}
     
     logger.info(f"✅ JSON файл успешно сохранен: {json_path}")
+    # Итоговый документ сохранён, контрольная точка больше не нужна
+    journal.discard()
     
     return {
         "success": "Задача открыта", 
@@ -263,11 +408,15 @@ def search_and_extract(driver, claim_number, vin_number, svg_collection=True, st
         "vin_value": vin_number, 
         "claim_number": claim_number,
         "started_at": started_at,
-        "completed_at": completed_at
+        "completed_at": completed_at,
+        "navigation": navigation_stats,
+        "stage_timings": stage_timings,
+        "refresh": plan.as_dict() if plan.is_partial else None
     }
 
 # Точка входа в парсер 
-async def login_audatex(username: str, password: str, claim_number: str, vin_number: str, svg_collection: bool = True, started_at=None):
+async def login_audatex(username: str, password: str, claim_number: str, vin_number: str, svg_collection: bool = True, started_at=None,
+                        run_generation=None, refresh=None, data_only=None, deadline=None):
     """
     Асинхронный вход в Audatex и запуск парсинга.
     
@@ -278,11 +427,19 @@ async def login_audatex(username: str, password: str, claim_number: str, vin_num
         vin_number: str - VIN автомобиля
         svg_collection: bool - собирать SVG (по умолчанию True)
         started_at: datetime|str|None - время старта (опционально)
+        run_generation: str|None - поколение запуска для продолжения с контрольной точки
+        refresh: RefreshPlan|None - этапы частичного обновления
+        data_only: bool|None - профиль только данных (по умолчанию DATA_ONLY_PROFILE)
+        deadline: ClaimDeadline|None - бюджет времени заявки (по умолчанию создаётся новый)
     
     Returns:
         dict - результат парсинга или описание ошибки
     """
     driver = None
+    # Бюджет времени заявки: сторож завершит драйверы заявки, если она зависнет
+    if deadline is None:
+        deadline = ClaimDeadline(f"{claim_number}_{vin_number}")
+    watchdog = ClaimWatchdog(deadline)
     try:
         logger.info("🚀 Начинаем процесс входа в Audatex")
         
@@ -290,6 +447,10 @@ async def login_audatex(username: str, password: str, claim_number: str, vin_num
         driver = init_browser()
         if not driver:
             return {"error": "Не удалось инициализировать браузер"}
+        deadline.register_driver(driver)
+        watchdog.start()
+        memory_monitor.ensure_started()
+        memory_monitor.label_driver(driver, f"{claim_number}_{vin_number}:main")
         
         # Загружаем cookies
         if not load_cookies(driver, BASE_URL, COOKIES_FILE):
@@ -308,11 +469,26 @@ async def login_audatex(username: str, password: str, claim_number: str, vin_num
         # Выполняем поиск и извлечение данных в отдельном потоке
         loop = asyncio.get_event_loop()
         try:
-            result = await loop.run_in_executor(None, lambda: search_and_extract(driver, claim_number, vin_number, svg_collection, started_at))
+            result = await loop.run_in_executor(
+                None, lambda: search_and_extract(
+                    driver, claim_number, vin_number, svg_collection, started_at,
+                    deadline=deadline, run_generation=run_generation, refresh=refresh,
+                    data_only=data_only
+                )
+            )
+        except ClaimTimeoutError as e:
+            logger.error(f"⏰ Заявка {claim_number} остановлена по бюджету времени: {e}")
+            return deadline.as_error()
         except Exception as e:
             logger.error(f"❌ Ошибка выполнения парсера: {e}")
+            if deadline.timed_out:
+                return deadline.as_error()
             return {"error": f"Ошибка выполнения парсера: {str(e)}"}
         
+        # Драйвер, убитый сторожем, мог завершить этап обычной ошибкой
+        if deadline.timed_out and "success" not in result:
+            return deadline.as_error()
+        
         # Сохраняем cookies после успешного выполнения
         if "success" in result:
             try:
@@ -327,73 +503,45 @@ async def login_audatex(username: str, password: str, claim_number: str, vin_num
         
     except Exception as e:
         logger.error(f"❌ Ошибка в login_audatex: {e}")
+        if deadline.timed_out:
+            return deadline.as_error()
         return {"error": f"Ошибка парсинга: {str(e)}"}
     finally:
-        if driver:
-            try:
-                driver.quit()
-                logger.info("Попытка 1: Браузер закрыт в finally")
-            except Exception as e:
-                logger.error(f"Ошибка при закрытии браузера: {e}")
+        watchdog.stop()
+        if driver and quit_driver(driver):
+            logger.info("Попытка 1: Браузер закрыт в finally")
 
-# Функция для завершения всех процессов браузера
+# Функция для завершения процессов браузера
 def terminate_all_processes_and_restart(current_url=None):
     """
-    Завершение всех процессов Chrome и перезапуск парсера.
+    Завершение процессов Chrome, запущенных парсером, и очистка их профилей.
+    Завершаются только деревья процессов отслеживаемых драйверов, браузеры
+    других пользователей хоста не затрагиваются.
     
     Args:
         current_url: str|None - URL для восстановления (опционально)
     
     Returns:
-        None
+        str - описание результата
     """
-    logger.critical("🛑 Завершение всех процессов браузера инициировано!")
-    killed_processes = []
+    logger.critical("🛑 Завершение процессов браузера парсера инициировано!")
     
     try:
-        # Первый проход - мягкое завершение
-        for proc in psutil.process_iter(['name', 'pid', 'cmdline']):
-            try:
-                proc_name = proc.info['name']
-                if proc_name in ['chrome.exe', 'chromedriver.exe', 'chrome', 'chromedriver']:
-                    logger.critical(f"🔄 Завершаем процесс: {proc_name} (pid={proc.info['pid']})")
-                    proc.terminate()
-                    killed_processes.append(proc.info['pid'])
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
-            except Exception as e:
-                logger.error(f"❌ Ошибка при мягком завершении процесса: {e}")
-        
-        # Ждем немного для мягкого завершения
-        time.sleep(2)
-        
-        # Второй проход - принудительное завершение
-        for proc in psutil.process_iter(['name', 'pid']):
+        drivers = tracked_drivers()
+        killed = 0
+        for driver in drivers:
             try:
-                proc_name = proc.info['name']
-                if proc_name in ['chrome.exe', 'chromedriver.exe', 'chrome', 'chromedriver']:
-                    if proc.info['pid'] not in killed_processes:
-                        logger.critical(f"💀 Принудительно завершаем процесс: {proc_name} (pid={proc.info['pid']})")
-                        proc.kill()
-                        killed_processes.append(proc.info['pid'])
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
+                killed += kill_driver_process_tree(driver)
             except Exception as e:
-                logger.error(f"❌ Ошибка при принудительном завершении процесса: {e}")
+                logger.error(f"❌ Ошибка при завершении дерева процессов драйвера: {e}")
         
-        # Дополнительная проверка через taskkill для Windows
-        import platform
-        if platform.system() == "Windows":
-            try:
-                import subprocess
-                subprocess.run(['taskkill', '/f', '/im', 'chrome.exe'], capture_output=True, timeout=5)
-                subprocess.run(['taskkill', '/f', '/im', 'chromedriver.exe'], capture_output=True, timeout=5)
-                logger.critical("✅ Дополнительное завершение через taskkill выполнено")
-            except Exception as e:
-                logger.warning(f"⚠️ Ошибка taskkill: {e}")
+        removed_profiles = cleanup_orphaned_profiles()
         
-        logger.critical(f"✅ Все процессы браузера завершены. Завершено процессов: {len(killed_processes)}")
-        return f"Все процессы браузера успешно завершены. Завершено процессов: {len(killed_processes)}"
+        logger.critical(
+            f"✅ Процессы браузера парсера завершены. Драйверов: {len(drivers)}, "
+            f"процессов: {killed}, удалено профилей: {removed_profiles}"
+        )
+        return f"Процессы браузера парсера успешно завершены. Завершено процессов: {killed}"
         
     except Exception as e:
         logger.error(f"❌ Критическая ошибка при завершении процессов Chrome/Chromedriver: {e}")
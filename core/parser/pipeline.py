@@ -0,0 +1,142 @@
+"""
+Конвейерный режим парсинга: опции собираются параллельно с зонами
+
+Сбор опций выполняется в отдельном драйвере той же сессии, пока основной
+драйвер обрабатывает зоны и SVG. Перед финальным сохранением JSON результаты
+объединяются (join), а длительность каждого этапа фиксируется, чтобы было
+видно выигрыш от перекрытия.
+
+Основные функции:
+    * StageTimer: Замер длительности этапов парсинга заявки
+    * start_options_collection: Запускает сбор опций в отдельном драйвере
+    * join_options_collection: Дожидается опций перед финальным сохранением
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+
+from .constants import BASE_URL
+from .browser import init_browser, quit_driver
+from .navigation import NavigationPlanner
+from .option_processor import process_vehicle_options
+
+logger = logging.getLogger(__name__)
+
+# Сколько ждать фонового сбора опций после завершения зон (секунды)
+OPTIONS_JOIN_TIMEOUT = 300
+
+
+class StageTimer:
+    """
+    Замеряет длительность этапов заявки (секунды от начала и продолжительность).
+    Если передан дедлайн заявки, этап одновременно учитывается в его бюджетах.
+    """
+
+    def __init__(self, deadline=None):
+        self._origin = time.monotonic()
+        self.stages = {}
+        self.deadline = deadline
+
+    @contextmanager
+    def stage(self, name):
+        started = time.monotonic()
+        if self.deadline:
+            self.deadline.check(name)
+            self.deadline.enter_stage(name)
+        try:
+            yield
+        finally:
+            if self.deadline:
+                self.deadline.leave_stage(name)
+            self.record(name, started, time.monotonic())
+
+    def record(self, name, started, finished):
+        self.stages[name] = {
+            "start": round(started - self._origin, 3),
+            "duration": round(finished - started, 3),
+        }
+        logger.info(f"⏱️ Этап '{name}': {finished - started:.2f} с")
+
+    def summary(self):
+        """Длительности этапов, общее время и время перекрытия опций с зонами"""
+        result = {name: dict(values) for name, values in self.stages.items()}
+        summary = {"stages": result, "total": round(time.monotonic() - self._origin, 3)}
+        options = result.get("options")
+        zones = result.get("zones")
+        if options and zones:
+            overlap_start = max(options["start"], zones["start"])
+            overlap_end = min(options["start"] + options["duration"], zones["start"] + zones["duration"])
+            summary["options_overlap"] = round(max(0.0, overlap_end - overlap_start), 3)
+        return summary
+
+
+def _collect_options_in_worker(cookies, damage_url, claim_number, vin, timer, deadline=None):
+    started = time.monotonic()
+    worker = None
+    if deadline:
+        deadline.enter_stage("options")
+    try:
+        worker = init_browser()
+        if not worker:
+            logger.warning("⚠️ [options-worker] Не удалось создать драйвер для опций")
+            return None
+        if deadline:
+            deadline.register_driver(worker)
+        worker.get(BASE_URL)
+        for cookie in cookies or []:
+            try:
+                worker.add_cookie(cookie)
+            except Exception as e:
+                logger.debug(f"[options-worker] Не удалось добавить cookie {cookie.get('name')}: {e}")
+
+        navigator = NavigationPlanner(worker, damage_url)
+        if not navigator.require_damage_iframe("options"):
+            logger.warning("⚠️ [options-worker] Страница повреждений не открылась")
+            return None
+        navigator.require_default_content("options")
+        return process_vehicle_options(worker, claim_number, vin, deadline=deadline)
+    except Exception as e:
+        logger.warning(f"⚠️ [options-worker] Ошибка фонового сбора опций: {e}")
+        return None
+    finally:
+        timer.record("options", started, time.monotonic())
+        if deadline:
+            deadline.leave_stage("options")
+            deadline.unregister_driver(worker)
+        if worker and quit_driver(worker):
+            logger.info("🔚 [options-worker] Драйвер опций закрыт")
+
+
+def start_options_collection(cookies, damage_url, claim_number, vin, timer, deadline=None):
+    """
+    Запускает сбор опций в отдельном драйвере.
+
+    Returns:
+        tuple - (executor, future); результат future - options_result или None
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="options-worker")
+    future = executor.submit(_collect_options_in_worker, cookies, damage_url, claim_number, vin, timer, deadline)
+    logger.info("🚗 Сбор опций запущен параллельно с обработкой зон")
+    return executor, future
+
+
+def join_options_collection(executor, future, timeout=OPTIONS_JOIN_TIMEOUT):
+    """
+    Дожидается фонового сбора опций.
+
+    Returns:
+        dict|None - options_result или None, если опции нужно собрать основным драйвером
+    """
+    try:
+        options_result = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.error(f"❌ Фоновый сбор опций не завершился за {timeout} с")
+        options_result = None
+    finally:
+        executor.shutdown(wait=False)
+
+    if not options_result or not options_result.get("success"):
+        logger.warning("⚠️ Фоновый сбор опций не удался, опции будут собраны основным драйвером")
+        return None
+    return options_result
@@ -0,0 +1,179 @@
+"""
+Журнал прогресса заявки (JSONL)
+
+После каждой зоны в журнал дописывается одна строка с результатом этой зоны,
+вместо перезаписи всего промежуточного JSON. fsync выполняется пачками, а
+итоговый документ формируется один раз в конце; после его сохранения журнал
+удаляется. Журнал служит контрольной точкой для продолжения заявки и
+источником живого прогресса.
+
+Записи:
+    * start: поколение запуска, пути основного скриншота и SVG, опции, число зон
+    * zone: название зоны и её записи zone_data
+    * options: собранные опции
+
+Основные функции:
+    * journal_path: Путь журнала заявки
+    * zone_is_complete: Проверяет, что зона собрана без ошибок
+    * ProgressJournal: Дописывает записи в журнал
+    * read_journal: Читает записи журнала
+    * journal_progress: Прогресс заявки по журналу
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# fsync после стольких записей или через столько секунд после предыдущего
+JOURNAL_FSYNC_BATCH = 5
+JOURNAL_FSYNC_INTERVAL = 2.0
+
+
+def journal_path(data_dir, claim_number):
+    return os.path.join(data_dir, f"progress_{claim_number}.jsonl")
+
+
+def zone_is_complete(entries):
+    """
+    True если зона собрана без ошибок: записи есть, среди них нет заглушек
+    graphics_not_available, а у SVG зон есть детали. Такие зоны не
+    собираются повторно при продолжении заявки.
+    """
+    if not entries:
+        return False
+    return all(
+        not entry.get("graphics_not_available") and (entry.get("has_pictograms") or entry.get("details"))
+        for entry in entries
+    )
+
+
+class ProgressJournal:
+    """
+    Дописывает записи прогресса заявки в JSONL журнал. Потокобезопасен:
+    зоны записывают несколько драйверов. Файл открывается на время записи,
+    поэтому журнал не нужно закрывать при досрочном выходе из заявки; строки,
+    ещё не прошедшие fsync, переживают падение процесса в кеше ОС.
+
+    Журнал того же поколения запуска продолжается (повторная попытка заявки),
+    иначе начинается заново.
+    """
+
+    def __init__(self, path, run_generation=None, resume=False,
+                 fsync_batch=JOURNAL_FSYNC_BATCH, fsync_interval=JOURNAL_FSYNC_INTERVAL):
+        self.path = path
+        self.run_generation = run_generation
+        self._fsync_batch = fsync_batch
+        self._fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._discarded = False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not resume:
+            open(path, "w", encoding="utf-8").close()
+        else:
+            self._truncate_torn_tail()
+
+    def _truncate_torn_tail(self):
+        """Обрезает оборванную при аварии последнюю строку, чтобы новые записи не склеились с ней"""
+        try:
+            with open(self.path, "rb+") as f:
+                data = f.read()
+                if data and not data.endswith(b"\n"):
+                    f.truncate(data.rfind(b"\n") + 1)
+        except FileNotFoundError:
+            pass
+
+    def append(self, record, sync=False):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._discarded:
+                # Зона, сохранённая в фоне после итогового документа, журнал не восстанавливает
+                return
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                self._unsynced += 1
+                if (sync or self._unsynced >= self._fsync_batch
+                        or time.monotonic() - self._last_sync >= self._fsync_interval):
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self._unsynced = 0
+                    self._last_sync = time.monotonic()
+
+    def start(self, main_screenshot_path, main_svg_path, options_data, zones_total, started_at=None):
+        self.append({
+            "type": "start",
+            "run_generation": self.run_generation,
+            "main_screenshot_path": main_screenshot_path,
+            "main_svg_path": main_svg_path,
+            "options_data": options_data,
+            "zones_total": zones_total,
+            "started_at": started_at,
+            "time": time.time(),
+        }, sync=True)
+
+    def record_zone(self, title, entries):
+        self.append({"type": "zone", "title": title, "entries": entries, "time": time.time()})
+
+    def record_options(self, options_data):
+        self.append({"type": "options", "options_data": options_data, "time": time.time()}, sync=True)
+
+    def discard(self):
+        """Удаляет журнал после сохранения итогового документа"""
+        with self._lock:
+            self._discarded = True
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def read_journal(path):
+    """
+    Читает записи журнала. Оборванная при аварии последняя строка пропускается.
+
+    Returns:
+        list - записи в порядке добавления ([] если журнала нет)
+    """
+    records = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Повреждённая строка {line_number} журнала {path} пропущена")
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def journal_progress(path):
+    """
+    Returns:
+        dict|None - {"zones_total", "zones_done", "last_zone", "updated_at"} или
+        None если журнала нет
+    """
+    records = read_journal(path)
+    if not records:
+        return None
+    zones_total = 0
+    zones_done = set()
+    last_zone = None
+    for record in records:
+        if record.get("type") == "start":
+            zones_total = record.get("zones_total", 0)
+        elif record.get("type") == "zone":
+            zones_done.add(record.get("title", ""))
+            last_zone = record.get("title")
+    return {
+        "zones_total": zones_total,
+        "zones_done": len(zones_done),
+        "last_zone": last_zone,
+        "updated_at": records[-1].get("time"),
+    }
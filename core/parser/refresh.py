@@ -0,0 +1,141 @@
+"""
+Частичное обновление заявки
+
+По умолчанию заявка собирается целиком. Запрос может ограничить сбор
+отдельными этапами (основной скриншот, опции, зоны) и списком зон по
+названиям. Результат частичного обновления объединяется с последним
+финальным JSON заявки: обновлённые части заменяются, остальные берутся из
+существующей записи.
+
+Основные функции:
+    * RefreshPlan: Набор этапов, которые нужно собрать
+    * find_latest_result_json: Находит последний финальный JSON заявки
+    * merge_with_previous_result: Объединяет частичный результат с существующим
+"""
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Этапы, которые можно запросить отдельно
+STAGE_MAIN_SCREENSHOT = "main_screenshot"
+STAGE_OPTIONS = "options"
+STAGE_ZONES = "zones"
+REFRESH_STAGES = (STAGE_MAIN_SCREENSHOT, STAGE_OPTIONS, STAGE_ZONES)
+
+
+class RefreshPlan:
+    """
+    Этапы сбора заявки.
+
+    stages=None и zone_titles=None - полный сбор. Список zone_titles без
+    stages означает обновление только этих зон.
+    """
+
+    def __init__(self, stages=None, zone_titles=None):
+        zone_titles = [title.strip() for title in zone_titles or [] if title and title.strip()]
+        if stages is None:
+            stages = [STAGE_ZONES] if zone_titles else list(REFRESH_STAGES)
+        unknown = [stage for stage in stages if stage not in REFRESH_STAGES]
+        if unknown:
+            raise ValueError(f"Неизвестные этапы: {', '.join(unknown)}. Допустимые: {', '.join(REFRESH_STAGES)}")
+        if not stages:
+            raise ValueError("Не выбран ни один этап")
+        if zone_titles and STAGE_ZONES not in stages:
+            stages = list(stages) + [STAGE_ZONES]
+        self.stages = [stage for stage in REFRESH_STAGES if stage in stages]
+        self.zone_titles = zone_titles
+
+    @classmethod
+    def from_request(cls, request_data):
+        """План из данных заявки очереди (ключи stages и zone_titles)"""
+        return cls(request_data.get("stages"), request_data.get("zone_titles"))
+
+    @property
+    def is_partial(self):
+        return len(self.stages) < len(REFRESH_STAGES) or bool(self.zone_titles)
+
+    def wants(self, stage):
+        return stage in self.stages
+
+    def includes_zone(self, title):
+        """True если зону нужно собрать"""
+        if not self.wants(STAGE_ZONES):
+            return False
+        return not self.zone_titles or title.strip() in self.zone_titles
+
+    def as_dict(self):
+        return {"stages": list(self.stages), "zone_titles": list(self.zone_titles)}
+
+    def __repr__(self):
+        return f"RefreshPlan(stages={self.stages}, zone_titles={self.zone_titles})"
+
+
+def find_latest_result_json(data_dir):
+    """
+    Последний финальный JSON заявки (промежуточные файлы не учитываются).
+
+    Returns:
+        str|None - путь к файлу
+    """
+    if not os.path.isdir(data_dir):
+        return None
+    candidates = [
+        os.path.join(data_dir, name) for name in os.listdir(data_dir)
+        if name.startswith("data_") and name.endswith(".json") and not name.startswith("data_intermediate_")
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+def merge_with_previous_result(data_dir, plan, zone_data, options_data, main_screenshot_path, main_svg_path):
+    """
+    Объединяет результат частичного обновления с последним финальным JSON заявки.
+
+    Returns:
+        tuple - (zone_data, options_data, main_screenshot_path, main_svg_path)
+    """
+    previous_path = find_latest_result_json(data_dir)
+    if not previous_path:
+        logger.warning("⚠️ Предыдущий результат заявки не найден, сохраняется только частичный результат")
+        return zone_data, options_data, main_screenshot_path, main_svg_path
+    try:
+        with open(previous_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ Не удалось прочитать предыдущий результат {previous_path}: {e}")
+        return zone_data, options_data, main_screenshot_path, main_svg_path
+
+    logger.info(f"🔀 Объединяем частичное обновление {plan} с {previous_path}")
+
+    if not plan.wants(STAGE_MAIN_SCREENSHOT):
+        main_screenshot_path = previous.get("main_screenshot_path", "")
+        main_svg_path = previous.get("main_svg_path", "")
+    if not plan.wants(STAGE_OPTIONS):
+        options_data = previous.get("options_data")
+
+    previous_zones = previous.get("zone_data", [])
+    if not plan.wants(STAGE_ZONES):
+        zone_data = previous_zones
+    elif plan.zone_titles:
+        # Обновлённые зоны встают на место прежних, новые добавляются в конец
+        fresh = {}
+        for zone in zone_data:
+            fresh.setdefault(zone["title"], []).append(zone)
+        merged = []
+        replaced = set()
+        for zone in previous_zones:
+            title = zone.get("title", "")
+            if title in fresh:
+                merged.extend(fresh.pop(title))
+                replaced.add(title)
+            elif title not in replaced:
+                # Зона не запрашивалась или не собралась - остаётся прежняя запись
+                merged.append(zone)
+        for zones in fresh.values():
+            merged.extend(zones)
+        zone_data = merged
+
+    return zone_data, options_data, main_screenshot_path, main_svg_path
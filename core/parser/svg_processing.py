@@ -0,0 +1,518 @@
+"""
+Обработка SVG зон без браузера
+
+Сборка SVG документа из снятой разметки, разбор, разбиение зоны на детали и
+запись файлов. Модуль не зависит от WebDriver, поэтому его функции
+выполняются и в процессах пула фоновой обработки.
+
+Основные функции:
+    * build_svg_document: Формирует и проверяет SVG документ
+    * minify_svg_tree: Убирает из дерева SVG лишние пробелы и сжимает CSS
+    * store_svg_bytes: Сохраняет SVG и разбивает зону на детали
+    * split_svg_tree: Разбивает разобранное дерево зоны на детали
+    * split_svg_by_details: Разбивает SVG файл зоны на детали
+    * process_zone_svg: Фоновая обработка снятого SVG зоны
+"""
+import os
+import logging
+import re
+import platform
+import xml.etree.ElementTree as ET
+from io import BytesIO
+
+from .artifact_store import write_artifact
+from .constants import SVG_MINIFY
+from .naming import safe_file_name, is_blank_name, grouped_name_length
+
+logger = logging.getLogger(__name__)
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+
+# Элементы, пробелы внутри которых значимы
+_TEXT_TAGS = frozenset({"text", "tspan", "textPath", "title", "desc", "style", "script"})
+_CSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE_RE = re.compile(r"\s+")
+_CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+
+
+# Функция для проверки имени файла по шаблону zone_*
+def is_zone_file(filename: str) -> bool:
+    """
+    Проверяет, является ли файл файлом зоны.
+    
+    Файлы зон всегда начинаются с 'zone_' и не содержат 'pictogram' в названии.
+    
+    Args:
+        filename: str - имя файла для проверки
+    
+    Returns:
+        bool - True если файл является файлом зоны
+    """
+    filename_lower = filename.lower()
+    is_zone = (filename_lower.startswith('zone_') and 
+               'pictogram' not in filename_lower and 
+               filename_lower.endswith('.svg'))
+    logger.debug(f"🔍 is_zone_file('{filename}'): {is_zone}")
+    return is_zone
+
+
+# Вспомогательные функции для разбиения SVG на детали
+def has_detail(elem, detail):
+    return elem.attrib.get('data-title', '') == detail
+
+
+def prune_for_detail(root_element, detail):
+    for elem in list(root_element):
+        tag = elem.tag.split('}')[-1]
+        if tag == 'g' and not has_detail(elem, detail):
+            root_element.remove(elem)
+        else:
+            prune_for_detail(elem, detail)
+
+
+def _is_group(elem):
+    return isinstance(elem.tag, str) and elem.tag.split('}')[-1] == 'g'
+
+
+class DetailSplitter:
+    """
+    Однократно разобранное дерево SVG зоны для разбиения на детали.
+
+    prune_for_detail удаляет только группы <g>, поэтому поддеревья без групп
+    одинаковы для всех деталей. Они не копируются, а разделяются между
+    деревьями деталей; копируется только «скелет» - элементы, содержащие
+    группы. Результат сериализуется тем же ElementTree.write и побайтно
+    совпадает с ET.parse + prune_for_detail.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._skeleton = set()
+        self._mark_skeleton(root)
+
+    def _mark_skeleton(self, elem):
+        has_group = False
+        for child in elem:
+            if self._mark_skeleton(child) or _is_group(child):
+                has_group = True
+        if has_group:
+            self._skeleton.add(elem)
+        return has_group
+
+    def titles(self):
+        """Уникальные data-title дерева"""
+        return {elem.attrib['data-title'] for elem in self.root.iter() if 'data-title' in elem.attrib}
+
+    def _pruned(self, elem, detail):
+        if elem not in self._skeleton:
+            return elem
+        copy = ET.Element(elem.tag, elem.attrib)
+        copy.text = elem.text
+        copy.tail = elem.tail
+        for child in elem:
+            if _is_group(child) and not has_detail(child, detail):
+                continue
+            copy.append(self._pruned(child, detail))
+        return copy
+
+    def detail_tree(self, detail):
+        """Дерево SVG, содержащее только группы детали detail"""
+        return ET.ElementTree(self._pruned(self.root, detail))
+
+    def write_detail(self, detail, output_path):
+        write_artifact(output_path, serialize_svg_tree(self.detail_tree(detail).getroot()))
+
+
+def _local_name(elem):
+    return elem.tag.split('}')[-1] if isinstance(elem.tag, str) else ""
+
+
+def minify_css(css):
+    """Удаляет комментарии и лишние пробелы из CSS"""
+    css = _CSS_COMMENT_RE.sub("", css)
+    css = _CSS_SPACE_RE.sub(" ", css)
+    css = _CSS_PUNCT_RE.sub(r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_svg_tree(root):
+    """
+    Минифицирует дерево SVG на месте: удаляет пробельные текстовые узлы между
+    элементами (кроме текстовых элементов) и сжимает содержимое <style>.
+    Стили остаются внутри файла, чтобы скачанный SVG отображался самостоятельно.
+    """
+    # Без регистрации ElementTree пишет префикс ns0: у каждого элемента.
+    # Регистрация глобальна для процесса, поэтому выполняется только при
+    # минификации: с выключенным SVG_MINIFY вывод не меняется
+    ET.register_namespace("", SVG_NS)
+    ET.register_namespace("xlink", XLINK_NS)
+    stack = [root]
+    while stack:
+        elem = stack.pop()
+        name = _local_name(elem)
+        if name == "style":
+            if elem.text:
+                elem.text = minify_css(elem.text)
+            continue
+        if name in _TEXT_TAGS:
+            continue
+        if elem.text and not elem.text.strip():
+            elem.text = None
+        for child in elem:
+            if child.tail and not child.tail.strip():
+                child.tail = None
+            stack.append(child)
+    return root
+
+
+def serialize_svg_tree(root):
+    """
+    Returns:
+        bytes - содержимое SVG файла для дерева с корнем root
+    """
+    buffer = BytesIO()
+    ET.ElementTree(root).write(buffer, encoding="utf-8", xml_declaration=True)
+    return buffer.getvalue()
+
+
+# Формирует записи деталей зоны и пути их SVG по уникальным data-title
+def plan_detail_files(titles, output_dir, claim_number="", vin="", svg_collection=True):
+    """
+    Сопоставляет каждому data-title запись детали и путь файла. Слишком длинные
+    названия разбиваются по запятым на группы, чтобы имя файла не превышало
+    ограничение ОС. Файлы не создаются.
+
+    Returns:
+        list - [(detail_data, output_path, source_title)], source_title - исходный
+        data-title, по которому фильтруется SVG детали
+    """
+    # Определяем максимальную длину имени файла в зависимости от ОС
+    if platform.system() == "Windows":
+        max_filename_length = 180  # Безопасная длина для Windows
+    else:
+        max_filename_length = 255  # Безопасная длина для Linux/Unix систем
+
+    relative_base = f"/static/svgs/{claim_number.replace('/', '_')}_{vin}"
+    planned = []
+
+    def add(title, filename, source_title):
+        output_path = os.path.normpath(os.path.join(output_dir, filename))
+        detail_data = {
+            "title": title,
+            "svg_path": os.path.normpath(f"{relative_base}/{filename}") if svg_collection else ""
+        }
+        planned.append((detail_data, output_path, source_title))
+
+    for detail in titles:
+        # Очищаем и нормализуем имя файла на основе полного data-title
+        if is_blank_name(detail):
+            logger.warning(f"Пропущено пустое или некорректное data-title: {detail!r}")
+            continue
+        safe_name = safe_file_name(detail)
+
+        if len(safe_name) <= max_filename_length:
+            # Обычный случай - имя не слишком длинное
+            add(detail, f"{safe_name}.svg", detail)
+            logger.info(f"📝 Деталь извлечена: '{detail}' ({len(detail)} символов)")
+            continue
+
+        # Длинное имя - разбиваем по запятым на логические группы
+        logger.warning(f"🔪 Имя детали слишком длинное ({len(safe_name)} символов), разбиваем по деталям: {detail}")
+        individual_details = [d.strip() for d in detail.split(',') if d.strip()]
+        logger.info(f"🔍 Найдено {len(individual_details)} отдельных деталей в группе")
+
+        # Группируем детали так, чтобы имя файла не превышало лимит
+        groups = []
+        current_group = []
+        for detail_item in individual_details:
+            if grouped_name_length(current_group + [detail_item]) <= max_filename_length:
+                current_group.append(detail_item)
+            else:
+                if current_group:
+                    groups.append(current_group)
+                current_group = [detail_item]
+        if current_group:
+            groups.append(current_group)
+
+        for part_num, group in enumerate(groups, 1):
+            group_title = ",".join(group)
+            group_filename = f"{safe_file_name(group_title, keep_commas=True)}_group{part_num}.svg"
+            add(group_title, group_filename, detail)
+            logger.info(f"📝 Группа {part_num} извлечена: '{group_title[:100]}{'...' if len(group_title) > 100 else ''}' -> {group_filename}")
+
+        logger.info(f"🎯 Всего создано {len(groups)} групп из {len(individual_details)} деталей")
+
+    return planned
+
+
+def split_svg_tree(root, output_dir, claim_number="", vin="", svg_collection=True, source="SVG"):
+    """
+    Разбивает уже разобранное дерево SVG зоны на детали по уникальным data-title.
+    Если svg_collection=False, извлекает только данные без записи файлов.
+    source - название источника для логов (путь файла или зоны).
+
+    Returns:
+        list - [{"title", "svg_path"}]
+    """
+    # Очищаем строки от лишних пробелов и символов табуляции
+    clean_claim_number = claim_number.strip() if claim_number else ""
+    clean_vin = vin.strip() if vin else ""
+
+    # Ищем все элементы с data-title
+    elements_with_data_title = []
+    total_elements = 0
+
+    for elem in root.iter():
+        total_elements += 1
+        if 'data-title' in elem.attrib:
+            elements_with_data_title.append(elem)
+
+    logger.info(f"📊 Всего элементов в SVG: {total_elements}")
+    logger.info(f"🎯 Элементов с data-title: {len(elements_with_data_title)}")
+
+    if len(elements_with_data_title) == 0:
+        logger.warning(f"⚠️ НЕ НАЙДЕНО элементов с data-title в {source}")
+        logger.info(f"🔍 Проверяем альтернативные атрибуты...")
+
+        # Поиск альтернативных атрибутов для диагностики
+        alt_attributes = ['title', 'id', 'class', 'name']
+        for attr in alt_attributes:
+            elements_with_attr = [elem for elem in root.iter() if attr in elem.attrib]
+            if elements_with_attr:
+                logger.info(f"🔍 Найдено {len(elements_with_attr)} элементов с атрибутом '{attr}'")
+                for i, elem in enumerate(elements_with_attr[:5]):  # Показываем первые 5
+                    logger.debug(f"  - {elem.tag}: {attr}='{elem.attrib[attr]}'")
+
+        # Возвращаем пустой список, но не ошибку
+        logger.warning(f"⚠️ Возвращаем пустой список деталей для {source}")
+        return []
+
+    # Собираем уникальные data-title
+    all_titles = set(elem.attrib['data-title'] for elem in elements_with_data_title)
+    logger.info(f"\n🎯 Найдено {len(all_titles)} уникальных data-title в {source}:")
+    for title in sorted(all_titles):
+        logger.info(f"  📝 '{title}'")
+
+    detail_paths = []
+    # Дерево разобрано один раз, SVG деталей строятся из общего скелета
+    splitter = DetailSplitter(root) if svg_collection else None
+    for detail_data, output_path, source_title in plan_detail_files(
+        all_titles, output_dir, claim_number=clean_claim_number, vin=clean_vin, svg_collection=svg_collection
+    ):
+        detail_paths.append(detail_data)
+        if svg_collection:
+            try:
+                splitter.write_detail(source_title, output_path)  # Для групп фильтруем по исходному data-title
+                logger.info(f"✅ Сохранено: {output_path}")
+            except Exception as save_error:
+                logger.error(f"❌ Ошибка сохранения SVG для детали '{detail_data['title']}': {save_error}")
+                detail_data["svg_path"] = ""
+
+    logger.info(f"🎯 ИТОГО извлечено деталей: {len(detail_paths)}")
+    if detail_paths:
+        logger.info(f"📝 Список извлеченных деталей:")
+        for i, detail in enumerate(detail_paths, 1):
+            svg_status = "с файлом" if detail["svg_path"] else "только данные"
+            logger.info(f"  {i}. '{detail['title']}' ({svg_status})")
+    else:
+        logger.warning(f"⚠️ НЕ НАЙДЕНО деталей в {source}")
+
+    return detail_paths
+
+
+def split_svg_by_details(svg_file, output_dir, subfolder=None, claim_number="", vin="", svg_collection=True):
+    """
+    Разбивает SVG-файл на отдельные SVG для каждой детали, где каждая деталь соответствует уникальному data-title.
+    Если svg_collection=False, извлекает только данные без сохранения файлов.
+    ГАРАНТИРУЕТ извлечение деталей из любого SVG файла зоны.
+    Используется для файлов на диске; только что снятый SVG разбивается через split_svg_tree.
+    """
+    logger.info(f"🔧 НАЧИНАЕМ разбиение SVG файла: {svg_file}")
+    logger.info(f"🎛️ Режим сохранения SVG: {'ВКЛЮЧЕН' if svg_collection else 'ОТКЛЮЧЕН'}")
+    logger.info(f"🔍 Исходные данные: claim_number='{claim_number}', vin='{vin}'")
+
+    try:
+        # Проверяем существование файла
+        if not os.path.exists(svg_file):
+            logger.error(f"❌ Файл не существует: {svg_file}")
+            return []
+
+        # Читаем размер файла для диагностики
+        file_size = os.path.getsize(svg_file)
+        logger.info(f"📊 Размер SVG файла: {file_size} байт")
+
+        if file_size == 0:
+            logger.error(f"❌ Файл пустой: {svg_file}")
+            return []
+
+        # Парсим XML
+        try:
+            root = ET.parse(svg_file).getroot()
+            logger.info(f"✅ SVG успешно распарсен. Корневой элемент: {root.tag}")
+            if SVG_MINIFY and svg_collection:
+                minify_svg_tree(root)
+        except ET.ParseError as parse_error:
+            logger.error(f"❌ Ошибка парсинга XML: {parse_error}")
+            return []
+
+        detail_paths = split_svg_tree(
+            root, output_dir, claim_number=claim_number, vin=vin, svg_collection=svg_collection, source=svg_file
+        )
+        logger.info(f"✅ Функция split_svg_by_details ЗАВЕРШЕНА УСПЕШНО для файла {svg_file}")
+        return detail_paths
+    except Exception as e:
+        logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА в split_svg_by_details для файла {svg_file}: {str(e)}")
+        logger.error(f"❌ Тип ошибки: {type(e).__name__}")
+        import traceback
+        logger.error(f"❌ Полный traceback: {traceback.format_exc()}")
+        return []
+
+
+# Формирует самостоятельный SVG документ из разметки элемента и стилей страницы
+def render_svg_document(svg_content, view_box, width, height, style_content):
+    """
+    Оборачивает разметку SVG/группы в документ со стилями.
+
+    Returns:
+        bytes - содержимое SVG файла
+    """
+    svg_full_content = f"""<?xml version="1.0" encoding="UTF-8"?>
+<svg width="{width}" height="{height}" viewBox="{view_box}" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">
+<style>
+{style_content}
+svg * {{
+    fill: inherit;
+    stroke: inherit;
+    stroke-width: inherit;
+}}
+</style>
+{svg_content}
+</svg>"""
+    return svg_full_content.encode('utf-8')
+
+
+# Разбирает SVG документ; разбор одновременно служит проверкой валидности
+def parse_svg_document(svg_bytes):
+    """
+    Returns:
+        Element|None - корень дерева или None если документ невалиден
+    """
+    try:
+        return ET.fromstring(svg_bytes)
+    except ET.ParseError as e:
+        logger.error(f"Ошибка валидации SVG: {e}")
+        return None
+
+
+def build_svg_document(svg_content, view_box, width, height, style_content):
+    """
+    Формирует SVG документ и проверяет его валидность.
+
+    Returns:
+        bytes|None - содержимое SVG файла или None если документ невалиден
+    """
+    svg_bytes = render_svg_document(svg_content, view_box, width, height, style_content)
+    if parse_svg_document(svg_bytes) is None:
+        return None
+    return svg_bytes
+
+
+# Сохраняет готовый SVG документ и при необходимости разбивает зону на детали
+def store_svg_bytes(svg_bytes, path, claim_number='', vin='', svg_collection=True, root=None):
+    """
+    Сохраняет SVG документ по пути path с учетом флага svg_collection.
+    Для файлов зон дополнительно извлекает детали через split_svg_tree.
+    root - уже разобранное дерево документа (если нет, документ разбирается
+    из svg_bytes); с диска ничего не перечитывается.
+
+    Returns:
+        tuple - (успех, путь, список деталей)
+    """
+    # Определяем нужно ли разбивать на детали (только для зон, не для пиктограмм)
+    should_split_details = 'pictograms' not in path
+    detail_paths = []
+    
+    logger.info(f"🔍 Анализ файла: {path}")
+    logger.info(f"🔍 should_split_details: {should_split_details}")
+    
+    try:
+        if SVG_MINIFY and svg_collection:
+            # Дерево минифицируется один раз: детали зоны наследуют результат
+            if root is None:
+                root = parse_svg_document(svg_bytes)
+                if root is None:
+                    return False, None, []
+            svg_bytes = serialize_svg_tree(minify_svg_tree(root))
+
+        if should_split_details:
+            filename = os.path.basename(path)
+            is_zone = is_zone_file(filename)
+            logger.info(f"🔍 Имя файла: {filename}")
+            logger.info(f"🔍 is_zone_file: {is_zone}")
+
+            if is_zone:
+                logger.info(f"🎯 ЗОНА ОБНАРУЖЕНА: {filename} - ГАРАНТИРУЕМ обработку деталей!")
+                if root is None:
+                    root = parse_svg_document(svg_bytes)
+                    if root is None:
+                        return False, None, []
+
+                if svg_collection:
+                    # Режим полного сохранения: сохраняем основной SVG + разбиваем + сохраняем детали
+                    write_artifact(path, svg_bytes)
+                    logger.info(f"✅ SVG зоны сохранён: {path}")
+
+                    logger.info(f"🔧 Запускаем разбиение зоны {filename} с сохранением деталей")
+                    detail_paths = split_svg_tree(
+                        root, os.path.dirname(path),
+                        claim_number=claim_number, vin=vin, svg_collection=svg_collection, source=path
+                    )
+                    logger.info(f"🎯 Разбиение завершено: получено {len(detail_paths)} деталей")
+                else:
+                    # Режим только данных: НЕ сохраняем основной SVG, но ОБЯЗАТЕЛЬНО извлекаем детали
+                    logger.info(f"🔧 Сбор SVG отключен, извлекаем детали зоны {filename} из памяти (только данные)")
+                    detail_paths = split_svg_tree(
+                        root, os.path.dirname(path),
+                        claim_number=claim_number, vin=vin, svg_collection=svg_collection, source=filename
+                    )
+                    logger.info(f"🎯 Извлечение данных завершено: получено {len(detail_paths)} деталей")
+
+                    if len(detail_paths) == 0:
+                        logger.error(f"❌ КРИТИЧЕСКАЯ ПРОБЛЕМА: Не удалось извлечь детали из зоны {filename}!")
+            else:
+                # Не zone файл - обрабатываем как обычно
+                logger.debug(f"📄 Файл {filename} не является зоной")
+                if svg_collection:
+                    write_artifact(path, svg_bytes)
+                    logger.info(f"✅ SVG сохранён: {path}")
+                else:
+                    logger.info(f"🎛️ Сбор SVG отключен, пропускаем сохранение: {path}")
+                detail_paths = []
+        else:
+            # Пиктограмма - обрабатываем как раньше
+            if svg_collection:
+                write_artifact(path, svg_bytes)
+                logger.info(f"✅ SVG пиктограммы сохранён: {path}")
+            else:
+                logger.info(f"🎛️ Сбор SVG отключен, пропускаем сохранение пиктограммы: {path}")
+            detail_paths = []
+
+        return True, path, detail_paths
+    except Exception as e:
+        logger.error(f"Ошибка при сохранении SVG: {e}")
+        return False, None, []
+
+
+# Фоновая обработка снятого SVG зоны: разбор, сохранение и разбиение на детали
+def process_zone_svg(svg_bytes, path, claim_number='', vin='', svg_collection=True):
+    """
+    Выполняется в процессе пула, пока драйвер обрабатывает следующие зоны.
+
+    Returns:
+        tuple - (успех, список деталей)
+    """
+    success, _, detail_paths = store_svg_bytes(
+        svg_bytes, path, claim_number=claim_number, vin=vin, svg_collection=svg_collection
+    )
+    return success, detail_paths
@@ -0,0 +1,124 @@
+"""
+Уменьшенные копии скриншотов для страниц истории
+
+Страница заявки показывает скриншоты зон в окне просмотра, поэтому полный PNG
+заменяется WebP нужной ширины через srcset. Копии лежат в
+THUMBNAIL_DIR/<ширина>/screenshots/<заявка>/<имя>.webp, создаются в фоне после
+обработки заявки или при первом запросе и пересоздаются, если скриншот новее.
+
+Основные функции:
+    * thumbnail_srcset: Значение srcset для пути скриншота
+    * render_thumbnail: Сохраняет уменьшенную копию изображения в WebP
+    * ensure_thumbnail: Создаёт копию по пути запроса, если её нет или она устарела
+    * submit_thumbnails: Запускает создание копий в пуле фоновой обработки
+"""
+import logging
+import os
+import threading
+
+from PIL import Image
+
+from .artifact_pipeline import submit_artifact_job
+from .constants import SCREENSHOT_DIR, THUMBNAIL_DIR, THUMBNAIL_WIDTHS
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_QUALITY = 80
+_SCREENSHOT_PREFIX = "/static/screenshots/"
+
+
+def _thumbnail_relative(screenshot_path, width):
+    """/static/screenshots/x/zone.png -> thumbnails/<width>/screenshots/x/zone.webp"""
+    relative = screenshot_path[len("/static/"):]
+    return f"thumbnails/{width}/{os.path.splitext(relative)[0]}.webp"
+
+
+def thumbnail_srcset(screenshot_path):
+    """
+    Returns:
+        str - значение srcset с копиями всех ширин или "" если для пути
+        копии не создаются (не PNG скриншот)
+    """
+    if not screenshot_path or not screenshot_path.startswith(_SCREENSHOT_PREFIX) or not screenshot_path.endswith(".png"):
+        return ""
+    return ", ".join(f"/static/{_thumbnail_relative(screenshot_path, width)} {width}w" for width in THUMBNAIL_WIDTHS)
+
+
+def render_thumbnail(source_path, thumbnail_path, width):
+    """
+    Сохраняет копию изображения шириной не больше width в WebP.
+    Выполняется в процессе пула, поэтому зависит только от PIL.
+
+    Returns:
+        str - путь сохранённой копии
+    """
+    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+    tmp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with Image.open(source_path) as image:
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        image.save(tmp_path, format="WEBP", quality=THUMBNAIL_QUALITY, method=4)
+    os.replace(tmp_path, thumbnail_path)
+    return thumbnail_path
+
+
+def _source_for(relative_path):
+    """Путь скриншота и ширина для пути копии относительно static; (None, None) если путь не копии"""
+    parts = relative_path.replace("\\", "/").split("/")
+    if len(parts) < 4 or parts[0] != "thumbnails" or parts[2] != "screenshots" or not parts[1].isdigit():
+        return None, None
+    width = int(parts[1])
+    if width not in THUMBNAIL_WIDTHS or not parts[-1].endswith(".webp") or ".." in parts:
+        return None, None
+    source = os.path.join(SCREENSHOT_DIR, *parts[3:-1], f"{os.path.splitext(parts[-1])[0]}.png")
+    return source, width
+
+
+def ensure_thumbnail(relative_path):
+    """
+    Создаёт копию по пути запроса относительно static (thumbnails/...),
+    если её нет или скриншот новее.
+
+    Returns:
+        bool - копия есть и актуальна
+    """
+    source, width = _source_for(relative_path)
+    if source is None or not os.path.isfile(source):
+        return False
+    thumbnail = os.path.join(THUMBNAIL_DIR, *relative_path.replace("\\", "/").split("/")[1:])
+    try:
+        if os.path.getmtime(thumbnail) >= os.path.getmtime(source):
+            return True
+    except OSError:
+        pass
+    try:
+        render_thumbnail(source, thumbnail, width)
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Не удалось создать копию скриншота {source} ({width}px): {e}")
+        return False
+
+
+def submit_thumbnails(screenshot_paths):
+    """
+    Запускает создание копий всех ширин для скриншотов заявки в пуле фоновой
+    обработки; результат не ожидается.
+
+    Returns:
+        int - число запущенных задач
+    """
+    submitted = 0
+    for screenshot_path in dict.fromkeys(screenshot_paths):
+        if not thumbnail_srcset(screenshot_path):
+            continue
+        source = os.path.join(SCREENSHOT_DIR, *screenshot_path[len(_SCREENSHOT_PREFIX):].split("/"))
+        if not os.path.isfile(source):
+            continue
+        for width in THUMBNAIL_WIDTHS:
+            relative = _thumbnail_relative(screenshot_path, width)
+            thumbnail = os.path.join(THUMBNAIL_DIR, *relative.split("/")[1:])
+            submit_artifact_job(render_thumbnail, source, thumbnail, width)
+            submitted += 1
+    if submitted:
+        logger.info(f"🖼️ Запущено создание уменьшенных копий скриншотов: {submitted}")
+    return submitted
@@ -3,56 +3,27 @@ import os
 import logging
 import time
 import re
-import tempfile
-import xml.etree.ElementTree as ET
-from lxml import etree
-from transliterate import translit
-from PIL import Image
-from io import BytesIO
+import weakref
+import base64
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from .constants import TIMEOUT
+from .naming import safe_file_name
+from .artifact_pipeline import submit_png_encoding
+from .svg_processing import (
+    is_zone_file, plan_detail_files, split_svg_by_details,
+    render_svg_document, parse_svg_document, build_svg_document, store_svg_bytes
+)
+from .wait_engine import (
+    wait_for_dom_quiet, wait_for_svg_ready, wait_for_animation_frames, get_dom_idle_ms
+)
 from selenium.webdriver.common.action_chains import ActionChains
 
 logger = logging.getLogger(__name__)
 
 
-# Функция для проверки имени файла по шаблону zone_*
-def is_zone_file(filename: str) -> bool:
-    """
-    Проверяет, является ли файл файлом зоны.
-    
-    Файлы зон всегда начинаются с 'zone_' и не содержат 'pictogram' в названии.
-    
-    Args:
-        filename: str - имя файла для проверки
-    
-    Returns:
-        bool - True если файл является файлом зоны
-    """
-    filename_lower = filename.lower()
-    is_zone = (filename_lower.startswith('zone_') and 
-               'pictogram' not in filename_lower and 
-               filename_lower.endswith('.svg'))
-    logger.debug(f"🔍 is_zone_file('{filename}'): {is_zone}")
-    return is_zone
-
-
-# Вспомогательные функции для разбиения SVG на детали
-def has_detail(elem, detail):
-    return elem.attrib.get('data-title', '') == detail
-
-
-def prune_for_detail(root_element, detail):
-    for elem in list(root_element):
-        tag = elem.tag.split('}')[-1]
-        if tag == 'g' and not has_detail(elem, detail):
-            root_element.remove(elem)
-        else:
-            prune_for_detail(elem, detail)
-
 # Функции ожидания для стабильной работы с DOM
 def wait_for_document_ready(d):
     return d.execute_script("return document.readyState === 'complete'")
@@ -99,18 +70,37 @@ def wait_for_all_svgs_ready(d):
     required_count = max(1, int(len(svg_containers) * 0.8))
     return ready_count >= required_count
 
-def wait_for_dom_stability(d):
-    initial_count = len(d.find_elements(By.CSS_SELECTOR, 
-        "main div.pictograms-grid.visible section.pictogram-section div.navigation-pictogram-svg-container svg"))
-    if initial_count == 0:
-        return False
-    
-    # Ждем 800ms и сравниваем количество
-    time.sleep(0.8)
-    final_count = len(d.find_elements(By.CSS_SELECTOR, 
-        "main div.pictograms-grid.visible section.pictogram-section div.navigation-pictogram-svg-container svg"))
-    
-    return initial_count == final_count and initial_count > 0
+# Окно тишины DOM, после которого сетка пиктограмм считается стабильной
+DOM_STABILITY_MS = 300
+# Прежнее окно сравнения числа SVG: на странице с непрерывными мутациями (спиннеры,
+# анимации, опрос) окно тишины не наступает, и сетка принимается по неизменному числу SVG
+DOM_STABILITY_FALLBACK_SECONDS = 0.8
+
+class DomStability:
+    """
+    Условие WebDriverWait для стабильности сетки пиктограмм. Экземпляр
+    создаётся на одно ожидание: сетка стабильна, если DOM не менялся в течение
+    окна тишины или число SVG не менялось DOM_STABILITY_FALLBACK_SECONDS
+    (прежняя проверка с паузой 800ms).
+    """
+
+    def __init__(self):
+        self._count = 0
+        self._count_since = None
+
+    def __call__(self, d):
+        count = len(d.find_elements(By.CSS_SELECTOR, 
+            "main div.pictograms-grid.visible section.pictogram-section div.navigation-pictogram-svg-container svg"))
+        if count == 0:
+            self._count_since = None
+            return False
+        
+        now = time.monotonic()
+        if count != self._count or self._count_since is None:
+            self._count, self._count_since = count, now
+        if get_dom_idle_ms(d) >= DOM_STABILITY_MS:
+            return True
+        return now - self._count_since >= DOM_STABILITY_FALLBACK_SECONDS
 
 def ensure_document_ready(d):
     return d.execute_script("return document.readyState === 'complete'")
@@ -150,329 +140,191 @@ def wait_for_works_in_section(holder):
                 ready_works += 1
     return len(work_divs) > 0 and ready_works >= max(1, int(len(work_divs) * 0.8))
 
-# Функция для разбиения SVG на детали
-def split_svg_by_details(svg_file, output_dir, subfolder=None, claim_number="", vin="", svg_collection=True):
-    """
-    Разбивает SVG-файл на отдельные SVG для каждой детали, где каждая деталь соответствует уникальному data-title.
-    Если svg_collection=False, извлекает только данные без сохранения файлов.
-    ГАРАНТИРУЕТ извлечение деталей из любого SVG файла зоны.
-    """
-    # Очищаем строки от лишних пробелов и символов табуляции
-    clean_claim_number = claim_number.strip() if claim_number else ""
-    clean_vin = vin.strip() if vin else ""
-    
-    logger.info(f"🔧 НАЧИНАЕМ разбиение SVG файла: {svg_file}")
-    logger.info(f"🎛️ Режим сохранения SVG: {'ВКЛЮЧЕН' if svg_collection else 'ОТКЛЮЧЕН'}")
-    logger.info(f"🔍 Исходные данные: claim_number='{claim_number}', vin='{vin}'")
-    logger.info(f"🔍 Очищенные данные: clean_claim_number='{clean_claim_number}', clean_vin='{clean_vin}'")
-    
-    try:
-        # Проверяем существование файла
-        if not os.path.exists(svg_file):
-            logger.error(f"❌ Файл не существует: {svg_file}")
-            return []
-        
-        # Читаем размер файла для диагностики
-        file_size = os.path.getsize(svg_file)
-        logger.info(f"📊 Размер SVG файла: {file_size} байт")
-        
-        if file_size == 0:
-            logger.error(f"❌ Файл пустой: {svg_file}")
-            return []
-        
-        # Пытаемся прочитать содержимое файла
-        try:
-            with open(svg_file, 'r', encoding='utf-8') as f:
-                content_preview = f.read(500)  # Первые 500 символов для диагностики
-                logger.debug(f"📄 Превью содержимого файла: {content_preview[:200]}...")
-        except Exception as read_error:
-            logger.error(f"❌ Ошибка чтения файла: {read_error}")
-            return []
-        
-        # Парсим XML
-        try:
-            tree = ET.parse(svg_file)
-            root = tree.getroot()
-            logger.info(f"✅ SVG успешно распарсен. Корневой элемент: {root.tag}")
-        except ET.ParseError as parse_error:
-            logger.error(f"❌ Ошибка парсинга XML: {parse_error}")
-            return []
-        
-        # Ищем все элементы с data-title
-        elements_with_data_title = []
-        total_elements = 0
-        
-        for elem in root.iter():
-            total_elements += 1
-            if 'data-title' in elem.attrib:
-                elements_with_data_title.append(elem)
-        
-        logger.info(f"📊 Всего элементов в SVG: {total_elements}")
-        logger.info(f"🎯 Элементов с data-title: {len(elements_with_data_title)}")
-        
-        if len(elements_with_data_title) == 0:
-            logger.warning(f"⚠️ НЕ НАЙДЕНО элементов с data-title в файле {svg_file}")
-            logger.info(f"🔍 Проверяем альтернативные атрибуты...")
-            
-            # Поиск альтернативных атрибутов для диагностики
-            alt_attributes = ['title', 'id', 'class', 'name']
-            for attr in alt_attributes:
-                elements_with_attr = [elem for elem in root.iter() if attr in elem.attrib]
-                if elements_with_attr:
-                    logger.info(f"🔍 Найдено {len(elements_with_attr)} элементов с атрибутом '{attr}'")
-                    for i, elem in enumerate(elements_with_attr[:5]):  # Показываем первые 5
-                        logger.debug(f"  - {elem.tag}: {attr}='{elem.attrib[attr]}'")
-            
-            # Возвращаем пустой список, но не ошибку
-            logger.warning(f"⚠️ Возвращаем пустой список деталей для {svg_file}")
-            return []
-        
-        # Собираем уникальные data-title
-        all_titles = set(elem.attrib['data-title'] for elem in elements_with_data_title)
-        logger.info(f"\n🎯 Найдено {len(all_titles)} уникальных data-title в файле {svg_file}:")
-        detail_paths = []
-        for title in sorted(all_titles):
-            logger.info(f"  📝 '{title}'")
-
-        for detail in all_titles:
-            # Очищаем и нормализуем имя файла на основе полного data-title
-            safe_detail = re.sub(r'[^\w\s-]', '', detail).strip()  # Удаляем недопустимые символы
-            if not safe_detail:
-                logger.warning(f"Пропущено пустое или некорректное data-title: {detail!r}")
-                continue
-            safe_name = translit(safe_detail, 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower()
-            safe_name = re.sub(r'\.+', '', safe_name)  # Удаляем точки
-
-            # Проверяем, содержит ли деталь несколько элементов (разделенных запятыми)
-            # Определяем максимальную длину имени файла в зависимости от ОС
-            import platform
-            if platform.system() == "Windows":
-                max_filename_length = 180  # Безопасная длина для Windows
-            else:
-                max_filename_length = 255  # Безопасная длина для Linux/Unix систем
-            
-            if len(safe_name) <= max_filename_length:
-                # Обычный случай - имя не слишком длинное
-                output_path = os.path.normpath(os.path.join(output_dir, f"{safe_name}.svg"))
-                relative_base = f"/static/svgs/{clean_claim_number.replace('/', '_')}_{clean_vin}"
-                output_path_relative = os.path.normpath(f"{relative_base}/{safe_name}.svg")
-
-                detail_data = {
-                    "title": detail,
-                    "svg_path": output_path_relative if svg_collection else ""
+# JS-функция переноса вычисленных стилей в атрибуты (сохраняет цвета вне страницы)
+_SET_INLINE_STYLES_FN = """
+    function setInlineStyles(el) {
+        try {
+        let computed = window.getComputedStyle(el);
+        if (computed.fill && computed.fill !== 'none') {
+            el.setAttribute('fill', computed.fill);
+        }
+        if (computed.stroke && computed.stroke !== 'none') {
+            el.setAttribute('stroke', computed.stroke);
+        }
+        if (computed.strokeWidth && computed.strokeWidth !== '0px') {
+            el.setAttribute('stroke-width', computed.strokeWidth);
+        }
+        for (let child of el.children) {
+            setInlineStyles(child);
+            }
+        } catch (e) {
+            console.warn('Не удалось применить стили к элементу:', e);
+        }
+    }
+"""
+
+# JS-функция сбора правил таблиц стилей, относящихся к SVG
+_COLLECT_SVG_STYLES_FN = """
+    function collectSvgStyles() {
+        let styles = '';
+        try {
+        const styleSheets = document.styleSheets;
+        for (let sheet of styleSheets) {
+            try {
+                for (let rule of sheet.cssRules) {
+                    if (rule.selectorText && (
+                        rule.selectorText.includes('svg') || 
+                        rule.selectorText.includes('path') || 
+                        rule.selectorText.includes('rect') || 
+                        rule.selectorText.includes('circle') || 
+                        rule.selectorText.includes('g') ||
+                        rule.selectorText.includes('[fill]') ||
+                        rule.selectorText.includes('[stroke]')
+                    )) {
+                        styles += rule.cssText + '\\n';
+                    }
                 }
-                detail_paths.append(detail_data)
-                logger.info(f"📝 Деталь извлечена: '{detail}' ({len(detail)} символов)")
+            } catch (e) {
+                    console.warn('Не удалось получить доступ к стилям листа:', e);
+            }
+            }
+        } catch (e) {
+            console.warn('Не удалось получить доступ к стилям документа:', e);
+        }
+        return styles;
+    }
+"""
+
+# JS-функция кеша CSS для SVG: правила собираются один раз на документ и хранятся
+# в window вместе с токеном; если Python уже знает токен, CSS повторно не передаётся
+_CACHED_SVG_STYLES_FN = """
+    function cachedSvgStyles(knownToken) {
+        const cache = window.__audatexSvgStyles;
+        if (cache && cache.token === knownToken) {
+            return {token: knownToken, styles: null};
+        }
+        if (!cache) {
+            window.__audatexSvgStyles = {
+                token: Date.now().toString(36) + Math.random().toString(36).slice(2),
+                styles: collectSvgStyles()
+            };
+        }
+        return window.__audatexSvgStyles;
+    }
+"""
+
+# Единый скрипт save_svg_sync: проверка элемента, перенос стилей, разметка,
+# родительский SVG и границы группы, атрибуты SVG и CSS страницы за один вызов
+_SVG_CAPTURE_JS = _SET_INLINE_STYLES_FN + _COLLECT_SVG_STYLES_FN + _CACHED_SVG_STYLES_FN + """
+    const element = arguments[0];
+    const knownToken = arguments[1];
+    const tag = element.tagName.toLowerCase();
+    if (tag !== 'svg' && tag !== 'g') {
+        return {status: 'bad_tag', tag: tag};
+    }
+    if (tag === 'g' && element.children.length === 0) {
+        return {status: 'empty_group', tag: tag, title: element.getAttribute('data-title')};
+    }
+
+    setInlineStyles(element);
+    const result = {status: 'ok', tag: tag, html: element.outerHTML};
+
+    if (tag === 'g') {
+        let parent = element;
+        while (parent && parent.tagName.toLowerCase() !== 'svg') {
+            parent = parent.parentElement;
+            // Защита от бесконечного цикла
+            if (!parent || parent === document.documentElement) {
+                return {status: 'no_parent', tag: tag};
+            }
+        }
 
-                if svg_collection:
-                    try:
-                        tree = ET.parse(svg_file)
-                        root = tree.getroot()
-                        prune_for_detail(root, detail)
-                        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                        tree.write(output_path, encoding="utf-8", xml_declaration=True)
-                        logger.info(f"✅ Сохранено: {output_path}")
-                    except Exception as save_error:
-                        logger.error(f"❌ Ошибка сохранения SVG для детали '{detail}': {save_error}")
-                        detail_data["svg_path"] = ""
-            else:
-                # Длинное имя - разбиваем по запятым на логические группы
-                logger.warning(f"🔪 Имя детали слишком длинное ({len(safe_name)} символов), разбиваем по деталям: {detail}")
-                
-                # Разделяем по запятым
-                individual_details = [d.strip() for d in detail.split(',') if d.strip()]
-                logger.info(f"🔍 Найдено {len(individual_details)} отдельных деталей в группе")
-                
-                # Группируем детали так, чтобы имя файла не превышало лимит
-                current_group = []
-                current_group_text = ""
-                part_num = 1
-                
-                for detail_item in individual_details:
-                    # Проверяем, поместится ли эта деталь в текущую группу
-                    test_group_text = ",".join(current_group + [detail_item])
-                    test_safe_name = translit(re.sub(r'[^\w\s,-]', '', test_group_text).strip(), 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower()
-                    test_safe_name = re.sub(r'\.+', '', test_safe_name)
-                    
-                    if len(test_safe_name) <= max_filename_length:
-                        # Помещается - добавляем в текущую группу
-                        current_group.append(detail_item)
-                        current_group_text = test_group_text
-                    else:
-                        # Не помещается - сохраняем текущую группу и начинаем новую
-                        if current_group:
-                            group_title = ",".join(current_group)
-                            group_safe_name = translit(re.sub(r'[^\w\s,-]', '', group_title).strip(), 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower()
-                            group_safe_name = re.sub(r'\.+', '', group_safe_name)
-                            
-                            group_filename = f"{group_safe_name}_group{part_num}.svg"
-                            group_output_path = os.path.normpath(os.path.join(output_dir, group_filename))
-                            relative_base = f"/static/svgs/{clean_claim_number.replace('/', '_')}_{clean_vin}"
-                            group_output_path_relative = os.path.normpath(f"{relative_base}/{group_filename}")
-                            
-                            detail_data = {
-                                "title": group_title,
-                                "svg_path": group_output_path_relative if svg_collection else ""
-                            }
-                            detail_paths.append(detail_data)
-                            logger.info(f"📝 Группа {part_num} извлечена: '{group_title[:100]}{'...' if len(group_title) > 100 else ''}' -> {group_filename}")
-
-                            if svg_collection:
-                                try:
-                                    tree = ET.parse(svg_file)
-                                    root = tree.getroot()
-                                    prune_for_detail(root, detail)  # Используем оригинальное название для фильтрации
-                                    os.makedirs(os.path.dirname(group_output_path), exist_ok=True)
-                                    tree.write(group_output_path, encoding="utf-8", xml_declaration=True)
-                                    logger.info(f"✅ Группа {part_num} сохранена: {group_output_path}")
-                                except Exception as save_error:
-                                    logger.error(f"❌ Ошибка сохранения SVG для группы {part_num}: {save_error}")
-                                    detail_data["svg_path"] = ""
-                            
-                            part_num += 1
-                        
-                        # Начинаем новую группу с текущей деталью
-                        current_group = [detail_item]
-                        current_group_text = detail_item
-                
-                # Сохраняем последнюю группу
-                if current_group:
-                    group_title = ",".join(current_group)
-                    group_safe_name = translit(re.sub(r'[^\w\s,-]', '', group_title).strip(), 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower()
-                    group_safe_name = re.sub(r'\.+', '', group_safe_name)
-                    
-                    group_filename = f"{group_safe_name}_group{part_num}.svg"
-                    group_output_path = os.path.normpath(os.path.join(output_dir, group_filename))
-                    relative_base = f"/static/svgs/{clean_claim_number.replace('/', '_')}_{clean_vin}"
-                    group_output_path_relative = os.path.normpath(f"{relative_base}/{group_filename}")
-                    
-                    detail_data = {
-                        "title": group_title,
-                        "svg_path": group_output_path_relative if svg_collection else ""
+        let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+        function computeBounds(el) {
+            try {
+                if (el.tagName === 'path' || el.tagName === 'rect' || el.tagName === 'circle') {
+                    let bbox = el.getBBox();
+                    if (bbox.width > 0 && bbox.height > 0) {
+                        minX = Math.min(minX, bbox.x);
+                        minY = Math.min(minY, bbox.y);
+                        maxX = Math.max(maxX, bbox.x + bbox.width);
+                        maxY = Math.max(maxY, bbox.y + bbox.height);
                     }
-                    detail_paths.append(detail_data)
-                    logger.info(f"📝 Финальная группа {part_num} извлечена: '{group_title[:100]}{'...' if len(group_title) > 100 else ''}' -> {group_filename}")
+                }
+                for (let child of el.children) {
+                    computeBounds(child);
+                }
+            } catch (e) {
+                console.warn('Ошибка при вычислении границ элемента:', e);
+            }
+        }
+        computeBounds(element);
+        result.bounds = [minX, minY, maxX - minX, maxY - minY];
+    } else {
+        result.viewBox = element.getAttribute('viewBox');
+        result.width = element.getAttribute('width');
+        result.height = element.getAttribute('height');
+    }
 
-                    if svg_collection:
-                        try:
-                            tree = ET.parse(svg_file)
-                            root = tree.getroot()
-                            prune_for_detail(root, detail)  # Используем оригинальное название для фильтрации
-                            os.makedirs(os.path.dirname(group_output_path), exist_ok=True)
-                            tree.write(group_output_path, encoding="utf-8", xml_declaration=True)
-                            logger.info(f"✅ Финальная группа {part_num} сохранена: {group_output_path}")
-                        except Exception as save_error:
-                            logger.error(f"❌ Ошибка сохранения SVG для финальной группы {part_num}: {save_error}")
-                            detail_data["svg_path"] = ""
-                
-                logger.info(f"🎯 Всего создано {part_num} групп из {len(individual_details)} деталей")
-
-        logger.info(f"✅ Функция split_svg_by_details ЗАВЕРШЕНА УСПЕШНО для файла {svg_file}")
-        logger.info(f"🎯 ИТОГО извлечено деталей: {len(detail_paths)}")
-        if detail_paths:
-            logger.info(f"📝 Список извлеченных деталей:")
-            for i, detail in enumerate(detail_paths, 1):
-                svg_status = "с файлом" if detail["svg_path"] else "только данные"
-                logger.info(f"  {i}. '{detail['title']}' ({svg_status})")
-        else:
-            logger.warning(f"⚠️ НЕ НАЙДЕНО деталей в файле {svg_file}")
+    result.css = cachedSvgStyles(knownToken);
+    return result;
+"""
 
-        return detail_paths
-    except Exception as e:
-        logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА в split_svg_by_details для файла {svg_file}: {str(e)}")
-        logger.error(f"❌ Тип ошибки: {type(e).__name__}")
-        import traceback
-        logger.error(f"❌ Полный traceback: {traceback.format_exc()}")
-        return []
+# Кеш CSS для SVG на стороне Python: драйвер -> (токен документа, CSS)
+_svg_styles_cache = weakref.WeakKeyDictionary()
 
-# Сохраняет SVG с сохранением цветов
-def save_svg_sync(driver, element, path, claim_number='', vin='', svg_collection=True):
-    try:
-        if element.tag_name not in ['svg', 'g']:
-            logger.warning(f"Элемент {element.tag_name} не является SVG или группой")
-            return False, None, []
 
-        # Оптимизированная проверка наличия дочерних элементов
-        has_children = driver.execute_script("""
-            return arguments[0].children.length > 0;
-        """, element)
-        if not has_children and element.tag_name == 'g':
-            logger.warning(
-                f"Группа {element.get_attribute('data-title') or 'без названия'} не содержит дочерних элементов")
-            return False, None, []
+def get_svg_styles_token(driver):
+    """Токен CSS, уже полученного для текущего драйвера (или None)"""
+    cached = _svg_styles_cache.get(driver)
+    return cached[0] if cached else None
 
-        # Извлекаем и применяем стили для сохранения цветов
-        driver.execute_script("""
-            let element = arguments[0];
-            function setInlineStyles(el) {
-                try {
-                let computed = window.getComputedStyle(el);
-                if (computed.fill && computed.fill !== 'none') {
-                    el.setAttribute('fill', computed.fill);
-                }
-                if (computed.stroke && computed.stroke !== 'none') {
-                    el.setAttribute('stroke', computed.stroke);
-                }
-                if (computed.strokeWidth && computed.strokeWidth !== '0px') {
-                    el.setAttribute('stroke-width', computed.strokeWidth);
-                }
-                for (let child of el.children) {
-                    setInlineStyles(child);
-                    }
-                } catch (e) {
-                    console.warn('Не удалось применить стили к элементу:', e);
-                }
-            }
-            setInlineStyles(element);
-        """, element)
-
-        svg_content = element.get_attribute('outerHTML')
-
-        if element.tag_name == 'g':
-            # Оптимизированный поиск родительского SVG
-            parent_svg = driver.execute_script("""
-                let el = arguments[0];
-                while (el && el.tagName.toLowerCase() !== 'svg') {
-                    el = el.parentElement;
-                    // Защита от бесконечного цикла
-                    if (!el || el === document.documentElement) {
-                        return null;
-                    }
-                }
-                return el;
-            """, element)
-
-            if not parent_svg:
-                logger.warning("Не удалось найти родительский SVG для группы")
-                return False, None, []
-
-            # Вычисление границ с защитой от ошибок
-            bounds = driver.execute_script("""
-                let element = arguments[0];
-                let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
-                function computeBounds(el) {
-                    try {
-                    if (el.tagName === 'path' || el.tagName === 'rect' || el.tagName === 'circle') {
-                        let bbox = el.getBBox();
-                        if (bbox.width > 0 && bbox.height > 0) {
-                            minX = Math.min(minX, bbox.x);
-                            minY = Math.min(minY, bbox.y);
-                            maxX = Math.max(maxX, bbox.x + bbox.width);
-                            maxY = Math.max(maxY, bbox.y + bbox.height);
-                        }
-                    }
-                    for (let child of el.children) {
-                        computeBounds(child);
-                        }
-                    } catch (e) {
-                        console.warn('Ошибка при вычислении границ элемента:', e);
-                    }
-                }
-                computeBounds(element);
-                return [minX, minY, maxX - minX, maxY - minY];
-            """, element)
 
-            if bounds[2] <= 0 or bounds[3] <= 0 or not all(isinstance(x, (int, float)) for x in bounds):
+def resolve_svg_styles(driver, css_payload):
+    """
+    Возвращает CSS страницы по ответу cachedSvgStyles: новый CSS запоминается,
+    при совпадении токена берётся из кеша без повторной передачи.
+    """
+    if not css_payload:
+        return ''
+    token = css_payload.get('token')
+    styles = css_payload.get('styles')
+    if styles is None:
+        cached = _svg_styles_cache.get(driver)
+        if cached and cached[0] == token:
+            return cached[1]
+        # Кеш потерян - собираем CSS заново
+        styles = driver.execute_script(_COLLECT_SVG_STYLES_FN + "return collectSvgStyles();") or ''
+    _svg_styles_cache[driver] = (token, styles)
+    return styles
+
+
+# Снимает SVG элемента с сохранением цветов и формирует документ (без разбора и записи)
+def capture_svg_document(driver, element):
+    """
+    Returns:
+        bytes|None - содержимое SVG документа или None если элемент не подходит
+    """
+    try:
+        # Разметка, границы, атрибуты и CSS страницы - одним вызовом
+        capture = driver.execute_script(_SVG_CAPTURE_JS, element, get_svg_styles_token(driver))
+        status = capture.get('status')
+
+        if status == 'bad_tag':
+            logger.warning(f"Элемент {capture.get('tag')} не является SVG или группой")
+            return None
+        if status == 'empty_group':
+            logger.warning(f"Группа {capture.get('title') or 'без названия'} не содержит дочерних элементов")
+            return None
+        if status == 'no_parent':
+            logger.warning("Не удалось найти родительский SVG для группы")
+            return None
+
+        svg_content = capture.get('html') or ''
+
+        if capture.get('tag') == 'g':
+            bounds = capture.get('bounds') or []
+            if len(bounds) != 4 or not all(isinstance(x, (int, float)) for x in bounds) or bounds[2] <= 0 or bounds[3] <= 0:
                 logger.warning("Невалидные границы для viewBox, используется запасное значение")
                 view_box = '0 0 1000 1000'
             else:
@@ -482,150 +334,75 @@ def save_svg_sync(driver, element, path, claim_number='', vin='', svg_collection
             width = '100%'
             height = '100%'
         else:
-            view_box = element.get_attribute('viewBox') or '0 0 1000 1000'
-            width = element.get_attribute('width') or '100%'
-            height = element.get_attribute('height') or '100%'
+            view_box = capture.get('viewBox') or '0 0 1000 1000'
+            width = capture.get('width') or '100%'
+            height = capture.get('height') or '100%'
 
-        # Оптимизированное извлечение стилей
-        style_content = driver.execute_script("""
-            let styles = '';
-            try {
-            const styleSheets = document.styleSheets;
-            for (let sheet of styleSheets) {
-                try {
-                    for (let rule of sheet.cssRules) {
-                        if (rule.selectorText && (
-                            rule.selectorText.includes('svg') || 
-                            rule.selectorText.includes('path') || 
-                            rule.selectorText.includes('rect') || 
-                            rule.selectorText.includes('circle') || 
-                            rule.selectorText.includes('g') ||
-                            rule.selectorText.includes('[fill]') ||
-                            rule.selectorText.includes('[stroke]')
-                        )) {
-                            styles += rule.cssText + '\\n';
-                        }
-                    }
-                } catch (e) {
-                        console.warn('Не удалось получить доступ к стилям листа:', e);
-                }
-                }
-            } catch (e) {
-                console.warn('Не удалось получить доступ к стилям документа:', e);
-            }
-            return styles;
-        """)
-
-        svg_full_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<svg width="{width}" height="{height}" viewBox="{view_box}" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">
-<style>
-{style_content}
-svg * {{
-    fill: inherit;
-    stroke: inherit;
-    stroke-width: inherit;
-}}
-</style>
-{svg_content}
-</svg>"""
-
-        svg_bytes = svg_full_content.encode('utf-8')
-        parser = etree.XMLParser(encoding='utf-8')
-        try:
-            etree.fromstring(svg_bytes, parser)
-        except Exception as e:
-            logger.error(f"Ошибка валидации SVG: {e}")
-            return False, None, []
+        style_content = resolve_svg_styles(driver, capture.get('css'))
 
-        # Определяем нужно ли разбивать на детали (только для зон, не для пиктограмм)
-        should_split_details = 'pictograms' not in path
-        detail_paths = []
-        
-        logger.info(f"🔍 Анализ файла: {path}")
-        logger.info(f"🔍 should_split_details: {should_split_details}")
-        
-        try:
-            if should_split_details:
-                filename = os.path.basename(path)
-                is_zone = is_zone_file(filename)
-                logger.info(f"🔍 Имя файла: {filename}")
-                logger.info(f"🔍 is_zone_file: {is_zone}")
+        return render_svg_document(svg_content, view_box, width, height, style_content)
+    except Exception as e:
+        logger.error(f"Ошибка при обработке SVG: {e}")
+        return None
 
-                if is_zone:
-                    logger.info(f"🎯 ЗОНА ОБНАРУЖЕНА: {filename} - ГАРАНТИРУЕМ обработку деталей!")
 
-                    if svg_collection:
-                        # Режим полного сохранения: сохраняем основной SVG + разбиваем + сохраняем детали
-                        os.makedirs(os.path.dirname(path), exist_ok=True)
-                        with open(path, 'wb') as f:
-                            f.write(svg_bytes)
-                        logger.info(f"✅ SVG зоны сохранён: {path}")
-
-                        logger.info(f"🔧 Запускаем разбиение зоны {filename} с сохранением деталей")
-                        detail_paths = split_svg_by_details(
-                            path, os.path.dirname(path),
-                            claim_number=claim_number, vin=vin, svg_collection=svg_collection
-                        )
-                        logger.info(f"🎯 Разбиение завершено: получено {len(detail_paths)} деталей")
-                    else:
-                        # Режим только данных: НЕ сохраняем основной SVG, но ОБЯЗАТЕЛЬНО извлекаем детали
-                        logger.info(f"🎛️ Сбор SVG отключен, но ГАРАНТИРУЕМ извлечение данных о деталях зоны: {path}")
-
-                        # Создаем временный файл для извлечения данных о деталях
-                        with tempfile.NamedTemporaryFile(mode='wb', suffix='.svg', delete=False) as temp_file:
-                            temp_file.write(svg_bytes)
-                            temp_path = temp_file.name
-
-                        try:
-                            logger.info(f"🔧 Запускаем разбиение зоны {filename} БЕЗ сохранения файлов (только данные)")
-                            detail_paths = split_svg_by_details(
-                                temp_path, os.path.dirname(path),
-                                claim_number=claim_number, vin=vin, svg_collection=svg_collection
-                            )
-                            logger.info(f"🎯 Извлечение данных завершено: получено {len(detail_paths)} деталей")
-
-                            if len(detail_paths) == 0:
-                                logger.error(f"❌ КРИТИЧЕСКАЯ ПРОБЛЕМА: Не удалось извлечь детали из зоны {filename}!")
-                                logger.error(f"❌ Проверьте содержимое временного файла: {temp_path}")
-                                # НЕ удаляем временный файл для отладки
-                                logger.error(f"❌ Временный файл сохранён для анализа: {temp_path}")
-                            else:
-                                # Удаляем временный файл только при успехе
-                                os.unlink(temp_path)
-                        except Exception as detail_error:
-                            logger.error(f"❌ Ошибка при извлечении деталей из зоны {filename}: {detail_error}")
-                            # Сохраняем временный файл для отладки
-                            logger.error(f"❌ Временный файл сохранён для анализа: {temp_path}")
-                else:
-                    # Не zone файл - обрабатываем как обычно
-                    logger.debug(f"📄 Файл {filename} не является зоной")
-                    if svg_collection:
-                        os.makedirs(os.path.dirname(path), exist_ok=True)
-                        with open(path, 'wb') as f:
-                            f.write(svg_bytes)
-                        logger.info(f"✅ SVG сохранён: {path}")
-                    else:
-                        logger.info(f"🎛️ Сбор SVG отключен, пропускаем сохранение: {path}")
-                    detail_paths = []
-            else:
-                # Пиктограмма - обрабатываем как раньше
-                if svg_collection:
-                    os.makedirs(os.path.dirname(path), exist_ok=True)
-                    with open(path, 'wb') as f:
-                        f.write(svg_bytes)
-                    logger.info(f"✅ SVG пиктограммы сохранён: {path}")
-                else:
-                    logger.info(f"🎛️ Сбор SVG отключен, пропускаем сохранение пиктограммы: {path}")
-                detail_paths = []
+# Сохраняет SVG с сохранением цветов
+def save_svg_sync(driver, element, path, claim_number='', vin='', svg_collection=True):
+    try:
+        svg_bytes = capture_svg_document(driver, element)
+        if svg_bytes is None:
+            return False, None, []
 
-            return True, path, detail_paths
-        except Exception as e:
-            logger.error(f"Ошибка при сохранении SVG: {e}")
+        # Документ разбирается один раз: проверка валидности и разбиение на детали
+        root = parse_svg_document(svg_bytes)
+        if root is None:
             return False, None, []
+
+        return store_svg_bytes(
+            svg_bytes, path, claim_number=claim_number, vin=vin, svg_collection=svg_collection, root=root
+        )
     except Exception as e:
         logger.error(f"Ошибка при обработке SVG: {e}")
         return False, None, []
 
+# Уникальные data-title элемента и его потомков в порядке документа
+_DETAIL_TITLES_JS = """
+    const root = arguments[0];
+    const titles = [];
+    const seen = new Set();
+    const elements = [root, ...root.querySelectorAll('[data-title]')];
+    for (const el of elements) {
+        const title = el.getAttribute('data-title');
+        if (title !== null && !seen.has(title)) {
+            seen.add(title);
+            titles.push(title);
+        }
+    }
+    return titles;
+"""
+
+
+# Извлекает детали зоны прямо из DOM страницы (профиль только данных)
+def extract_details_from_dom(driver, element, claim_number='', vin=''):
+    """
+    Читает data-title деталей из отрисованного SVG одним запросом, без переноса
+    стилей, сборки документа и временных файлов. Названия деталей и разбиение
+    длинных названий на группы совпадают с split_svg_by_details.
+
+    Returns:
+        list - [{"title", "svg_path": ""}]
+    """
+    titles = driver.execute_script(_DETAIL_TITLES_JS, element) or []
+    # Переводы строк и табуляции в атрибуте XML-парсер приводит к пробелам
+    titles = list(dict.fromkeys(re.sub(r'[\t\n\r]', ' ', title) for title in titles))
+    logger.info(f"🎯 Найдено {len(titles)} уникальных data-title в DOM")
+    return [
+        detail_data for detail_data, _, _ in plan_detail_files(
+            titles, '', claim_number=claim_number.strip(), vin=vin.strip(), svg_collection=False
+        )
+    ]
+
+
 # Сохраняет основной скриншот и SVG
 def save_main_screenshot_and_svg(driver, screenshot_dir, svg_dir, timestamp, claim_number, vin, svg_collection=True):
     # Очищаем строки от лишних пробелов и символов табуляции
@@ -642,7 +419,7 @@ def save_main_screenshot_and_svg(driver, screenshot_dir, svg_dir, timestamp, cla
         WebDriverWait(driver, 5).until(
             EC.visibility_of_element_located((By.TAG_NAME, "svg"))
         )
-        time.sleep(0.5)
+        wait_for_svg_ready(driver, timeout=5, label="основной SVG")
         svg = driver.find_element(By.TAG_NAME, "svg")
         
         # УБИРАЕМ HOVER ЭФФЕКТЫ перед скриншотом
@@ -657,7 +434,7 @@ def save_main_screenshot_and_svg(driver, screenshot_dir, svg_dir, timestamp, cla
             actions.perform()
             
             # Ждем исчезновения всех tooltips и hover эффектов
-            time.sleep(1)
+            wait_for_dom_quiet(driver, timeout=1, quiet_ms=150, label="снятие hover")
             
             # Дополнительно убираем все активные элементы через JavaScript
             driver.execute_script("""
@@ -682,12 +459,12 @@ def save_main_screenshot_and_svg(driver, screenshot_dir, svg_dir, timestamp, cla
                 });
             """)
             
-            # Ещё одна небольшая пауза для стабилизации
-            time.sleep(0.5)
+            # Дожидаемся отрисовки после скрытия tooltips
+            wait_for_animation_frames(driver)
             
         except Exception as hover_error:
             logger.warning(f"⚠️ Не удалось полностью убрать hover эффекты: {hover_error}")
-            time.sleep(0.5)  # Минимальная пауза в любом случае
+            wait_for_dom_quiet(driver, timeout=0.5, quiet_ms=150, label="снятие hover")
         
         os.makedirs(os.path.dirname(main_screenshot_path), exist_ok=True)
         svg.screenshot(main_screenshot_path)
@@ -738,12 +515,161 @@ def extract_zones(driver):
         logger.error(f"Ошибка при извлечении зон: {str(e)}")
     return zones
 
+# Прямоугольник сетки пиктограмм в координатах страницы верхнего уровня для
+# Page.captureScreenshot. Если сетку обрезает контейнер с прокруткой или фрейм,
+# снять её одним кадром нельзя (status 'clipped')
+_GRID_CLIP_JS = """
+    const grid = arguments[0];
+    const sections = Array.from(grid.querySelectorAll('section.pictogram-section'))
+        .map(section => section.getBoundingClientRect())
+        .filter(r => r.width > 0 && r.height > 0);
+    if (!sections.length) {
+        return {status: 'empty'};
+    }
+    let left = Math.min(...sections.map(r => r.left));
+    let top = Math.min(...sections.map(r => r.top));
+    let right = Math.max(...sections.map(r => r.right));
+    let bottom = Math.max(...sections.map(r => r.bottom));
+
+    function clippedBy(node, l, t, r, b) {
+        for (; node && node.nodeType === 1; node = node.parentElement) {
+            if (node === node.ownerDocument.documentElement || node === node.ownerDocument.body) {
+                break;
+            }
+            const style = window.getComputedStyle(node);
+            if (style.overflowX === 'visible' && style.overflowY === 'visible') {
+                continue;
+            }
+            const box = node.getBoundingClientRect();
+            if (l < box.left - 1 || t < box.top - 1 || r > box.right + 1 || b > box.bottom + 1) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    if (clippedBy(grid.parentElement, left, top, right, bottom)) {
+        return {status: 'clipped'};
+    }
+
+    // Переводим координаты из вложенных фреймов в координаты верхнего окна
+    let win = grid.ownerDocument.defaultView;
+    try {
+        while (win !== win.top) {
+            const frame = win.frameElement;
+            if (!frame) {
+                return {status: 'cross_origin'};
+            }
+            if (left < 0 || top < 0 || right > win.innerWidth || bottom > win.innerHeight) {
+                return {status: 'clipped'};
+            }
+            const box = frame.getBoundingClientRect();
+            const dx = box.left + frame.clientLeft;
+            const dy = box.top + frame.clientTop;
+            left += dx; right += dx; top += dy; bottom += dy;
+            if (clippedBy(frame.parentElement, left, top, right, bottom)) {
+                return {status: 'clipped'};
+            }
+            win = win.parent;
+        }
+    } catch (e) {
+        return {status: 'cross_origin'};
+    }
+
+    return {
+        status: 'ok',
+        x: left + win.scrollX, y: top + win.scrollY,
+        width: right - left, height: bottom - top
+    };
+"""
+
+
+# Снимает всю сетку пиктограмм одним вызовом Page.captureScreenshot
+def capture_grid_screenshot(driver, grid):
+    """
+    Returns:
+        bytes|None - PNG сетки или None, если сетку нельзя снять одним кадром
+    """
+    clip = driver.execute_script(_GRID_CLIP_JS, grid) or {}
+    if clip.get('status') != 'ok':
+        logger.debug(f"Сетка не снимается одним кадром: {clip.get('status')}")
+        return None
+    result = driver.execute_cdp_cmd('Page.captureScreenshot', {
+        "format": "png",
+        "captureBeyondViewport": True,
+        "clip": {
+            "x": clip['x'], "y": clip['y'],
+            "width": clip['width'], "height": clip['height'],
+            "scale": 1
+        }
+    })
+    return base64.b64decode(result['data'])
+
+
+# Скриншоты секций по одной (запасной путь, если сетку обрезает контейнер или фрейм)
+def capture_section_screenshots(driver, zone):
+    """
+    Returns:
+        list - PNG каждой секции в порядке следования
+    """
+    sections = WebDriverWait(driver, 10).until(
+        EC.visibility_of_all_elements_located((
+            By.CSS_SELECTOR,
+            "main div.pictograms-grid.visible section.pictogram-section"
+        ))
+    )
+    logger.debug(f"Найдено {len(sections)} секций для зоны {zone['title']}")
+
+    parts = []
+    for index, section in enumerate(sections):
+        # Прокручиваем к секции
+        driver.execute_script("arguments[0].scrollIntoView(true);", section)
+        wait_for_animation_frames(driver)  # Ждем отрисовки после прокрутки
+        parts.append(section.screenshot_as_png)
+        logger.debug(f"Скриншот секции {index + 1} для зоны {zone['title']} захвачен в памяти")
+    return parts
+
+
+# Снимает сетку пиктограмм: одним кадром через CDP, при невозможности - по секциям
+def capture_pictogram_grid(driver, zone):
+    """
+    Только съёмка: декодирование, склейка и сохранение PNG выполняются
+    в пуле кодирования изображений.
+
+    Returns:
+        list|None - сырые PNG (один кадр или секции по порядку), None при ошибке съёмки
+    """
+    try:
+        try:
+            grid = driver.find_element(By.CSS_SELECTOR, "main div.pictograms-grid.visible")
+            grid_png = capture_grid_screenshot(driver, grid)
+            if grid_png:
+                logger.debug(f"Сетка зоны {zone['title']} снята одним кадром")
+                return [grid_png]
+        except WebDriverException as e:
+            logger.debug(f"Снимок сетки через CDP недоступен ({e}), снимаем по секциям")
+        return capture_section_screenshots(driver, zone)
+    except (TimeoutException, WebDriverException, Exception) as e:
+        logger.error(f"Не удалось сделать скриншот секций для зоны {zone['title']}: {str(e)}")
+        return None
+
+
 # Обрабатывает одну зону
-def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_number="", vin="", svg_collection=True):
+def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_number="", vin="", svg_collection=True,
+                 deadline=None, data_only=False, artifacts=None):
     """
     Обрабатывает одну зону, включая сохранение скриншота, SVG и пиктограмм.
     max_retries: максимальное количество повторных попыток при ошибке сессии.
+    deadline: бюджет времени заявки (ClaimDeadline), проверяется перед началом зоны.
+    data_only: профиль только данных - без скриншотов, переноса стилей и записи
+        файлов; детали и пиктограммы читаются из DOM страницы.
+    artifacts: ArtifactPipeline заявки - скриншот сетки кодируется, а SVG зоны
+        разбивается на детали в пуле процессов; результаты собираются перед
+        финальным сохранением JSON.
     """
+    if deadline:
+        deadline.check("zones")
+
     # Очищаем строки от лишних пробелов и символов табуляции
     clean_claim_number = claim_number.strip() if claim_number else ""
     clean_vin = vin.strip() if vin else ""
@@ -778,10 +704,7 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
             time.sleep(1)
 
     # Формируем безопасное имя для zone['title']
-    safe_zone_title = translit(re.sub(r'[^\w\s-]',
-                                      '', zone['title']).strip(),
-                               'ru', reversed=True).replace(" ", "_").replace("/", "_").lower().replace("'", "")
-    safe_zone_title = re.sub(r'\.+', '', safe_zone_title)
+    safe_zone_title = safe_file_name(zone['title'], drop_quotes=True)
     zone_screenshot_path = os.path.join(screenshot_dir, f"zone_{safe_zone_title}.png")
     zone_screenshot_relative = os.path.normpath(f"/static/screenshots/{clean_claim_number.replace('/', '_')}_{clean_vin}/zone_{safe_zone_title}.png")
     zone_svg_path = os.path.join(svg_dir, f"zone_{safe_zone_title}.svg")
@@ -830,11 +753,11 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
         logger.debug(f"✅ SVG элементы загружены для зоны {zone['title']}")
         
         # Этап 6: Проверяем стабильность DOM (избегаем race conditions)
-        WebDriverWait(driver, 5).until(wait_for_dom_stability)
+        WebDriverWait(driver, 5, poll_frequency=0.2).until(DomStability())
         logger.info(f"✅ DOM стабилизирован для зоны {zone['title']}")
         
-        # Дополнительная пауза для полной стабилизации
-        time.sleep(1)
+        # Дожидаемся завершения сетевых запросов зоны (DOM уже стабилен)
+        wait_for_dom_quiet(driver, timeout=2, network_timeout=5, label=f"зона {zone['title']}")
 
         # Кликаем по #breadcrumb-sheet-title, собираем пиктограммы, делаем скриншот, затем второй клик
         try:
@@ -844,74 +767,37 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
                 EC.element_to_be_clickable((By.CSS_SELECTOR, breadcrumb_selector))
             ).click()
             logger.info(f"Клик по {breadcrumb_selector} для закрытия меню в зоне {zone['title']}")
-            time.sleep(1)
-
-            # Делаем скриншот каждой секции и склеиваем в памяти
-            os.makedirs(os.path.dirname(zone_screenshot_path), exist_ok=True)
-            try:
-                # Находим все секции
-                sections = WebDriverWait(driver, 10).until(
-                    EC.visibility_of_all_elements_located((
-                        By.CSS_SELECTOR,
-                        "main div.pictograms-grid.visible section.pictogram-section"
-                    ))
-                )
-                logger.debug(f"Найдено {len(sections)} секций для зоны {zone['title']}")
-
-                # Список для хранения изображений в памяти
-                images = []
-
-                # Делаем скриншот каждой секции
-                for index, section in enumerate(sections):
-                    # Прокручиваем к секции
-                    driver.execute_script("arguments[0].scrollIntoView(true);", section)
-                    time.sleep(0.5)  # Пауза для стабилизации
-
-                    # Получаем размеры секции
-                    section_width = driver.execute_script("return arguments[0].scrollWidth", section)
-                    section_height = driver.execute_script("return arguments[0].offsetHeight", section)
-                    logger.debug(f"Секция {index + 1} для зоны {zone['title']}: {section_width}x{section_height}")
-
-                    # Делаем скриншот в памяти
-                    screenshot_png = section.screenshot_as_png
-                    img = Image.open(BytesIO(screenshot_png))
-                    images.append(img)
-                    logger.debug(f"Скриншот секции {index + 1} для зоны {zone['title']} захвачен в памяти")
-
-                # Склеиваем изображения
-                max_width = max(img.width for img in images)
-                total_height = sum(img.height for img in images)
-
-                # Создаём новое изображение
-                final_image = Image.new('RGB', (max_width, total_height))
-                y_offset = 0
-                for img in images:
-                    final_image.paste(img, (0, y_offset))
-                    y_offset += img.height
-
-                # Сохраняем итоговый скриншот
-                final_image.save(zone_screenshot_path, quality=85, optimize=True)
-                logger.info(f"Скриншот всех секций для зоны {zone['title']} сохранён: {zone_screenshot_path}")
-
-                # Закрываем изображения
-                for img in images:
-                    img.close()
-
-                # Восстанавливаем исходные размеры окна
-                try:
-                    driver.set_window_size(original_size['width'], original_size['height'])
-                except NameError:
-                    logger.warning("original_size не определен, пропускаем восстановление размера окна")
-                time.sleep(0.5)
-
-            except (TimeoutException, WebDriverException, Exception) as e:
-                logger.error(f"Не удалось сделать скриншот секций для зоны {zone['title']}: {str(e)}")
-                zone_screenshot_relative = ""  # Устанавливаем пустой путь в случае ошибки
-                logger.info(f"Заглушка для зоны {zone['title']}: скриншот не создан")
+            wait_for_svg_ready(driver, "main div.pictograms-grid.visible", timeout=5,
+                               label=f"закрытие меню в зоне {zone['title']}")
+
+            # Сетка снимается сразу, PNG кодируется в пуле процессов, пока драйвер
+            # собирает пиктограммы (в профиле только данных скриншот не делается)
+            png_parts = None
+            if data_only:
+                zone_screenshot_relative = ""
+            else:
+                png_parts = capture_pictogram_grid(driver, zone)
+                if png_parts is None:
+                    zone_screenshot_relative = ""  # Устанавливаем пустой путь в случае ошибки
+                    logger.info(f"Заглушка для зоны {zone['title']}: скриншот не создан")
+                elif artifacts is not None:
+                    # Финальный JSON дождётся изображения через artifacts.resolve()
+                    artifacts.submit(zone_screenshot_relative, png_parts, zone_screenshot_path)
+                    png_parts = None
 
             # Собираем данные пиктограмм, передаем zone_screenshot_relative
             logger.debug(f"🔍 DEBUG process_zone перед вызовом process_pictograms: claim_number='{claim_number}', vin='{vin}'")
-            zone_data = process_pictograms(driver, zone, screenshot_dir, svg_dir, max_retries, zone_screenshot_relative, claim_number=claim_number, vin=vin, svg_collection=svg_collection)
+            zone_data = process_pictograms(driver, zone, screenshot_dir, svg_dir, max_retries, zone_screenshot_relative, claim_number=claim_number, vin=vin, svg_collection=svg_collection and not data_only)
+
+            if png_parts:
+                # Без конвейера заявки изображение сохраняется до возврата из зоны
+                try:
+                    submit_png_encoding(png_parts, zone_screenshot_path).result()
+                    logger.info(f"Скриншот всех секций для зоны {zone['title']} сохранён: {zone_screenshot_path}")
+                except Exception as e:
+                    logger.error(f"Не удалось сохранить скриншот секций для зоны {zone['title']}: {str(e)}")
+                    for zone_entry in zone_data:
+                        zone_entry["screenshot_path"] = ""
 
             # Второй клик для возврата к меню зон
             WebDriverWait(driver, 10).until(
@@ -927,7 +813,7 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
                 EC.element_to_be_clickable((By.ID, f"tree-navigation-zone-description-{zone['link']}"))
             )
             logger.info(f"Меню зон доступно после обработки {zone['title']}, готов к следующей зоне")
-            time.sleep(0.5)
+            wait_for_dom_quiet(driver, timeout=2, label="меню зон")
 
             return zone_data
         except (TimeoutException, WebDriverException) as e:
@@ -961,9 +847,24 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
         WebDriverWait(driver, 10).until(
             lambda d: d.execute_script("return arguments[0].querySelectorAll('path, rect, circle').length", svg) > 0
         )
-        time.sleep(2)
+        wait_for_svg_ready(driver, f"[id='sheet_{zone['link']}']", timeout=5,
+                           label=f"SVG зоны {zone['title']}")
         logger.info(f"Найден SVG для зоны {zone['title']}")
 
+        if data_only:
+            # Профиль только данных: названия деталей берутся из DOM, файлы не пишутся
+            detail_paths = extract_details_from_dom(driver, svg, claim_number=claim_number, vin=vin)
+            zone_data.append({
+                "title": zone['title'],
+                "screenshot_path": "",
+                "svg_path": "",
+                "has_pictograms": False,
+                "graphics_not_available": False,
+                "details": detail_paths
+            })
+            logger.info(f"Обработано {len(detail_paths)} деталей для зоны {zone['title']} (только данные)")
+            return zone_data
+
         try:
             WebDriverWait(driver, 5).until(
                 EC.visibility_of_element_located((By.TAG_NAME, "svg"))
@@ -972,7 +873,7 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
             try:
                 # Прокручиваем к SVG
                 driver.execute_script("arguments[0].scrollIntoView(true);", svg)
-                time.sleep(0.5)  # Пауза для стабилизации
+                wait_for_animation_frames(driver)  # Ждем отрисовки после прокрутки
                 # Проверяем размеры SVG
                 svg_width = driver.execute_script("return arguments[0].scrollWidth", svg)
                 svg_height = driver.execute_script("return arguments[0].scrollHeight", svg)
@@ -995,8 +896,15 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
 
             # Всегда обрабатываем SVG для извлечения деталей, но сохраняем файлы только при включённом флаге
             detail_paths = []
-            success, _, detail_paths = save_svg_sync(driver, svg, zone_svg_path, claim_number=claim_number, vin=vin, svg_collection=svg_collection)
-            logger.info(f"🔍 После save_svg_sync для зоны {zone['title']}: success={success}, получено деталей: {len(detail_paths)}")
+            svg_bytes = None
+            if artifacts is not None:
+                # Снимаем разметку и сразу отдаём разбор и разбиение в пул процессов;
+                # детали заполнит ensure_zone_details_extracted
+                svg_bytes = capture_svg_document(driver, svg)
+                success = svg_bytes is not None
+            else:
+                success, _, detail_paths = save_svg_sync(driver, svg, zone_svg_path, claim_number=claim_number, vin=vin, svg_collection=svg_collection)
+                logger.info(f"🔍 После save_svg_sync для зоны {zone['title']}: success={success}, получено деталей: {len(detail_paths)}")
             if not success:
                 logger.warning(f"Не удалось обработать SVG для зоны {zone['title']}")
                 zone_data.append({
@@ -1014,15 +922,22 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
             else:
                 zone_svg_relative = ""
 
-            zone_data.append({
+            zone_entry = {
                 "title": zone['title'],
                 "screenshot_path": zone_screenshot_relative,
                 "svg_path": zone_svg_relative,
                 "has_pictograms": False,
                 "graphics_not_available": False,
                 "details": detail_paths
-            })
-            logger.info(f"Обработано {len(detail_paths)} деталей для зоны {zone['title']}")
+            }
+            zone_data.append(zone_entry)
+            if svg_bytes is not None:
+                artifacts.submit_zone_svg(
+                    zone_entry, svg_bytes, zone_svg_path, claim_number=claim_number, vin=vin, svg_collection=svg_collection
+                )
+                logger.info(f"SVG зоны {zone['title']} передан в фоновую обработку")
+            else:
+                logger.info(f"Обработано {len(detail_paths)} деталей для зоны {zone['title']}")
         except WebDriverException as e:
             logger.error(f"Ошибка при обработке SVG зоны {zone['title']}: {str(e)}")
             os.makedirs(os.path.dirname(zone_screenshot_path), exist_ok=True)
@@ -1053,13 +968,30 @@ def process_zone(driver, zone, screenshot_dir, svg_dir, max_retries=3, claim_num
     return zone_data
 
 # Функция для проверки и дозаполнения деталей зон
-def ensure_zone_details_extracted(zone_data, svg_dir, claim_number="", vin="", svg_collection=True):
+def ensure_zone_details_extracted(zone_data, svg_dir, claim_number="", vin="", svg_collection=True, data_only=False,
+                                  artifacts=None):
     """
     Проверяет зоны в zone_data и дозаполняет детали если они отсутствуют.
     ГАРАНТИРУЕТ что все зоны имеют извлеченные детали.
+    В профиле только данных SVG файлов нет, поэтому зоны только проверяются.
+    artifacts - ArtifactPipeline заявки: сначала собираются результаты фонового
+    разбиения SVG зон.
     """
+    if artifacts is not None:
+        artifacts.collect_zone_details()
+
     logger.info(f"🔧 Проверяем полноту извлечения деталей для {len(zone_data)} зон")
 
+    if data_only:
+        missing = [
+            zone.get("title", "") for zone in zone_data
+            if not zone.get("has_pictograms", False) and not zone.get("graphics_not_available", False)
+            and not zone.get("details")
+        ]
+        if missing:
+            logger.warning(f"⚠️ Зоны без деталей (профиль только данных, дозаполнение из файлов недоступно): {missing}")
+        return zone_data
+
     zones_fixed = 0
     for zone in zone_data:
         if zone.get("has_pictograms", False):
@@ -1076,11 +1008,7 @@ def ensure_zone_details_extracted(zone_data, svg_dir, claim_number="", vin="", s
             zone_svg_path = None
 
             # Способ 1: стандартный поиск по имени
-            safe_zone_title = translit(
-                re.sub(r'[^\w\s-]', '', zone_title).strip(),
-                'ru', reversed=True
-            ).replace(" ", "_").replace("/", "_").lower().replace("'", "")
-            safe_zone_title = re.sub(r'\.+', '', safe_zone_title)
+            safe_zone_title = safe_file_name(zone_title, drop_quotes=True)
             candidate_path = os.path.join(svg_dir, f"zone_{safe_zone_title}.svg")
 
             if os.path.exists(candidate_path):
@@ -1151,6 +1079,365 @@ def ensure_zone_details_extracted(zone_data, svg_dir, claim_number="", vin="", s
     )
     return zone_data
 
+# Формирует путь файла и относительный путь SVG пиктограммы
+def build_pictogram_svg_paths(svg_dir, section_name, work_name1, work_name2, claim_number, vin):
+    safe_section_name = safe_file_name(section_name)
+    safe_work_name1 = safe_file_name(work_name1)
+    safe_work_name2 = safe_file_name(work_name2) if work_name2 else ""
+    svg_filename = f"{safe_section_name}_{safe_work_name1}" + (f"_{safe_work_name2}" if work_name2 else "") + ".svg"
+    work_svg_path = os.path.join(svg_dir, svg_filename)
+    work_svg_relative = os.path.normpath(f"/static/svgs/{claim_number.replace('/', '_')}_{vin}/{svg_filename}")
+    return work_svg_path, work_svg_relative
+
+
+# Снимок сетки пиктограмм за один вызов execute_script: секции, работы, подписи,
+# готовность SVG и (при сборе SVG) разметка с перенесёнными стилями
+PICTOGRAMS_SNAPSHOT_JS = _SET_INLINE_STYLES_FN + _COLLECT_SVG_STYLES_FN + _CACHED_SVG_STYLES_FN + """
+    function isDisplayed(el) {
+        if (!el || !el.isConnected) {
+            return false;
+        }
+        for (let node = el; node && node.nodeType === 1; node = node.parentElement) {
+            if (window.getComputedStyle(node).display === 'none') {
+                return false;
+            }
+        }
+        const style = window.getComputedStyle(el);
+        if (style.visibility === 'hidden' || style.visibility === 'collapse' || parseFloat(style.opacity) === 0) {
+            return false;
+        }
+        return Array.from(el.getClientRects()).some(r => r.width > 0 && r.height > 0);
+    }
+
+    const grid = arguments[0];
+    const withSvg = arguments[1];
+    const knownToken = arguments[2];
+    const result = {sections: [], css: null};
+
+    for (const section of grid.getElementsByTagName('section')) {
+        const entry = {
+            visible: isDisplayed(section), hasTitle: false, name: '',
+            holderFound: false, holderVisible: false, works: []
+        };
+        result.sections.push(entry);
+        if (!entry.visible) {
+            continue;
+        }
+        const h2 = section.querySelector('h2.sort-title.visible');
+        if (!h2) {
+            continue;
+        }
+        entry.hasTitle = true;
+        entry.name = (h2.innerText || '').trim();
+
+        const holder = section.querySelector('#pictograms-grid-holder');
+        entry.holderFound = !!holder;
+        entry.holderVisible = isDisplayed(holder);
+        if (!entry.holderVisible) {
+            continue;
+        }
+
+        for (const div of holder.getElementsByTagName('div')) {
+            const tooltip = div.getAttribute('data-tooltip');
+            if (!tooltip || !isDisplayed(div)) {
+                continue;
+            }
+            const label = div.querySelector('span > span');
+            const container = div.querySelector('div.navigation-pictogram-svg-container');
+            const work = {
+                tooltip: tooltip,
+                label: label ? (label.innerText || '').trim() : '',
+                containerFound: !!container,
+                containerVisible: isDisplayed(container),
+                svgFound: false,
+                ready: false
+            };
+            entry.works.push(work);
+            if (!work.containerVisible) {
+                continue;
+            }
+            const svg = container.querySelector('svg');
+            if (!svg) {
+                continue;
+            }
+            work.svgFound = true;
+            work.ready = isDisplayed(svg) && svg.querySelectorAll('path, rect, circle, g').length > 0;
+            if (work.ready && withSvg) {
+                setInlineStyles(svg);
+                work.html = svg.outerHTML;
+                work.viewBox = svg.getAttribute('viewBox');
+                work.width = svg.getAttribute('width');
+                work.height = svg.getAttribute('height');
+            }
+        }
+    }
+
+    if (withSvg) {
+        result.css = cachedSvgStyles(knownToken);
+    }
+    return result;
+"""
+
+
+# Снимает сетку пиктограмм одним запросом к браузеру
+def take_pictograms_snapshot(driver, grid_div, svg_collection=True):
+    """
+    Возвращает снимок сетки пиктограмм. Если часть SVG ещё не отрисована,
+    ждёт их готовности через движок ожиданий и снимает сетку повторно.
+    """
+    snapshot = driver.execute_script(PICTOGRAMS_SNAPSHOT_JS, grid_div, svg_collection, get_svg_styles_token(driver))
+    not_ready = sum(
+        1 for section in snapshot.get('sections', [])
+        for work in section.get('works', [])
+        if work.get('svgFound') and not work.get('ready')
+    )
+    if not_ready:
+        logger.info(f"⏳ {not_ready} SVG пиктограмм ещё не готовы, ждём отрисовки")
+        wait_for_svg_ready(
+            driver, "main div.pictograms-grid.visible", timeout=8, svg_ratio=1.0, label="SVG пиктограмм"
+        )
+        snapshot = driver.execute_script(PICTOGRAMS_SNAPSHOT_JS, grid_div, svg_collection, get_svg_styles_token(driver))
+    snapshot['styles'] = resolve_svg_styles(driver, snapshot.get('css')) if svg_collection else ''
+    return snapshot
+
+
+# Собирает данные пиктограмм из снимка сетки без поэлементных запросов к драйверу
+def collect_pictograms_from_snapshot(snapshot, zone, svg_dir, claim_number="", vin="", svg_collection=True):
+    """
+    Формирует pictogram_data по снимку PICTOGRAMS_SNAPSHOT_JS с теми же правилами
+    отбора, именования файлов и svg_path, что и поэлементный обход.
+    """
+    pictogram_data = []
+    style_content = snapshot.get('styles') or ''
+
+    for section_idx, section in enumerate(snapshot.get('sections', [])):
+        if not section.get('visible'):
+            logger.debug(f"Секция {section_idx + 1} не видима, пропускаем")
+            continue
+        if not section.get('hasTitle'):
+            logger.warning(f"Не найден h2.sort-title.visible в секции {section_idx + 1} зоны {zone['title']}")
+            continue
+
+        section_name = section.get('name') or ''
+        if not section_name:
+            logger.warning(f"Пустое название секции {section_idx + 1} в зоне {zone['title']}")
+            continue
+        if not section.get('holderFound'):
+            logger.warning(f"Не найден pictograms-grid-holder в секции '{section_name}'")
+            continue
+        if not section.get('holderVisible'):
+            logger.warning(f"Holder не видим в секции '{section_name}'")
+            continue
+
+        works = []
+        work_items = section.get('works', [])
+        logger.info(f"🔧 Найдено {len(work_items)} работ в секции '{section_name}'")
+
+        for work in work_items:
+            work_name1 = (work.get('tooltip') or '').strip()
+            if not work_name1:
+                logger.warning(f"Пустое data-tooltip для работы в секции '{section_name}'")
+                continue
+            work_name2 = work.get('label') or ''
+
+            if not work.get('containerFound'):
+                logger.warning(f"Не найден SVG контейнер для работы '{work_name1}' в секции '{section_name}'")
+                continue
+            if not work.get('containerVisible'):
+                logger.warning(f"SVG контейнер не видим для работы '{work_name1}' в секции '{section_name}'")
+                continue
+            if not work.get('svgFound'):
+                logger.warning(f"SVG не найден для работы '{work_name1}' в секции '{section_name}'")
+                continue
+            if not work.get('ready'):
+                logger.warning(f"SVG не готов для работы '{work_name1}' в секции '{section_name}', пропускаем")
+                continue
+
+            work_svg_path, work_svg_relative = build_pictogram_svg_paths(
+                svg_dir, section_name, work_name1, work_name2, claim_number, vin
+            )
+
+            # Сохраняем SVG только если включен сбор SVG
+            if svg_collection:
+                svg_bytes = build_svg_document(
+                    work.get('html') or '',
+                    work.get('viewBox') or '0 0 1000 1000',
+                    work.get('width') or '100%',
+                    work.get('height') or '100%',
+                    style_content
+                )
+                success = False
+                if svg_bytes is not None:
+                    success, _, _ = store_svg_bytes(
+                        svg_bytes, work_svg_path, claim_number=claim_number, vin=vin, svg_collection=svg_collection
+                    )
+            else:
+                success = True  # Если сбор отключен, считаем успешным
+
+            if success:
+                logger.info(f"SVG пиктограммы {'сохранён' if svg_collection else 'путь установлен'}: {work_svg_path}")
+                works.append({
+                    "work_name1": work_name1,
+                    "work_name2": work_name2,
+                    "svg_path": work_svg_relative if svg_collection else ""
+                })
+            else:
+                logger.warning(f"Не удалось обработать SVG для работы '{work_name1}' в секции '{section_name}'")
+                works.append({
+                    "work_name1": work_name1,
+                    "work_name2": work_name2,
+                    "svg_path": ""
+                })
+
+        if works:
+            pictogram_data.append({
+                "section_name": section_name,
+                "works": works
+            })
+
+    return pictogram_data
+
+
+# Поэлементный обход сетки пиктограмм (запасной путь, если снимок не удался)
+def collect_pictograms_by_elements(driver, zone, grid_div, svg_dir, claim_number="", vin="", svg_collection=True):
+    """
+    Прежний обход пиктограмм через отдельные запросы WebDriver для каждого элемента.
+    """
+    pictogram_data = []
+    sections = grid_div.find_elements(By.TAG_NAME, "section")
+    for section_idx, section in enumerate(sections):
+        try:
+            # Проверяем видимость секции
+            if not section.is_displayed():
+                logger.debug(f"Секция {section_idx + 1} не видима, пропускаем")
+                continue
+
+            # Находим h2 с более надежной проверкой
+            h2_elements = section.find_elements(By.CSS_SELECTOR, "h2.sort-title.visible")
+            if not h2_elements:
+                logger.warning(f"Не найден h2.sort-title.visible в секции {section_idx + 1} зоны {zone['title']}")
+                continue
+            
+            h2 = h2_elements[0]
+            section_name = h2.text.strip()
+            if not section_name:
+                logger.warning(f"Пустое название секции {section_idx + 1} в зоне {zone['title']}")
+                continue
+
+            # Находим holder с улучшенной проверкой
+            holders = section.find_elements(By.ID, "pictograms-grid-holder")
+            if not holders:
+                logger.warning(f"Не найден pictograms-grid-holder в секции '{section_name}'")
+                continue
+
+            holder = holders[0]
+            if not holder.is_displayed():
+                logger.warning(f"Holder не видим в секции '{section_name}'")
+                continue
+
+            # Этап 5: Собираем работы с улучшенной надежностью
+            works = []
+            
+            # Дожидаемся стабилизации работ в секции
+            try:
+                WebDriverWait(driver, 5).until(lambda d: wait_for_works_in_section(holder))
+            except TimeoutException:
+                logger.warning(f"Таймаут ожидания работ в секции '{section_name}', продолжаем с доступными")
+            
+            work_divs = [div for div in holder.find_elements(By.TAG_NAME, "div") 
+                        if div.get_attribute("data-tooltip") and div.is_displayed()]
+            logger.info(f"🔧 Найдено {len(work_divs)} работ в секции '{section_name}'")
+            
+            for work_idx, work_div in enumerate(work_divs):
+                try:
+                    # Проверяем видимость работы
+                    if not work_div.is_displayed():
+                        logger.debug(f"Работа {work_idx + 1} не видима в секции '{section_name}'")
+                        continue
+
+                    # Собираем work_name1 с дополнительной валидацией
+                    work_name1 = work_div.get_attribute("data-tooltip")
+                    if not work_name1 or not work_name1.strip():
+                        logger.warning(f"Пустое data-tooltip для работы {work_idx + 1} в секции '{section_name}'")
+                        continue
+                    work_name1 = work_name1.strip()
+
+                    # Собираем work_name2 с улучшенной логикой
+                    work_name2 = ""
+                    spans = work_div.find_elements(By.CSS_SELECTOR, "span > span")
+                    if spans:
+                        work_name2 = spans[0].text.strip()
+
+                    # Находим SVG контейнер с более надежной проверкой
+                    svg_containers = work_div.find_elements(By.CSS_SELECTOR, "div.navigation-pictogram-svg-container")
+                    if not svg_containers:
+                        logger.warning(f"Не найден SVG контейнер для работы '{work_name1}' в секции '{section_name}'")
+                        continue
+
+                    svg_container = svg_containers[0]
+                    if not svg_container.is_displayed():
+                        logger.warning(f"SVG контейнер не видим для работы '{work_name1}' в секции '{section_name}'")
+                        continue
+
+                    # Собираем SVG с улучшенным ожиданием
+                    svgs = svg_container.find_elements(By.TAG_NAME, "svg")
+                    if not svgs:
+                        logger.warning(f"SVG не найден для работы '{work_name1}' в секции '{section_name}'")
+                        continue
+                    
+                    svg = svgs[0]
+                    
+                    # Проверяем готовность SVG с таймаутом
+                    try:
+                        WebDriverWait(driver, 8).until(
+                            lambda d: svg.is_displayed() and 
+                            d.execute_script("return arguments[0].querySelectorAll('path, rect, circle, g').length > 0", svg)
+                    )
+                    except TimeoutException:
+                        logger.warning(f"SVG не готов для работы '{work_name1}' в секции '{section_name}', пропускаем")
+                        continue
+
+                    # Формируем имя файла
+                    work_svg_path, work_svg_relative = build_pictogram_svg_paths(
+                        svg_dir, section_name, work_name1, work_name2, claim_number, vin
+                    )
+                    logger.debug(f"🔍 DEBUG: claim_number='{claim_number}', vin='{vin}', work_svg_relative='{work_svg_relative}'")
+
+                    # Сохраняем SVG только если включен сбор SVG
+                    if svg_collection:
+                        success, saved_path, _ = save_svg_sync(driver, svg, work_svg_path, claim_number=claim_number, vin=vin, svg_collection=svg_collection)
+                    else:
+                        success = True  # Если сбор отключен, считаем успешным
+                    if success:
+                        logger.info(f"SVG пиктограммы {'сохранён' if svg_collection else 'путь установлен'}: {work_svg_path}")
+                        works.append({
+                            "work_name1": work_name1,
+                            "work_name2": work_name2,
+                            "svg_path": work_svg_relative if svg_collection else ""
+                        })
+                    else:
+                        logger.warning(f"Не удалось обработать SVG для работы '{work_name1}' в секции '{section_name}'")
+                        works.append({
+                            "work_name1": work_name1,
+                            "work_name2": work_name2,
+                            "svg_path": ""
+                        })
+                except Exception as e:
+                    logger.error(f"Ошибка при обработке работы в секции {section_name}: {str(e)}")
+                    continue
+
+            if works:
+                pictogram_data.append({
+                    "section_name": section_name,
+                    "works": works
+                })
+        except Exception as e:
+            logger.error(f"Ошибка при обработке секции в зоне {zone['title']}: {str(e)}")
+            continue
+
+    return pictogram_data
+
+
 # Обрабатывает пиктограммы в зоне
 def process_pictograms(driver, zone, screenshot_dir, svg_dir, max_retries=2, zone_screenshot_relative="", claim_number="", vin="", svg_collection=True):
     """
@@ -1202,142 +1489,18 @@ def process_pictograms(driver, zone, screenshot_dir, svg_dir, max_retries=2, zon
         WebDriverWait(driver, 20).until(wait_for_sections_stability)
         sections = grid_div.find_elements(By.TAG_NAME, "section")
         logger.info(f"🎯 Найдено {len(sections)} стабильных секций пиктограмм")
-        
-        for section_idx, section in enumerate(sections):
-            try:
-                # Проверяем видимость секции
-                if not section.is_displayed():
-                    logger.debug(f"Секция {section_idx + 1} не видима, пропускаем")
-                    continue
-
-                # Находим h2 с более надежной проверкой
-                h2_elements = section.find_elements(By.CSS_SELECTOR, "h2.sort-title.visible")
-                if not h2_elements:
-                    logger.warning(f"Не найден h2.sort-title.visible в секции {section_idx + 1} зоны {zone['title']}")
-                    continue
-                
-                h2 = h2_elements[0]
-                section_name = h2.text.strip()
-                if not section_name:
-                    logger.warning(f"Пустое название секции {section_idx + 1} в зоне {zone['title']}")
-                    continue
-
-                # Находим holder с улучшенной проверкой
-                holders = section.find_elements(By.ID, "pictograms-grid-holder")
-                if not holders:
-                    logger.warning(f"Не найден pictograms-grid-holder в секции '{section_name}'")
-                    continue
-
-                holder = holders[0]
-                if not holder.is_displayed():
-                    logger.warning(f"Holder не видим в секции '{section_name}'")
-                    continue
 
-                # Этап 5: Собираем работы с улучшенной надежностью
-                works = []
-                
-                # Дожидаемся стабилизации работ в секции
-                try:
-                    WebDriverWait(driver, 5).until(lambda d: wait_for_works_in_section(holder))
-                except TimeoutException:
-                    logger.warning(f"Таймаут ожидания работ в секции '{section_name}', продолжаем с доступными")
-                
-                work_divs = [div for div in holder.find_elements(By.TAG_NAME, "div") 
-                            if div.get_attribute("data-tooltip") and div.is_displayed()]
-                logger.info(f"🔧 Найдено {len(work_divs)} работ в секции '{section_name}'")
-                
-                for work_idx, work_div in enumerate(work_divs):
-                    try:
-                        # Проверяем видимость работы
-                        if not work_div.is_displayed():
-                            logger.debug(f"Работа {work_idx + 1} не видима в секции '{section_name}'")
-                            continue
-
-                        # Собираем work_name1 с дополнительной валидацией
-                        work_name1 = work_div.get_attribute("data-tooltip")
-                        if not work_name1 or not work_name1.strip():
-                            logger.warning(f"Пустое data-tooltip для работы {work_idx + 1} в секции '{section_name}'")
-                            continue
-                        work_name1 = work_name1.strip()
-
-                        # Собираем work_name2 с улучшенной логикой
-                        work_name2 = ""
-                        spans = work_div.find_elements(By.CSS_SELECTOR, "span > span")
-                        if spans:
-                            work_name2 = spans[0].text.strip()
-
-                        # Находим SVG контейнер с более надежной проверкой
-                        svg_containers = work_div.find_elements(By.CSS_SELECTOR, "div.navigation-pictogram-svg-container")
-                        if not svg_containers:
-                            logger.warning(f"Не найден SVG контейнер для работы '{work_name1}' в секции '{section_name}'")
-                            continue
-
-                        svg_container = svg_containers[0]
-                        if not svg_container.is_displayed():
-                            logger.warning(f"SVG контейнер не видим для работы '{work_name1}' в секции '{section_name}'")
-                            continue
-
-                        # Собираем SVG с улучшенным ожиданием
-                        svgs = svg_container.find_elements(By.TAG_NAME, "svg")
-                        if not svgs:
-                            logger.warning(f"SVG не найден для работы '{work_name1}' в секции '{section_name}'")
-                            continue
-                        
-                        svg = svgs[0]
-                        
-                        # Проверяем готовность SVG с таймаутом
-                        try:
-                            WebDriverWait(driver, 8).until(
-                                lambda d: svg.is_displayed() and 
-                                d.execute_script("return arguments[0].querySelectorAll('path, rect, circle, g').length > 0", svg)
-                        )
-                        except TimeoutException:
-                            logger.warning(f"SVG не готов для работы '{work_name1}' в секции '{section_name}', пропускаем")
-                            continue
-
-                        # Формируем имя файла
-                        safe_section_name = translit(re.sub(r'[^\w\s-]', '', section_name).strip(), 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower()
-                        safe_work_name1 = translit(re.sub(r'[^\w\s-]', '', work_name1).strip(), 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower()
-                        safe_work_name2 = translit(re.sub(r'[^\w\s-]', '', work_name2).strip(), 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower() if work_name2 else ""
-                        safe_work_name2 = re.sub(r'\.+', '', safe_work_name2)
-                        safe_work_name1 = re.sub(r'\.+', '', safe_work_name1)
-                        safe_section_name = re.sub(r'\.+', '', safe_section_name)
-                        svg_filename = f"{safe_section_name}_{safe_work_name1}" + (f"_{safe_work_name2}" if work_name2 else "") + ".svg"
-                        work_svg_path = os.path.join(svg_dir, svg_filename)
-                        work_svg_relative = os.path.normpath(f"/static/svgs/{claim_number.replace('/', '_')}_{vin}/{svg_filename}")
-                        logger.debug(f"🔍 DEBUG: claim_number='{claim_number}', vin='{vin}', work_svg_relative='{work_svg_relative}'")
-
-                        # Сохраняем SVG только если включен сбор SVG
-                        if svg_collection:
-                            success, saved_path, _ = save_svg_sync(driver, svg, work_svg_path, claim_number=claim_number, vin=vin, svg_collection=svg_collection)
-                        else:
-                            success = True  # Если сбор отключен, считаем успешным
-                        if success:
-                            logger.info(f"SVG пиктограммы {'сохранён' if svg_collection else 'путь установлен'}: {work_svg_path}")
-                            works.append({
-                                "work_name1": work_name1,
-                                "work_name2": work_name2,
-                                "svg_path": work_svg_relative if svg_collection else ""
-                            })
-                        else:
-                            logger.warning(f"Не удалось обработать SVG для работы '{work_name1}' в секции '{section_name}'")
-                            works.append({
-                                "work_name1": work_name1,
-                                "work_name2": work_name2,
-                                "svg_path": ""
-                            })
-                    except Exception as e:
-                        logger.error(f"Ошибка при обработке работы в секции {section_name}: {str(e)}")
-                        continue
-
-                if works:
-                    pictogram_data.append({
-                        "section_name": section_name,
-                        "works": works
-                    })
-            except Exception as e:
-                logger.error(f"Ошибка при обработке секции в зоне {zone['title']}: {str(e)}")
-                continue
+        # Этап 5: Снимаем всю сетку одним запросом, при ошибке - поэлементный обход
+        try:
+            snapshot = take_pictograms_snapshot(driver, grid_div, svg_collection=svg_collection)
+            pictogram_data = collect_pictograms_from_snapshot(
+                snapshot, zone, svg_dir, claim_number=claim_number, vin=vin, svg_collection=svg_collection
+            )
+        except WebDriverException as e:
+            logger.warning(f"⚠️ Не удалось снять сетку пиктограмм одним запросом ({e}), переходим к поэлементному обходу")
+            pictogram_data = collect_pictograms_by_elements(
+                driver, zone, grid_div, svg_dir, claim_number=claim_number, vin=vin, svg_collection=svg_collection
+            )
 
         # Формируем данные зоны
         if pictogram_data:
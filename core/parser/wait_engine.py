@@ -0,0 +1,404 @@
+"""
+Событийный движок ожиданий DOM вместо фиксированных пауз
+
+Внедряет в страницу (или текущий iframe) зонд на MutationObserver и счётчик
+активных XHR/fetch запросов, после чего ждёт в браузере через
+requestAnimationFrame, пока не будут выполнены условия готовности.
+Каждое условие имеет свой таймаут, истечение таймаута не является ошибкой -
+функции возвращают False и парсер продолжает работу как раньше после паузы.
+
+Условия:
+    * dom: за последние quiet_ms не было мутаций DOM
+    * network: нет активных запросов XHR/fetch в течение quiet_ms
+    * svg: SVG внутри корневого селектора содержат графические элементы
+
+Основные функции:
+    * install_wait_probe: Устанавливает зонд в текущий документ
+    * wait_for_quiescence: Ждёт одновременного выполнения набора условий
+    * wait_for_dom_quiet: Ждёт успокоения DOM (и сети)
+    * wait_for_svg_ready: Ждёт успокоения DOM и готовности SVG
+    * wait_for_selector: Ждёт появления элемента по событию мутации
+    * wait_for_animation_frames: Ждёт отрисовки кадров после прокрутки
+    * get_dom_idle_ms: Возвращает время с последней мутации DOM
+"""
+import logging
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# Окно тишины, после которого DOM/сеть считаются успокоившимися
+DEFAULT_QUIET_MS = 300
+# Таймауты условий по умолчанию (секунды)
+DEFAULT_TIMEOUTS = {"dom": 5, "network": 10}
+# Доля SVG, которые должны содержать графику (как в wait_for_all_svgs_ready)
+DEFAULT_SVG_RATIO = 0.8
+# Запас к таймауту асинхронного скрипта, чтобы браузер успел вернуть результат
+SCRIPT_TIMEOUT_MARGIN = 5
+
+# Зонд устанавливается один раз на документ: фиксирует время последней мутации
+# и ведёт счётчик незавершённых XHR/fetch запросов
+_PROBE_JS = """
+(function() {
+    if (window.__audatexWaitProbe) {
+        return;
+    }
+    var probe = {lastMutation: Date.now(), lastNetwork: Date.now(), pending: 0};
+    try {
+        new MutationObserver(function() {
+            probe.lastMutation = Date.now();
+        }).observe(document.documentElement || document, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+    } catch (e) {
+        console.warn('Не удалось установить MutationObserver:', e);
+    }
+    function started() {
+        probe.pending++;
+        probe.lastNetwork = Date.now();
+    }
+    function finished() {
+        probe.pending = Math.max(0, probe.pending - 1);
+        probe.lastNetwork = Date.now();
+    }
+    try {
+        var originalSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function() {
+            started();
+            this.addEventListener('loadend', finished, {once: true});
+            return originalSend.apply(this, arguments);
+        };
+    } catch (e) {
+        console.warn('Не удалось отследить XHR:', e);
+    }
+    try {
+        if (window.fetch) {
+            var originalFetch = window.fetch;
+            window.fetch = function() {
+                started();
+                return originalFetch.apply(this, arguments).finally(finished);
+            };
+        }
+    } catch (e) {
+        console.warn('Не удалось отследить fetch:', e);
+    }
+    window.__audatexWaitProbe = probe;
+})();
+"""
+
+# Планировщик тиков: rAF в видимой вкладке, setTimeout в фоновой (rAF там не вызывается)
+_SCHEDULE_JS = """
+function scheduleTick(fn) {
+    if (document.visibilityState === 'visible' && window.requestAnimationFrame) {
+        window.requestAnimationFrame(fn);
+    } else {
+        setTimeout(fn, 16);
+    }
+}
+"""
+
+_QUIESCENCE_JS = _PROBE_JS + _SCHEDULE_JS + """
+var done = arguments[arguments.length - 1];
+var opts = arguments[0];
+var probe = window.__audatexWaitProbe;
+var start = Date.now();
+
+function svgReady() {
+    var root = opts.root ? document.querySelector(opts.root) : document;
+    if (!root) {
+        return false;
+    }
+    var svgs = root.querySelectorAll('svg');
+    if (svgs.length === 0) {
+        return false;
+    }
+    var ready = 0;
+    for (var i = 0; i < svgs.length; i++) {
+        if (svgs[i].querySelector('path, rect, circle, g')) {
+            ready++;
+        }
+    }
+    return ready >= Math.max(1, Math.floor(svgs.length * opts.svgRatio));
+}
+
+var checks = {
+    dom: function(now) { return now - probe.lastMutation >= opts.quietMs; },
+    network: function(now) { return probe.pending === 0 && now - probe.lastNetwork >= opts.quietMs; },
+    svg: svgReady
+};
+var active = Object.keys(opts.timeouts).filter(function(name) { return checks[name]; });
+var timedOut = [];
+
+function tick() {
+    var now = Date.now();
+    var elapsed = now - start;
+    var allMet = true;
+    active = active.filter(function(name) {
+        if (checks[name](now)) {
+            return true;
+        }
+        allMet = false;
+        if (elapsed >= opts.timeouts[name] * 1000) {
+            timedOut.push(name);
+            return false;
+        }
+        return true;
+    });
+    if (allMet || active.length === 0) {
+        done({ok: timedOut.length === 0, timedOut: timedOut, elapsed: elapsed});
+        return;
+    }
+    scheduleTick(tick);
+}
+tick();
+"""
+
+_SELECTOR_JS = _SCHEDULE_JS + """
+var done = arguments[arguments.length - 1];
+var selector = arguments[0];
+var visible = arguments[1];
+var timeoutMs = arguments[2] * 1000;
+var finished = false;
+var observer = null;
+
+function matches() {
+    var el = document.querySelector(selector);
+    if (!el) {
+        return false;
+    }
+    if (!visible) {
+        return true;
+    }
+    var rect = el.getBoundingClientRect();
+    var style = window.getComputedStyle(el);
+    return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+}
+
+function finish(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    done(result);
+}
+
+if (matches()) {
+    finish(true);
+} else {
+    observer = new MutationObserver(function() {
+        if (matches()) {
+            finish(true);
+        }
+    });
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, attributes: visible
+    });
+    setTimeout(function() { finish(matches()); }, timeoutMs);
+}
+"""
+
+_FRAMES_JS = _SCHEDULE_JS + """
+var done = arguments[arguments.length - 1];
+var remaining = arguments[0];
+function tick() {
+    remaining--;
+    if (remaining <= 0) {
+        done(true);
+        return;
+    }
+    scheduleTick(tick);
+}
+scheduleTick(tick);
+"""
+
+
+def _run_async(driver, script, timeout, *args):
+    # Таймаут скриптов общий для драйвера: после ожидания возвращаем прежний
+    try:
+        previous_timeout = driver.timeouts.script
+    except Exception:
+        previous_timeout = None
+    driver.set_script_timeout(timeout + SCRIPT_TIMEOUT_MARGIN)
+    try:
+        return driver.execute_async_script(script, *args)
+    finally:
+        if previous_timeout is not None:
+            try:
+                driver.set_script_timeout(previous_timeout)
+            except WebDriverException as e:
+                logger.debug(f"⚠️ Не удалось восстановить таймаут скриптов: {e}")
+
+
+def install_wait_probe(driver):
+    """
+    Устанавливает зонд мутаций и сетевых запросов в текущий документ.
+
+    Повторный вызов в том же документе ничего не делает. После перехода на
+    новую страницу или переключения фрейма зонд ставится заново.
+
+    Args:
+        driver: WebDriver - экземпляр браузера
+
+    Returns:
+        bool - True если зонд установлен
+    """
+    try:
+        driver.execute_script(_PROBE_JS)
+        return True
+    except WebDriverException as e:
+        logger.debug(f"⚠️ Не удалось установить зонд ожиданий: {e}")
+        return False
+
+
+def wait_for_quiescence(driver, timeouts=None, root_selector=None, quiet_ms=DEFAULT_QUIET_MS,
+                        svg_ratio=DEFAULT_SVG_RATIO, label=""):
+    """
+    Ждёт одновременного выполнения условий готовности страницы.
+
+    Args:
+        driver: WebDriver - экземпляр браузера
+        timeouts: dict|None - таймауты условий в секундах, например {"dom": 5, "svg": 10}
+        root_selector: str|None - CSS селектор корня для условия svg
+        quiet_ms: int - окно тишины DOM/сети в миллисекундах
+        svg_ratio: float - доля SVG, которые должны быть готовы
+        label: str - подпись для логов
+
+    Returns:
+        bool - True если все условия выполнены до истечения своих таймаутов
+    """
+    timeouts = timeouts or DEFAULT_TIMEOUTS
+    opts = {
+        "timeouts": timeouts,
+        "root": root_selector,
+        "quietMs": quiet_ms,
+        "svgRatio": svg_ratio,
+    }
+    started = time.time()
+    try:
+        result = _run_async(driver, _QUIESCENCE_JS, max(timeouts.values()), opts) or {}
+    except WebDriverException as e:
+        logger.warning(f"⚠️ Ожидание готовности{f' ({label})' if label else ''} прервано: {e}")
+        return False
+
+    elapsed = time.time() - started
+    if result.get("ok"):
+        logger.debug(f"✅ Страница готова{f' ({label})' if label else ''} за {elapsed:.2f}с")
+        return True
+    logger.warning(f"⚠️ Истек таймаут условий {result.get('timedOut', [])}{f' ({label})' if label else ''} "
+                   f"через {elapsed:.2f}с, продолжаем")
+    return False
+
+
+def wait_for_dom_quiet(driver, timeout=DEFAULT_TIMEOUTS["dom"], quiet_ms=DEFAULT_QUIET_MS,
+                       network_timeout=None, label=""):
+    """
+    Ждёт успокоения DOM и, если задан network_timeout, завершения сетевых запросов.
+
+    Args:
+        driver: WebDriver - экземпляр браузера
+        timeout: float - таймаут условия dom в секундах
+        quiet_ms: int - окно тишины в миллисекундах
+        network_timeout: float|None - таймаут условия network в секундах
+        label: str - подпись для логов
+
+    Returns:
+        bool - True если DOM успокоился
+    """
+    timeouts = {"dom": timeout}
+    if network_timeout:
+        timeouts["network"] = network_timeout
+    return wait_for_quiescence(driver, timeouts, quiet_ms=quiet_ms, label=label)
+
+
+def wait_for_svg_ready(driver, root_selector=None, timeout=10, dom_timeout=DEFAULT_TIMEOUTS["dom"],
+                       quiet_ms=DEFAULT_QUIET_MS, svg_ratio=DEFAULT_SVG_RATIO, label=""):
+    """
+    Ждёт, пока SVG внутри root_selector отрисуют графику и DOM успокоится.
+
+    Args:
+        driver: WebDriver - экземпляр браузера
+        root_selector: str|None - CSS селектор контейнера SVG (по умолчанию весь документ)
+        timeout: float - таймаут условия svg в секундах
+        dom_timeout: float - таймаут условия dom в секундах
+        quiet_ms: int - окно тишины в миллисекундах
+        svg_ratio: float - доля SVG, которые должны быть готовы
+        label: str - подпись для логов
+
+    Returns:
+        bool - True если SVG готовы и DOM стабилен
+    """
+    return wait_for_quiescence(
+        driver, {"svg": timeout, "dom": dom_timeout},
+        root_selector=root_selector, quiet_ms=quiet_ms, svg_ratio=svg_ratio, label=label
+    )
+
+
+def wait_for_selector(driver, selector, timeout=10, visible=False):
+    """
+    Ждёт появления элемента по селектору, реагируя на мутации DOM без опроса.
+
+    При ошибке выполнения асинхронного скрипта использует WebDriverWait.
+
+    Args:
+        driver: WebDriver - экземпляр браузера
+        selector: str - CSS селектор
+        timeout: float - таймаут в секундах
+        visible: bool - требовать видимость элемента
+
+    Returns:
+        bool - True если элемент появился
+    """
+    try:
+        return bool(_run_async(driver, _SELECTOR_JS, timeout, selector, visible, timeout))
+    except WebDriverException as e:
+        logger.debug(f"⚠️ Событийное ожидание '{selector}' недоступно, используем опрос: {e}")
+    condition = EC.visibility_of_element_located if visible else EC.presence_of_element_located
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(condition((By.CSS_SELECTOR, selector)))
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_for_animation_frames(driver, frames=2, timeout=2):
+    """
+    Ждёт отрисовки нескольких кадров (например, после scrollIntoView).
+
+    Args:
+        driver: WebDriver - экземпляр браузера
+        frames: int - количество кадров
+        timeout: float - таймаут в секундах
+
+    Returns:
+        bool - True если кадры отрисованы
+    """
+    try:
+        return bool(_run_async(driver, _FRAMES_JS, timeout, frames))
+    except WebDriverException as e:
+        logger.debug(f"⚠️ Не удалось дождаться кадров отрисовки: {e}")
+        return False
+
+
+def get_dom_idle_ms(driver):
+    """
+    Возвращает время в миллисекундах с последней мутации DOM текущего документа.
+
+    Args:
+        driver: WebDriver - экземпляр браузера
+
+    Returns:
+        int - миллисекунды с последней мутации (0 если зонд недоступен)
+    """
+    try:
+        return driver.execute_script(
+            _PROBE_JS + "return Date.now() - window.__audatexWaitProbe.lastMutation;"
+        ) or 0
+    except WebDriverException as e:
+        logger.debug(f"⚠️ Не удалось получить время простоя DOM: {e}")
+        return 0
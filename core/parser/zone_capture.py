@@ -0,0 +1,198 @@
+"""
+Параллельный сбор зон несколькими драйверами одной сессии
+
+Основной драйвер обрабатывает зоны как раньше, а дополнительные драйверы
+получают cookies основной сессии, открывают ту же страницу повреждений и
+забирают зоны из общей очереди. Результаты собираются по индексу исходного
+списка, поэтому порядок zone_data не зависит от того, какой драйвер
+обработал зону. При workers=1 выполняется обычный последовательный обход.
+
+Основные функции:
+    * capture_zones: Обрабатывает зоны одним или несколькими драйверами
+    * open_zone_worker: Создаёт дополнительный драйвер с cookies основной сессии
+"""
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .constants import BASE_URL
+from .browser import init_browser, quit_driver
+from .navigation import NavigationPlanner
+from .deadline import ClaimTimeoutError
+from .memory_monitor import memory_monitor
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserClosedError(Exception):
+    """Браузер закрылся во время обработки зон"""
+
+
+def _is_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def open_zone_worker(cookies, damage_url, worker_name):
+    """
+    Создаёт дополнительный драйвер, переносит в него cookies основной сессии
+    и открывает дерево зон на странице повреждений.
+
+    Returns:
+        WebDriver|None - готовый драйвер или None если открыть не удалось
+    """
+    worker = init_browser()
+    if not worker:
+        logger.warning(f"⚠️ [{worker_name}] Не удалось создать дополнительный драйвер")
+        return None
+    try:
+        worker.get(BASE_URL)
+        for cookie in cookies or []:
+            try:
+                worker.add_cookie(cookie)
+            except Exception as e:
+                logger.debug(f"[{worker_name}] Не удалось добавить cookie {cookie.get('name')}: {e}")
+
+        zones = NavigationPlanner(worker, damage_url).open_zone_navigation(f"zones:{worker_name}")
+        if not zones:
+            raise RuntimeError("дерево зон не открылось")
+        logger.info(f"✅ [{worker_name}] Дополнительный драйвер готов, зон в дереве: {len(zones)}")
+        return worker
+    except Exception as e:
+        logger.warning(f"⚠️ [{worker_name}] Дополнительный драйвер не подготовлен: {e}")
+        quit_driver(worker)
+        return None
+
+
+def capture_zones(driver, zones, process_zone_fn, workers=1, damage_url=None, cookies=None,
+                  deadline=None, preloaded=None):
+    """
+    Обрабатывает зоны основным и дополнительными драйверами.
+
+    Args:
+        driver: WebDriver - основной драйвер, уже открывший дерево зон
+        zones: list - зоны в исходном порядке
+        process_zone_fn: callable(driver, zone) -> list - обработка одной зоны
+        workers: int - общее число драйверов (1 - последовательный обход)
+        damage_url: str - URL страницы повреждений для дополнительных драйверов
+        cookies: list - cookies основной сессии
+        deadline: ClaimDeadline|None - бюджет заявки, дополнительные драйверы
+            регистрируются у его сторожа
+        preloaded: dict|None - {индекс зоны: zone_result} для зон, уже собранных
+            до контрольной точки; они не обрабатываются повторно
+
+    Returns:
+        list - zone_data в исходном порядке зон
+
+    Raises:
+        BrowserClosedError - если закрылся основной браузер
+        ClaimTimeoutError - если исчерпан бюджет времени заявки
+    """
+    results = [None] * len(zones)
+    for index, zone_result in (preloaded or {}).items():
+        results[index] = zone_result
+    pending = deque(i for i in range(len(zones)) if results[i] is None)
+    lock = threading.Lock()
+    main_closed = threading.Event()
+
+    def merged():
+        zone_data = []
+        for zone_result in results:
+            if zone_result:
+                zone_data.extend(zone_result)
+        return zone_data
+
+    def take():
+        with lock:
+            if main_closed.is_set() or (deadline and deadline.timed_out):
+                return None
+            return pending.popleft() if pending else None
+
+    def run(worker_driver, worker_name, is_main):
+        """Returns: bool - True если драйвер нужно пересоздать по памяти"""
+        processed = 0
+        recycle = False
+        while True:
+            index = take()
+            if index is None:
+                break
+            zone = zones[index]
+            if not _is_alive(worker_driver):
+                with lock:
+                    pending.appendleft(index)
+                if is_main:
+                    logger.error(f"❌ Браузер закрыт во время обработки зоны {zone.get('title', 'Unknown')}")
+                    main_closed.set()
+                else:
+                    logger.warning(f"⚠️ [{worker_name}] Драйвер закрыт, зона {zone.get('title', 'Unknown')} возвращена в очередь")
+                break
+            try:
+                zone_result = process_zone_fn(worker_driver, zone)
+            except ClaimTimeoutError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ [{worker_name}] Ошибка при обработке зоны {zone.get('title', 'Unknown')}: {e}")
+                zone_result = []
+            processed += 1
+            with lock:
+                results[index] = zone_result
+            # Дополнительный драйвер, превысивший порог памяти, пересоздаётся между зонами
+            if not is_main and memory_monitor.needs_recycle(worker_driver):
+                recycle = True
+                break
+        logger.info(f"🧩 [{worker_name}] Обработано зон: {processed}")
+        return recycle
+
+    def run_helper(worker_index):
+        worker_name = f"zone-worker-{worker_index}"
+        recycle = True
+        while recycle and pending:
+            if not memory_monitor.host_has_capacity(f"[{worker_name}] Дополнительный драйвер"):
+                return
+            worker_driver = open_zone_worker(cookies, damage_url, worker_name)
+            if not worker_driver:
+                return
+            memory_monitor.label_driver(worker_driver, worker_name)
+            if deadline:
+                deadline.register_driver(worker_driver)
+            recycle = False
+            try:
+                recycle = run(worker_driver, worker_name, is_main=False)
+            except ClaimTimeoutError:
+                logger.warning(f"⏰ [{worker_name}] Бюджет времени заявки исчерпан, драйвер останавливается")
+            finally:
+                if deadline:
+                    deadline.unregister_driver(worker_driver)
+                if quit_driver(worker_driver):
+                    logger.info(f"🔚 [{worker_name}] Дополнительный драйвер закрыт")
+            if recycle:
+                logger.info(f"♻️ [{worker_name}] Драйвер пересоздаётся из-за превышения порога памяти")
+
+    if preloaded:
+        logger.info(f"♻️ Зон из контрольной точки: {len(zones) - len(pending)}, к обработке: {len(pending)}")
+    helpers = min(max(workers, 1), len(pending)) - 1 if damage_url else 0
+    if helpers <= 0:
+        run(driver, "main", is_main=True)
+    else:
+        logger.info(f"🧩 Параллельный сбор зон: {len(zones)} зон, драйверов {helpers + 1}")
+        with ThreadPoolExecutor(max_workers=helpers, thread_name_prefix="zone-worker") as executor:
+            futures = [executor.submit(run_helper, i + 1) for i in range(helpers)]
+            run(driver, "main", is_main=True)
+            for future in futures:
+                future.result()
+
+        # Зоны, возвращённые упавшими дополнительными драйверами, добирает основной
+        if pending and not main_closed.is_set():
+            logger.info(f"🧩 Основной драйвер добирает {len(pending)} зон")
+            run(driver, "main", is_main=True)
+
+    if deadline:
+        deadline.check("zones")
+    if main_closed.is_set():
+        raise BrowserClosedError("Браузер был закрыт во время выполнения")
+
+    return merged()
@@ -1,10 +1,11 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
 from core.queue.redis_manager import redis_manager
 from core.queue.queue_processor import queue_processor
+from core.parser.refresh import RefreshPlan
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,11 @@ class QueueRequest(BaseModel):
     claim_number: str = ""
     vin_number: str = ""
     svg_collection: bool = True
+    # Профиль только данных: без скриншотов и SVG (по умолчанию DATA_ONLY_PROFILE)
+    data_only: Optional[bool] = None
+    # Частичное обновление: этапы (main_screenshot, options, zones) и названия зон
+    stages: Optional[List[str]] = None
+    zone_titles: Optional[List[str]] = None
 
 
 class QueueResponse(BaseModel):
@@ -49,12 +55,22 @@ async def add_request_to_queue(request: QueueRequest, request_obj: Request):
         if not request.claim_number and not request.vin_number:
             raise HTTPException(status_code=400, detail="Необходимо указать номер дела или VIN")
         
+        # Проверяем выбор этапов частичного обновления
+        try:
+            refresh_plan = RefreshPlan(request.stages, request.zone_titles)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         # Формируем данные заявки
         request_data = {
             "claim_number": request.claim_number,
             "vin_number": request.vin_number,
-            "svg_collection": request.svg_collection
+            "svg_collection": request.svg_collection and not request.data_only
         }
+        if request.data_only is not None:
+            request_data["data_only"] = request.data_only
+        if refresh_plan.is_partial:
+            request_data.update(refresh_plan.as_dict())
         
         # Добавляем в очередь
         success = redis_manager.add_request_to_queue(request_data)
@@ -303,4 +319,37 @@ async def check_redis_health(request: Request):
             success=False,
             message="Ошибка проверки Redis",
             data={"redis_status": "error", "error": str(e)}
-        ) 
\ No newline at end of file
+        ) 
+
+@router.get("/memory", response_model=QueueResponse)
+async def get_driver_memory(request: Request):
+    """Временные ряды памяти драйверов Chrome для планирования мощностей"""
+    # Проверяем токен сессии
+    from core.auth.db_auth import validate_session
+    session_token = request.cookies.get("session_token")
+    if not session_token:
+        raise HTTPException(
+            status_code=401,
+            detail="Не авторизован"
+        )
+    
+    user_data = validate_session(session_token)
+    if not user_data:
+        raise HTTPException(
+            status_code=401,
+            detail="Недействительная сессия"
+        )
+    try:
+        from core.parser.memory_monitor import memory_monitor
+        data = memory_monitor.stats()
+        data["series"] = memory_monitor.series()
+        
+        return QueueResponse(
+            success=True,
+            message="Память драйверов получена",
+            data=data
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Ошибка получения памяти драйверов: {e}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
@@ -6,6 +6,14 @@ import time
 
 from core.queue.redis_manager import redis_manager
 from core.parser.parser import login_audatex
+from core.parser.constants import CLAIM_DEADLINE_SECONDS
+from core.parser.deadline import ClaimDeadline, TIMEOUT_ERROR_TYPE
+from core.parser.browser import cleanup_orphaned_profiles
+from core.parser.artifact_store import prune_store
+from core.parser.folder_manager import get_claim_folders
+from core.parser.progress_journal import journal_path, journal_progress
+from core.parser.memory_monitor import memory_monitor
+from core.parser.refresh import RefreshPlan
 from core.database.requests import (
     save_parser_data_to_db, update_json_with_claim_number, save_updated_json_to_file,
     get_schedule_settings, is_time_in_working_hours, get_time_to_start
@@ -13,6 +21,12 @@ from core.database.requests import (
 
 logger = logging.getLogger(__name__)
 
+# Запас сверх бюджета заявки: за это время сторож парсера должен сам завершить драйверы
+PARSER_TASK_GRACE_SECONDS = 120
+# Лимит повторов для заявок, остановленных по бюджету времени
+MAX_TIMEOUT_RETRIES = 3
+MAX_ERROR_RETRIES = 10
+
 
 class QueueProcessor:
     """Процессор для обработки очереди заявок"""
@@ -21,6 +35,7 @@ class QueueProcessor:
         self.is_running = False
         self.current_task = None
         self.current_parser_task = None  # Текущая задача парсера
+        self.current_request = None  # (номер дела, VIN) заявки в обработке
         self.processed_count = 0
         self.failed_count = 0
         self.stop_requested = False  # Флаг запроса остановки
@@ -35,6 +50,18 @@ class QueueProcessor:
         self.stop_requested = False
         logger.info("🚀 Запуск обработки очереди заявок")
         
+        # Профили Chrome, оставшиеся от аварийно завершенных драйверов
+        try:
+            cleanup_orphaned_profiles()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка очистки осиротевших профилей Chrome: {e}")
+        
+        # Содержимое хранилища SVG, на которое больше не ссылается ни одна заявка
+        try:
+            prune_store()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка очистки хранилища артефактов: {e}")
+        
         # Восстанавливаем прерванные заявки при запуске
         interrupted_requests = redis_manager.restore_interrupted_requests()
         if interrupted_requests:
@@ -90,6 +117,11 @@ class QueueProcessor:
                             if hasattr(self, '_non_working_hours_logged'):
                                 delattr(self, '_non_working_hours_logged')
                 
+                # Новая заявка не запускается, пока у хоста мало свободной памяти
+                if not memory_monitor.host_has_capacity("Новая заявка"):
+                    await asyncio.sleep(30)
+                    continue
+                
                 # Берем следующую заявку
                 request_data = redis_manager.get_next_request()
                 if not request_data:
@@ -108,25 +140,50 @@ class QueueProcessor:
         """Обработка одной заявки"""
         claim_number = request_data.get('claim_number', '')
         vin_number = request_data.get('vin_number', '')
-        svg_collection = request_data.get('svg_collection', True)
+        svg_collection = request_data.get('svg_collection', True) and not request_data.get('data_only')
         username = request_data.get('username', '')
         password = request_data.get('password', '')
         
         logger.info(f"🔄 Обработка заявки: {claim_number} | VIN: {vin_number}")
+        self.current_request = (claim_number, vin_number)
         
         try:
             # Запускаем парсер с московским временем
             from core.database.models import get_moscow_time
             started_at = get_moscow_time()
+            deadline = ClaimDeadline(f"{claim_number}_{vin_number}")
             
             # Создаем задачу для парсера
             self.current_parser_task = asyncio.create_task(
-                self._run_parser(claim_number, vin_number, svg_collection, username, password, started_at)
+                self._run_parser(
+                    claim_number, vin_number, svg_collection, username, password, started_at,
+                    run_generation=request_data.get('run_generation'),
+                    refresh=RefreshPlan.from_request(request_data),
+                    data_only=request_data.get('data_only'),
+                    deadline=deadline
+                )
             )
             
-            # Ждем завершения без таймаута - заявка должна работать без ограничений
+            # Бюджет времени контролирует сторож внутри парсера, здесь - страховочный таймаут
             try:
-                result = await self.current_parser_task
+                try:
+                    result = await asyncio.wait_for(
+                        self.current_parser_task,
+                        timeout=CLAIM_DEADLINE_SECONDS + PARSER_TASK_GRACE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Отмена задачи не останавливает поток парсера: останавливаем заявку
+                    # и завершаем её драйверы до повторной попытки
+                    reason = f"Парсер не завершился за {CLAIM_DEADLINE_SECONDS + PARSER_TASK_GRACE_SECONDS} с"
+                    killed = await asyncio.get_running_loop().run_in_executor(None, deadline.abort, reason)
+                    logger.error(
+                        f"⏰ Парсер заявки {claim_number} не завершился за бюджет времени, задача отменена, "
+                        f"завершено процессов драйверов: {killed}"
+                    )
+                    result = {
+                        "error": reason,
+                        "error_type": TIMEOUT_ERROR_TYPE
+                    }
                 
                 completed_at = get_moscow_time()
                 duration = (completed_at - started_at).total_seconds()
@@ -143,7 +200,10 @@ class QueueProcessor:
                         redis_manager.mark_request_completed(request_data, success=True)
                     elif process_result == 'parser_error':
                         # Возвращаем заявку в очередь для повторной попытки
-                        await self._handle_parser_error(request_data, "Ошибка парсера")
+                        await self._handle_parser_error(
+                            request_data, result.get("error", "Ошибка парсера"),
+                            error_type=result.get("error_type")
+                        )
                     else:
                         self.failed_count += 1
                         logger.error(f"❌ Неизвестный результат обработки: {claim_number}")
@@ -164,6 +224,7 @@ class QueueProcessor:
         finally:
             # Очищаем ссылку на текущую задачу парсера
             self.current_parser_task = None
+            self.current_request = None
             
             # Проверяем время работы после обработки заявки
             try:
@@ -189,11 +250,18 @@ class QueueProcessor:
             except Exception as e:
                 logger.error(f"❌ Ошибка проверки времени работы: {e}")
     
-    async def _run_parser(self, claim_number: str, vin_number: str, svg_collection: bool, username: str, password: str, started_at: datetime = None) -> Optional[Dict[str, Any]]:
+    async def _run_parser(self, claim_number: str, vin_number: str, svg_collection: bool, username: str, password: str, started_at: datetime = None,
+                          run_generation: Optional[str] = None, refresh: Optional[RefreshPlan] = None,
+                          data_only: Optional[bool] = None,
+                          deadline: Optional[ClaimDeadline] = None) -> Optional[Dict[str, Any]]:
         """Запуск парсера для заявки"""
         try:
             # Запускаем парсер с учетными данными
-            result = await login_audatex(username, password, claim_number, vin_number, svg_collection, started_at)
+            result = await login_audatex(
+                username, password, claim_number, vin_number, svg_collection, started_at,
+                run_generation=run_generation, refresh=refresh, data_only=data_only,
+                deadline=deadline
+            )
             return result
             
         except Exception as e:
@@ -326,7 +394,9 @@ class QueueProcessor:
             db_success = await save_parser_data_to_db(
                 updated_json, clean_claim_number, clean_vin_number, 
                 is_success=True, started_at=started_at, completed_at=completed_at,
-                file_path=file_path, svg_collection=request_data.get('svg_collection', True)
+                file_path=file_path,
+                svg_collection=request_data.get('svg_collection', True) and not (parser_result.get("stage_timings") or {}).get("data_only"),
+                refresh=parser_result.get("refresh")
             )
             if not db_success:
                 logger.error(f"Не удалось сохранить данные в БД: {clean_claim_number}_{clean_vin_number}")
@@ -353,17 +423,28 @@ class QueueProcessor:
         redis_manager.clear_queue()
         logger.info("🗑️ Очередь очищена")
     
-    async def _handle_parser_error(self, request_data: Dict[str, Any], error_message: str):
-        """Обработка ошибки парсера с повторными попытками"""
+    async def _handle_parser_error(self, request_data: Dict[str, Any], error_message: str,
+                                   error_type: Optional[str] = None):
+        """
+        Обработка ошибки парсера с повторными попытками.
+        Таймауты считаются отдельным счетчиком с меньшим лимитом: заявка,
+        которая зависает раз за разом, не должна занимать очередь 10 раз.
+        """
         claim_number = request_data.get('claim_number', '')
         vin_number = request_data.get('vin_number', '')
         key = f"{claim_number}_{vin_number}"
+        timeout_key = f"{key}_timeout"
         
         # Увеличиваем счетчик ошибок
-        error_count = redis_manager._increment_error_count(key)
-        logger.warning(f"⚠️ Ошибка для {key}: {error_message} (попытка {error_count}/10)")
+        if error_type == TIMEOUT_ERROR_TYPE:
+            error_count = redis_manager._increment_error_count(timeout_key)
+            max_retries = MAX_TIMEOUT_RETRIES
+        else:
+            error_count = redis_manager._increment_error_count(key)
+            max_retries = MAX_ERROR_RETRIES
+        logger.warning(f"⚠️ Ошибка для {key}: {error_message} (попытка {error_count}/{max_retries})")
         
-        if error_count >= 10:
+        if error_count >= max_retries:
             # Достигнут лимит попыток - сохраняем как неудачную в БД
             logger.error(f"❌ Заявка {key} достигла лимита ошибок ({error_count}), сохраняем как nsvg")
             
@@ -379,7 +460,8 @@ class QueueProcessor:
                 "options_data": {"success": False, "zones": []},
                 "claim_number": claim_number,
                 "success": False,
-                "error": error_message
+                "error": error_message,
+                "error_type": error_type
             }
             
             # Сохраняем в БД как неудачную
@@ -388,27 +470,32 @@ class QueueProcessor:
             completed_at = get_moscow_time()
             
             try:
-                from core.database.requests import save_parser_data_to_db
-                success = await save_parser_data_to_db(
-                    failed_result, claim_number, vin_number, 
-                    is_success=False, started_at=started_at, completed_at=completed_at,
-                    svg_collection=request_data.get('svg_collection', True)
-                )
-                if success:
-                    logger.info(f"✅ Неудачная заявка {key} сохранена в БД как nsvg")
+                if RefreshPlan.from_request(request_data).is_partial:
+                    # Неудачное частичное обновление не затирает существующую запись
+                    logger.warning(f"⚠️ Частичное обновление {key} не удалось, существующая запись в БД сохранена")
                 else:
-                    logger.error(f"❌ Не удалось сохранить неудачную заявку {key} в БД")
+                    from core.database.requests import save_parser_data_to_db
+                    success = await save_parser_data_to_db(
+                        failed_result, claim_number, vin_number, 
+                        is_success=False, started_at=started_at, completed_at=completed_at,
+                        svg_collection=request_data.get('svg_collection', True)
+                    )
+                    if success:
+                        logger.info(f"✅ Неудачная заявка {key} сохранена в БД как nsvg")
+                    else:
+                        logger.error(f"❌ Не удалось сохранить неудачную заявку {key} в БД")
             except Exception as e:
                 logger.error(f"❌ Ошибка сохранения неудачной заявки {key} в БД: {e}")
             
-            # Очищаем счетчик ошибок
+            # Очищаем счетчики ошибок
             redis_manager._clear_error_count(key)
+            redis_manager._clear_error_count(timeout_key)
             
             # Отмечаем как завершенную с неудачей
             redis_manager.mark_request_completed(request_data, success=False)
         else:
             # Возвращаем заявку в конец очереди для повторной попытки
-            logger.info(f"🔄 Возвращаем заявку {key} в очередь для повторной попытки ({error_count}/10)")
+            logger.info(f"🔄 Возвращаем заявку {key} в очередь для повторной попытки ({error_count}/{max_retries})")
             redis_manager.add_request_to_queue(request_data)
             
             # Удаляем из обработки
@@ -421,8 +508,23 @@ class QueueProcessor:
             "processed_count": self.processed_count,
             "failed_count": self.failed_count,
             "queue_length": redis_manager.get_queue_length(),
-            "processing_count": len(redis_manager.get_processing_requests())
+            "processing_count": len(redis_manager.get_processing_requests()),
+            "memory": memory_monitor.stats(),
+            "current": self._current_progress()
         }
+    
+    def _current_progress(self) -> Optional[Dict[str, Any]]:
+        """Прогресс заявки в обработке по журналу прогресса"""
+        if not self.current_request:
+            return None
+        claim_number, vin_number = self.current_request
+        progress = {"claim_number": claim_number, "vin_number": vin_number}
+        try:
+            data_dir = get_claim_folders(claim_number, vin_number)[2]
+            progress.update(journal_progress(journal_path(data_dir, claim_number)) or {})
+        except Exception as e:
+            logger.debug(f"Не удалось прочитать журнал прогресса {claim_number}: {e}")
+        return progress
 
 
 # Глобальный экземпляр процессора
@@ -3,6 +3,7 @@ import json
 import logging
 import asyncio
 import os
+import uuid
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from core.database.requests import save_parser_data_to_db
@@ -52,6 +53,10 @@ class RedisQueueManager:
         try:
             request_data['added_at'] = get_moscow_time().isoformat()
             request_data['status'] = 'pending'
+            # Поколение запуска сохраняется при повторных попытках, чтобы парсер
+            # мог продолжить заявку с контрольной точки
+            if not request_data.get('run_generation'):
+                request_data['run_generation'] = uuid.uuid4().hex
             
             # Добавляем в очередь (список)
             self.redis_client.lpush(self.queue_key, json.dumps(request_data))
@@ -105,6 +105,27 @@ function downloadSVG(svgPath, filename) {
     document.body.removeChild(link);
 }
 
+// Уменьшенные копии PNG скриншота (WebP) для srcset; для SVG копий нет
+function thumbnailSrcset(path, widths) {
+    if (!path || !path.startsWith('/static/screenshots/') || !path.endsWith('.png')) {
+        return '';
+    }
+    const relative = path.slice('/static/'.length, -'.png'.length);
+    return widths.map(width => `/static/thumbnails/${width}/${relative}.webp ${width}w`).join(', ');
+}
+
+// Показывает изображение в окне просмотра вместе с его уменьшенными копиями
+function showScreenshot(img, path) {
+    const widths = (img.getAttribute('data-thumbnail-widths') || '').split(',').filter(Boolean);
+    const srcset = thumbnailSrcset(path, widths);
+    if (srcset) {
+        img.srcset = srcset;
+    } else {
+        img.removeAttribute('srcset');
+    }
+    img.src = path;
+}
+
 // Инициализация при загрузке страницы
 document.addEventListener('DOMContentLoaded', function() {
     // Получаем данные зон из глобальной переменной
@@ -128,7 +149,7 @@ document.addEventListener('DOMContentLoaded', function() {
             if (mainScreenshot) {
                 // Возвращаем основной скриншот
                 const originalSrc = mainScreenshot.getAttribute('data-original-src') || mainScreenshot.src;
-                mainScreenshot.src = originalSrc;
+                showScreenshot(mainScreenshot, originalSrc);
             }
         });
     }
@@ -149,7 +170,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
             if (zone && mainScreenshot && detailsList) {
                 const screenshotPath = zone.screenshot_path || mainScreenshot.getAttribute('data-original-src');
-                mainScreenshot.src = screenshotPath;
+                showScreenshot(mainScreenshot, screenshotPath);
 
                 detailsList.innerHTML = '';
                 let hasContent = false;
@@ -173,7 +194,7 @@ document.addEventListener('DOMContentLoaded', function() {
                             detailsList.querySelectorAll('.item-button').forEach(btn => btn.classList.remove('active'));
                             detailButton.classList.add('active');
                             const detailSvgPath = detail.svg_path || zone.screenshot_path;
-                            mainScreenshot.src = detailSvgPath;
+                            showScreenshot(mainScreenshot, detailSvgPath);
                         });
                         detailsList.appendChild(detailSection);
                     });
@@ -201,7 +222,7 @@ document.addEventListener('DOMContentLoaded', function() {
                                     detailsList.querySelectorAll('.item-button').forEach(btn => btn.classList.remove('active'));
                                     workButton.classList.add('active');
                                     const workSvgPath = work.svg_path || zone.screenshot_path;
-                                    mainScreenshot.src = workSvgPath;
+                                    showScreenshot(mainScreenshot, workSvgPath);
                                 });
                                 detailsList.appendChild(pictogramSection);
                             });
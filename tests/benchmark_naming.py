@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import re
+import timeit
+from transliterate import translit
+from core.parser.naming import safe_file_name, grouped_name_length
+
+MAX_FILENAME_LENGTH = 255
+
+
+def legacy_safe_name(text, keep_commas=False):
+    """Прежнее вычисление имени файла без кеша"""
+    pattern = r'[^\w\s,-]' if keep_commas else r'[^\w\s-]'
+    safe_name = translit(re.sub(pattern, '', text).strip(), 'ru', reversed=True).replace(" ", "_").replace("/", "_").lower()
+    return re.sub(r'\.+', '', safe_name)
+
+
+def legacy_groups(detail):
+    """Прежняя группировка длинного названия: транслитерация каждой группы-кандидата"""
+    groups, current_group = [], []
+    for detail_item in [d.strip() for d in detail.split(',') if d.strip()]:
+        if len(legacy_safe_name(",".join(current_group + [detail_item]), keep_commas=True)) <= MAX_FILENAME_LENGTH:
+            current_group.append(detail_item)
+        else:
+            if current_group:
+                groups.append(current_group)
+            current_group = [detail_item]
+    if current_group:
+        groups.append(current_group)
+    return groups
+
+
+def cached_groups(detail):
+    """Группировка через core.parser.naming"""
+    groups, current_group = [], []
+    for detail_item in [d.strip() for d in detail.split(',') if d.strip()]:
+        if grouped_name_length(current_group + [detail_item]) <= MAX_FILENAME_LENGTH:
+            current_group.append(detail_item)
+        else:
+            if current_group:
+                groups.append(current_group)
+            current_group = [detail_item]
+    if current_group:
+        groups.append(current_group)
+    return groups
+
+
+def generate_titles(count=200, seed=42):
+    """Названия деталей, похожие на data-title зон, включая длинные группы"""
+    rng = random.Random(seed)
+    words = ["Бампер", "передний", "задний", "Крыло", "левое", "правое", "Дверь", "Молдинг",
+             "Кронштейн", "фары", "Щиток", "Уплотнитель", "стекла", "(к-т)", "Шарнир", "верх.", "н/з"]
+    titles = []
+    for i in range(count):
+        name = " ".join(rng.choice(words) for _ in range(rng.randint(2, 5)))
+        if i % 10 == 0:
+            name = ", ".join(f"{name} {n}" for n in range(rng.randint(20, 60)))
+        titles.append(name)
+    return titles
+
+
+def run_benchmark(rounds=5):
+    titles = generate_titles()
+    long_titles = [t for t in titles if len(legacy_safe_name(t)) > MAX_FILENAME_LENGTH]
+
+    # Результаты должны совпадать с прежней реализацией
+    for title in titles:
+        assert safe_file_name(title) == legacy_safe_name(title), title
+        assert safe_file_name(title, keep_commas=True) == legacy_safe_name(title, keep_commas=True), title
+    for title in long_titles:
+        assert cached_groups(title) == legacy_groups(title), title
+    print(f"✅ Имена совпадают: {len(titles)} названий, {len(long_titles)} длинных групп")
+
+    # Названия повторяются при обработке зоны, разбиении SVG и проверке деталей
+    legacy_names = min(timeit.repeat(lambda: [legacy_safe_name(t) for t in titles * 3], number=1, repeat=rounds))
+    cached_names = min(timeit.repeat(lambda: [safe_file_name(t) for t in titles * 3], number=1, repeat=rounds))
+    print(f"📊 Имена файлов: было {legacy_names * 1000:.2f} мс, стало {cached_names * 1000:.2f} мс "
+          f"(x{legacy_names / cached_names:.1f})")
+
+    legacy_grouping = min(timeit.repeat(lambda: [legacy_groups(t) for t in long_titles], number=1, repeat=rounds))
+    cached_grouping = min(timeit.repeat(lambda: [cached_groups(t) for t in long_titles], number=1, repeat=rounds))
+    print(f"📊 Группировка длинных названий: было {legacy_grouping * 1000:.2f} мс, стало {cached_grouping * 1000:.2f} мс "
+          f"(x{legacy_grouping / cached_grouping:.1f})")
+
+
+if __name__ == "__main__":
+    run_benchmark()
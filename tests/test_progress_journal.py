@@ -0,0 +1,212 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+from concurrent.futures import Future
+from core.parser.artifact_pipeline import ArtifactPipeline
+from core.parser.output_manager import load_resume_checkpoint
+from core.parser.progress_journal import (
+    ProgressJournal, journal_path, read_journal, journal_progress, zone_is_complete
+)
+
+CLAIM = "12345"
+
+
+def svg_zone(title, details=True):
+    return [{
+        "title": title,
+        "screenshot_path": f"/static/screenshots/{CLAIM}_ABC/zone_{title}.png",
+        "svg_path": f"/static/svgs/{CLAIM}_ABC/zone_{title}.svg",
+        "has_pictograms": False,
+        "graphics_not_available": False,
+        "details": [{"title": "Бампер", "svg_path": "/static/svgs/bamper.svg"}] if details else []
+    }]
+
+
+def pictogram_zone(title):
+    return [{
+        "title": title,
+        "screenshot_path": f"/static/screenshots/{CLAIM}_ABC/zone_{title}.png",
+        "svg_path": "",
+        "has_pictograms": True,
+        "graphics_not_available": False,
+        "details": [],
+        "pictograms": [{"section_name": "Кузов", "works": []}]
+    }]
+
+
+def placeholder_zone(title):
+    return [{
+        "title": title,
+        "screenshot_path": "",
+        "has_pictograms": False,
+        "graphics_not_available": True,
+        "details": []
+    }]
+
+
+def new_journal(data_dir, generation="gen-1", resume=False):
+    return ProgressJournal(journal_path(data_dir, CLAIM), generation, resume=resume)
+
+
+def test_journal_round_trip():
+    """Записи журнала читаются в порядке добавления"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        journal = new_journal(data_dir)
+        journal.start("/static/main.png", "/static/main.svg", None, 2, started_at="2025-01-01 10:00:00")
+        journal.record_zone("Перед", svg_zone("Перед"))
+        journal.record_options({"success": True, "zones": []})
+
+        records = read_journal(journal.path)
+        assert [record["type"] for record in records] == ["start", "zone", "options"]
+        assert records[0]["run_generation"] == "gen-1"
+        assert records[1]["entries"] == svg_zone("Перед")
+        assert journal_progress(journal.path)["zones_total"] == 2
+        assert journal_progress(journal.path)["zones_done"] == 1
+        assert journal_progress(journal.path)["last_zone"] == "Перед"
+
+
+def test_journal_restart_and_resume():
+    """Новый запуск начинает журнал заново, продолжение дописывает его"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        journal = new_journal(data_dir)
+        journal.start("", "", None, 1)
+        journal.record_zone("Перед", svg_zone("Перед"))
+
+        new_journal(data_dir, resume=True).record_zone("Зад", svg_zone("Зад"))
+        assert len(read_journal(journal.path)) == 3
+
+        new_journal(data_dir, resume=False)
+        assert read_journal(journal.path) == []
+
+
+def test_journal_torn_line():
+    """Оборванная строка пропускается при чтении и обрезается при продолжении"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        journal = new_journal(data_dir)
+        journal.start("", "", None, 2)
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"type": "zone", "title": "Пер')
+        assert len(read_journal(journal.path)) == 1
+
+        new_journal(data_dir, resume=True).record_zone("Зад", svg_zone("Зад"))
+        records = read_journal(journal.path)
+        assert [record["type"] for record in records] == ["start", "zone"]
+        assert records[1]["title"] == "Зад"
+
+
+def test_journal_discard():
+    """После итогового документа журнал удаляется и больше не пишется"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        journal = new_journal(data_dir)
+        journal.start("", "", None, 1)
+        journal.discard()
+        journal.record_zone("Перед", svg_zone("Перед"))
+        assert not os.path.exists(journal.path)
+        assert journal_progress(journal.path) is None
+
+
+def test_zone_is_complete():
+    assert zone_is_complete(svg_zone("Перед"))
+    assert zone_is_complete(pictogram_zone("Салон"))
+    assert not zone_is_complete([])
+    assert not zone_is_complete(placeholder_zone("Перед"))
+    assert not zone_is_complete(svg_zone("Перед", details=False))
+
+
+def test_resume_generation_mismatch():
+    """Журнал другого запуска и запуск без поколения не продолжаются"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        journal = new_journal(data_dir, "gen-1")
+        journal.start("/static/main.png", "", None, 1)
+        journal.record_zone("Перед", svg_zone("Перед"))
+
+        assert load_resume_checkpoint(data_dir, CLAIM, "gen-2") is None
+        assert load_resume_checkpoint(data_dir, CLAIM, None) is None
+        assert load_resume_checkpoint(data_dir, "other", "gen-1") is None
+        assert load_resume_checkpoint(data_dir, CLAIM, "gen-1") is not None
+
+
+def test_resume_skips_failed_zones():
+    """Пустые зоны, заглушки ошибок и SVG зоны без деталей собираются заново"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        journal = new_journal(data_dir)
+        journal.start("/static/main.png", "/static/main.svg", None, 5)
+        journal.record_zone("Перед", svg_zone("Перед"))
+        journal.record_zone("Салон", pictogram_zone("Салон"))
+        journal.record_zone("Пусто", [])
+        journal.record_zone("Ошибка", placeholder_zone("Ошибка"))
+        journal.record_zone("Без деталей", svg_zone("Без деталей", details=False))
+
+        resume = load_resume_checkpoint(data_dir, CLAIM, "gen-1")
+        assert set(resume["zone_entries"]) == {"Перед", "Салон"}
+        assert resume["zone_entries"]["Перед"] == svg_zone("Перед")
+        assert resume["main_screenshot_path"] == "/static/main.png"
+        assert resume["main_svg_path"] == "/static/main.svg"
+        assert resume["options_data"] is None
+
+
+def test_resume_latest_zone_record_wins():
+    """Повторная запись зоны заменяет предыдущую, ошибка отменяет готовую зону"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        journal = new_journal(data_dir)
+        journal.start("", "", None, 2)
+        journal.record_zone("Перед", placeholder_zone("Перед"))
+        journal.record_zone("Перед", svg_zone("Перед"))
+        journal.record_zone("Зад", svg_zone("Зад"))
+        journal.record_zone("Зад", placeholder_zone("Зад"))
+
+        resume = load_resume_checkpoint(data_dir, CLAIM, "gen-1")
+        assert set(resume["zone_entries"]) == {"Перед"}
+
+
+def test_resume_options():
+    """Опции берутся из последней успешной записи, неудачные игнорируются"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        journal = new_journal(data_dir)
+        journal.start("", "", {"success": False}, 1)
+        assert load_resume_checkpoint(data_dir, CLAIM, "gen-1")["options_data"] is None
+
+        options = {"success": True, "zones": [{"zone_name": "Кузов"}]}
+        journal.record_options(options)
+        journal.record_options({"success": False})
+        assert load_resume_checkpoint(data_dir, CLAIM, "gen-1")["options_data"] == options
+
+
+def test_zone_journaled_after_artifacts_saved():
+    """Зона попадает в журнал только после сохранения скриншота и разбиения SVG"""
+    pipeline = ArtifactPipeline()
+    zone_result = svg_zone("Перед", details=False)
+    screenshot, svg = Future(), Future()
+    pipeline._jobs[zone_result[0]["screenshot_path"]] = screenshot
+    pipeline._zone_jobs.append((zone_result[0], svg))
+
+    saved = []
+    pipeline.on_zone_saved(zone_result, saved.append)
+    screenshot.set_result("zone.png")
+    assert saved == []
+    svg.set_result((True, [{"title": "Бампер", "svg_path": "/static/svgs/bamper.svg"}]))
+    assert len(saved) == 1
+    assert zone_is_complete(saved[0])
+    assert zone_result[0]["details"] == []  # Данные заявки заполняет collect_zone_details
+
+
+def test_zone_not_journaled_when_screenshot_fails():
+    pipeline = ArtifactPipeline()
+    zone_result = pictogram_zone("Салон")
+    screenshot = Future()
+    pipeline._jobs[zone_result[0]["screenshot_path"]] = screenshot
+
+    saved = []
+    pipeline.on_zone_saved(zone_result, saved.append)
+    screenshot.set_exception(OSError("disk full"))
+    assert saved == []
+
+
+if __name__ == "__main__":
+    tests = [value for name, value in list(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    print(f"🧪 Пройдено тестов: {len(tests)}")